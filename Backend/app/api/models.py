@@ -129,13 +129,27 @@ class LoanApplicationRequest(BaseModel):
         }
 
 class ModelPrediction(BaseModel):
-    model1_prediction: int
-    model2_prediction: int
-    model3_prediction: int
+    # Member votes are null when the cascade skipped that member
+    model1_prediction: Optional[int]
+    model2_prediction: Optional[int]
+    model3_prediction: Optional[int]
     ensemble_prediction: int
-    default_probability: float
+    default_probability: Optional[float]
     feature_importance: Optional[Dict[str, float]] = None
+    model_version: Optional[str] = None
+    skipped_models: List[str] = []
 
 class SyntheticGenerationRequest(BaseModel):
     count: int = Field(1, ge=1, le=100)
-    default_ratio: Optional[float] = Field(0.3, ge=0, le=1)
\ No newline at end of file
+    default_ratio: Optional[float] = Field(0.3, ge=0, le=1)
+    seed: Optional[int] = None
+
+class SyntheticStreamRequest(BaseModel):
+    count: int = Field(1, ge=1, le=10_000_000)
+    default_ratio: Optional[float] = Field(0.3, ge=0, le=1)
+    seed: Optional[int] = None
+    chunk_size: int = Field(1000, ge=1, le=10_000)
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = None  # None reloads the version named by CURRENT
+    activate: bool = True  # Point CURRENT at the version, so other workers and restarts follow
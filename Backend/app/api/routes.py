@@ -1,34 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import AsyncIterator, List, Optional
+import asyncio
+import hmac
+import json
 
 from app.api.models import (
     LoanApplicationRequest,
     ModelPrediction,
-    SyntheticGenerationRequest
+    ModelReloadRequest,
+    SyntheticGenerationRequest,
+    SyntheticStreamRequest
 )
-from app.services.model_service import ModelService, get_model_service
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+from app.core.middleware import timed_handler
+from app.services.model_service import (
+    ModelService,
+    get_model_registry,
+    get_model_service,
+    peek_model_service
+)
+from app.services.model_registry import ModelRegistry
+from app.services.batching import MicroBatcher, get_micro_batcher
+from app.services.prediction_cache import PredictionCache, get_prediction_cache
 from app.services.synthetic_service import SyntheticService, get_synthetic_service
 
 router = APIRouter()
 
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving HTTP
+    """
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness(request: Request):
+    """
+    Readiness probe: models are loaded and warmed up, with per-artifact load timings
+    """
+    service = peek_model_service()
+    error = getattr(request.app.state, "model_load_error", None)
+    if service is None or not service.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"ready": False, "error": error}
+        )
+    return {"ready": True, "model_version": service.model_version, "load_timings": service.load_timings}
+
 @router.post("/predict", response_model=ModelPrediction)
+@timed_handler
 async def predict_loan_default(
     application: LoanApplicationRequest,
-    model_service: ModelService = Depends(get_model_service)
+    model_service: ModelService = Depends(get_model_service),
+    batcher: Optional[MicroBatcher] = Depends(get_micro_batcher),
+    cache: Optional[PredictionCache] = Depends(get_prediction_cache)
 ):
     """
     Predict loan default probability using the ensemble of models
     """
+    async def score() -> ModelPrediction:
+        # Scored by the same service whose model_version keys the cache entry
+        if batcher is not None:
+            return await batcher.submit(application, model_service)
+        return await model_service.predict_async(application)
+    
     try:
-        prediction = model_service.predict(application)
-        return prediction
+        if cache is not None:
+            return await cache.get_or_compute(application, model_service.model_version, score)
+        return await score()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction error: {str(e)}"
         )
 
+@router.post("/predict-batch", response_model=List[ModelPrediction])
+@timed_handler
+async def predict_loan_default_batch(
+    applications: List[LoanApplicationRequest],
+    model_service: ModelService = Depends(get_model_service)
+):
+    """
+    Predict loan default for a batch of applications in one vectorized pass
+    """
+    try:
+        return await model_service.predict_batch_async(applications)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch prediction error: {str(e)}"
+        )
+
 @router.post("/generate-synthetic", response_model=List[LoanApplicationRequest])
+@timed_handler
 async def generate_synthetic_data(
     request: SyntheticGenerationRequest,
     synthetic_service: SyntheticService = Depends(get_synthetic_service)
@@ -39,7 +105,8 @@ async def generate_synthetic_data(
     try:
         synthetic_data = synthetic_service.generate(
             count=request.count,
-            default_ratio=request.default_ratio
+            default_ratio=request.default_ratio,
+            seed=request.seed
         )
         return synthetic_data
     except Exception as e:
@@ -49,6 +116,7 @@ async def generate_synthetic_data(
         )
 
 @router.post("/predict-synthetic", response_model=List[ModelPrediction])
+@timed_handler
 async def predict_with_synthetic(
     request: SyntheticGenerationRequest,
     synthetic_service: SyntheticService = Depends(get_synthetic_service),
@@ -58,14 +126,15 @@ async def predict_with_synthetic(
     Generate synthetic data and predict loan default in one step
     """
     try:
-        # Generate synthetic data
-        synthetic_data = synthetic_service.generate(
+        # Generate synthetic data as columns (no per-row request objects)
+        synthetic_data = synthetic_service.generate_columns(
             count=request.count,
-            default_ratio=request.default_ratio
+            default_ratio=request.default_ratio,
+            seed=request.seed
         )
         
         # Make predictions
-        predictions = [model_service.predict(application) for application in synthetic_data]
+        predictions = await model_service.predict_columns_async(synthetic_data)
         
         # Return both synthetic data and predictions
         return predictions
@@ -73,4 +142,138 @@ async def predict_with_synthetic(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Synthetic prediction error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def _synthetic_ndjson(
+    request: SyntheticStreamRequest,
+    synthetic_service: SyntheticService,
+    model_service: Optional[ModelService] = None
+) -> AsyncIterator[bytes]:
+    """
+    Generate (and optionally score) synthetic rows chunk by chunk as NDJSON lines.
+    Only one chunk is held in memory at a time.
+    """
+    chunks = synthetic_service.generate_chunks(
+        count=request.count,
+        default_ratio=request.default_ratio,
+        seed=request.seed,
+        chunk_size=request.chunk_size
+    )
+    try:
+        for chunk in chunks:
+            is_defaulter = chunk.pop("is_defaulter").tolist()
+            inputs = chunk.to_dict("records")
+            if model_service is None:
+                lines = [
+                    json.dumps({"input": row, "is_defaulter": flag})
+                    for row, flag in zip(inputs, is_defaulter)
+                ]
+            else:
+                predictions = await model_service.predict_columns_async(chunk)
+                lines = [
+                    json.dumps({"input": row, "is_defaulter": flag, "prediction": prediction.dict()})
+                    for row, flag, prediction in zip(inputs, is_defaulter, predictions)
+                ]
+            yield ("\n".join(lines) + "\n").encode()
+    except Exception as e:
+        # Headers are already sent; report the failure in-band and stop
+        yield (json.dumps({"error": getattr(e, "detail", str(e))}) + "\n").encode()
+
+@router.post("/generate-synthetic/stream")
+async def generate_synthetic_stream(
+    request: SyntheticStreamRequest,
+    synthetic_service: SyntheticService = Depends(get_synthetic_service)
+):
+    """
+    Stream synthetic loan applications as NDJSON, generated in fixed-size chunks
+    """
+    return StreamingResponse(
+        _synthetic_ndjson(request, synthetic_service),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+@router.post("/predict-synthetic/stream")
+async def predict_synthetic_stream(
+    request: SyntheticStreamRequest,
+    synthetic_service: SyntheticService = Depends(get_synthetic_service),
+    model_service: ModelService = Depends(get_model_service)
+):
+    """
+    Stream synthetic applications with their predictions as NDJSON
+    ({"input", "is_defaulter", "prediction"} per line), generated and scored in chunks
+    """
+    return StreamingResponse(
+        _synthetic_ndjson(request, synthetic_service, model_service),
+        media_type=NDJSON_MEDIA_TYPE
+    )
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Per-stage latency histograms, request/error counts and model load
+    durations in Prometheus text format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/batching")
+async def batching_metrics(
+    batcher: Optional[MicroBatcher] = Depends(get_micro_batcher)
+):
+    """
+    Batch-size distribution and queue wait of the /predict micro-batcher
+    """
+    if batcher is None:
+        return {"enabled": False}
+    return batcher.stats()
+
+@router.get("/metrics/cache")
+async def cache_metrics(
+    cache: Optional[PredictionCache] = Depends(get_prediction_cache)
+):
+    """
+    Size and hit/miss counters of the /predict result cache
+    """
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set, and then require it"""
+    expected = get_settings().ADMIN_TOKEN
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled (set ADMIN_TOKEN)"
+        )
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+@router.get("/admin/models", dependencies=[Depends(require_admin)])
+async def model_versions(
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Served model version, the CURRENT pointer, available versions and the last reload
+    """
+    return registry.status()
+
+@router.post("/admin/reload", dependencies=[Depends(require_admin)])
+async def reload_models(
+    request: ModelReloadRequest,
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Load a model version in the background and swap it in atomically.
+    Requests already being scored finish on the previous version.
+    """
+    try:
+        return await asyncio.to_thread(registry.load, request.version, request.activate)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Reload error: {str(e)}"
+        )
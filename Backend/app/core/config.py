@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
-from typing import List, ClassVar
+from typing import List, ClassVar, Optional
+from functools import lru_cache
 import os
 
 
@@ -22,9 +23,87 @@ class Settings(BaseSettings):
     MODEL_3_PATH: str = "neural_network_model.h5"
     PREPROCESSOR_PATH: str = "preprocessor.pkl"
 
+    # Neural network engine: "numpy" (exported weights, no TensorFlow) or "keras".
+    # The numpy engine falls back to Keras when the weight file is missing.
+    NN_ENGINE: str = "numpy"
+    NN_WEIGHTS_PATH: str = "neural_network_model.npz"
+
+    # Random forest engine: "compact" (flattened arrays, see export_rf_arrays) or
+    # "sklearn". The compact engine falls back to the pickle when its file is
+    # missing or older than the pickle.
+    RF_ENGINE: str = "compact"
+    RF_ARRAYS_PATH: str = "random_forest_model.npz"
+
+    # Artifact format: "mmap" loads MODEL_DIR/<ARTIFACT_BUNDLE_DIR> (raw .npy arrays
+    # memory-mapped read-only and shared through the page cache across worker
+    # processes; see export_artifact_bundle) and falls back to the pickles when
+    # it is missing, when a source artifact changed after the export, or when
+    # RF_ENGINE/NN_ENGINE select the sklearn/Keras engines. "pickle" always
+    # loads the pickles.
+    ARTIFACT_FORMAT: str = "mmap"
+    ARTIFACT_BUNDLE_DIR: str = "bundle"
+
+    # Model engine: "native" (the per-model engines and artifact format above) or
+    # "onnx": the preprocessor and all three models run as onnxruntime sessions
+    # from MODEL_DIR/<ONNX_DIR> (see export_onnx), one run call per model per
+    # batch, with WORKER_THREADS intra-op threads. Falls back to "native" when
+    # the export is missing.
+    MODEL_ENGINE: str = "native"
+    ONNX_DIR: str = "onnx"
+
+    # Serving hot path: encode requests straight into NumPy instead of pandas
+    USE_COMPILED_ENCODER: bool = True
+
+    # Start-up: load models in a lifespan hook (not on the first request), then
+    # score this many synthetic rows before reporting ready
+    EAGER_MODEL_LOADING: bool = True
+    WARMUP_ROWS: int = 8
+
+    # Inference executor: "thread", "process" (models preloaded per worker) or "none"
+    INFERENCE_POOL_TYPE: str = "thread"
+    INFERENCE_POOL_SIZE: int = 4
+
+    # Score the three ensemble members concurrently on a dedicated 3-thread pool
+    # (latency close to the slowest model instead of the sum; XGBoost, TensorFlow
+    # and sklearn tree traversal release the GIL)
+    PARALLEL_ENSEMBLE: bool = False
+
+    # Ensemble: "vote" scores all three members; "cascade" scores the first two
+    # of CASCADE_ORDER and the third only when they disagree (same majority vote;
+    # skipped members are null in the response, and default_probability is null
+    # when the neural network is skipped)
+    ENSEMBLE_MODE: str = "vote"
+    CASCADE_ORDER: List[str] = ["xgboost", "neural_network", "random_forest"]
+
+    # Serving processes (python -m app.serve). With WORKERS > 1 the models are
+    # loaded once in a parent process and shared copy-on-write with forked
+    # workers. WORKER_THREADS caps native (OpenMP/BLAS/XGBoost/joblib) threads
+    # per worker; 0 splits the CPU cores evenly between workers.
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 1
+    WORKER_THREADS: int = 0
+
+    # Versioned models (MODEL_DIR/versions/<v> + MODEL_DIR/CURRENT): how often
+    # to check CURRENT and hot-reload when it changes (0 disables the watch),
+    # and the X-Admin-Token required by /api/admin/* (unset disables them)
+    MODEL_WATCH_INTERVAL_SECONDS: float = 10.0
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Micro-batching of concurrent /predict calls
+    MICROBATCH_ENABLED: bool = True
+    MICROBATCH_MAX_SIZE: int = 64
+    MICROBATCH_WINDOW_MS: float = 2.0
+
+    # Prediction result cache (keyed on the application and the model version)
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_SIZE: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: float = 300.0
+
     class Config:
         env_file = ".env"  # Load from a .env file
 
-# Global function to get settings
+# Global function to get settings (cached: Settings re-reads .env on construction)
+@lru_cache()
 def get_settings():
     return Settings()
@@ -0,0 +1,215 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Bucket upper bounds for latency histograms, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> _LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: _LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = [
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    ]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Collection of metrics rendered together in Prometheus text format"""
+        self._metrics = []
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Add a callable returning extra exposition lines, evaluated on every scrape"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Counter:
+    def __init__(self, name: str, description: str, registry: MetricsRegistry = REGISTRY):
+        """Monotonic counter, optionally split by labels"""
+        self.name = name
+        self.description = description
+        self._values: Dict[_LabelKey, float] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, description: str, registry: MetricsRegistry = REGISTRY):
+        """Value that can go up and down, optionally split by labels"""
+        self.name = name
+        self.description = description
+        self._values: Dict[_LabelKey, float] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 registry: MetricsRegistry = REGISTRY):
+        """
+        Thread-safe cumulative histogram, optionally split by labels.
+
+        Parameters:
+        name: Metric name
+        description: One-line description of what is observed
+        buckets: Sorted bucket upper bounds (an implicit +Inf bucket is added)
+        registry: Registry the histogram is exposed through (None: not exposed)
+        """
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts, sum, count]
+        self._series: Dict[_LabelKey, list] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        index = bisect_left(self.buckets, value)
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _cumulative(self, counts: List[int]) -> List[Tuple[float, int]]:
+        result = []
+        running = 0
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], counts):
+            running += bucket_count
+            result.append((bound, running))
+        return result
+
+    def snapshot(self, **labels) -> Dict:
+        """Count, sum and cumulative bucket counts"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else (
+                [0] * (len(self.buckets) + 1), 0.0, 0)
+        cumulative = {
+            "+Inf" if bound == float("inf") else str(bound): running
+            for bound, running in self._cumulative(counts)
+        }
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(s[0]), s[1], s[2]) for key, s in self._series.items())
+        for key, counts, total, count in series:
+            for bound, running in self._cumulative(counts):
+                le = (("le", _format_value(bound) if bound == float("inf") else str(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+# Prediction pipeline instrumentation shared across the service
+
+STAGE_LATENCY = Histogram(
+    "ldps_stage_duration_seconds",
+    "Time spent in each prediction pipeline stage (per scored batch)"
+)
+REQUEST_LATENCY = Histogram(
+    "ldps_http_request_duration_seconds",
+    "End-to-end HTTP request latency"
+)
+REQUESTS = Counter("ldps_http_requests_total", "HTTP requests handled")
+ERRORS = Counter("ldps_http_errors_total", "HTTP requests that ended in a 5xx response or an exception")
+PREDICTION_ERRORS = Counter("ldps_prediction_errors_total", "Batches that failed inside ModelService")
+PREDICTED_ROWS = Counter("ldps_predicted_rows_total", "Applications scored by ModelService")
+MODEL_LOAD_SECONDS = Gauge(
+    "ldps_model_load_duration_seconds",
+    "Time taken to load each model artifact (plus total and warmup)"
+)
+MEMBER_ROWS = Counter("ldps_ensemble_member_rows_total", "Rows scored by each ensemble member")
+CASCADE_EARLY_EXITS = Counter(
+    "ldps_cascade_early_exit_rows_total",
+    "Rows settled by the first two cascade members (third member skipped)"
+)
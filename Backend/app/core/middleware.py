@@ -0,0 +1,66 @@
+import functools
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.metrics import ERRORS, REQUEST_LATENCY, REQUESTS, STAGE_LATENCY
+
+# Per-request timings shared between the middleware and instrumented handlers
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def timed_handler(endpoint):
+    """
+    Record how long a route handler body takes, so the metrics middleware can
+    attribute the rest of the request time to the framework stage (request
+    validation, dependency resolution and response serialization)
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings = _request_timings.get()
+            if timings is not None:
+                timings["handler"] = time.perf_counter() - started
+    return wrapper
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """ASGI middleware recording request counts, errors and latency per route"""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        response_status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            elapsed = time.perf_counter() - started
+            # Route templates keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            code = response_status[0]
+
+            REQUEST_LATENCY.observe(elapsed, method=method, path=path)
+            REQUESTS.inc(method=method, path=path, status=code)
+            if code >= 500:
+                ERRORS.inc(method=method, path=path, status=code)
+            if "handler" in timings:
+                STAGE_LATENCY.observe(max(0.0, elapsed - timings["handler"]), stage="framework")
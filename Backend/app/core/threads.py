@@ -0,0 +1,54 @@
+import os
+from contextlib import contextmanager
+
+from app.core.config import Settings
+
+# True while app.serve loads the models in the parent process it forks workers from
+_prefork_load = False
+
+
+def worker_threads(settings: Settings) -> int:
+    """Native threads per serving worker: WORKER_THREADS, or the cores split evenly between workers"""
+    if settings.WORKER_THREADS > 0:
+        return settings.WORKER_THREADS
+    return max(1, (os.cpu_count() or 1) // max(1, settings.WORKERS))
+
+
+@contextmanager
+def prefork_load():
+    """Mark the model load app.serve runs before forking its workers"""
+    global _prefork_load
+    _prefork_load = True
+    try:
+        yield
+    finally:
+        _prefork_load = False
+
+
+def in_prefork_load() -> bool:
+    """Whether models are being loaded in the pre-fork parent (see prefork_load)"""
+    return _prefork_load
+
+
+def limit_native_threads(n_threads: int):
+    """
+    Cap OpenMP and BLAS thread pools in this process (via threadpoolctl, which
+    scikit-learn depends on). Returns the limiter, or None if unavailable.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        print("Warning: threadpoolctl not installed; native thread pools are not limited")
+        return None
+    return threadpool_limits(limits=n_threads)
+
+
+def configure_tensorflow_threads(n_threads: int):
+    """Set TensorFlow's op thread pools (only possible before TensorFlow initialises its runtime)"""
+    import tensorflow as tf
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(n_threads)
+    except RuntimeError as e:
+        print(f"Warning: Could not configure TensorFlow threads: {str(e)}")
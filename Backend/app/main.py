@@ -1,7 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router as api_router
 from app.core.config import get_settings
+from app.core.middleware import MetricsMiddleware
+from app.services.model_service import get_model_service, peek_model_registry, peek_model_service
+
+async def _load_models(application: FastAPI):
+    """Load and warm up the models off the event loop; record any failure for /health/ready"""
+    try:
+        await asyncio.to_thread(get_model_service)
+    except Exception as e:
+        application.state.model_load_error = getattr(e, "detail", str(e))
+        print(f"Startup model loading failed: {application.state.model_load_error}")
+
+async def _watch_models(interval: float):
+    """Hot-reload when MODEL_DIR/CURRENT names a different version than the one served"""
+    while True:
+        await asyncio.sleep(interval)
+        registry = peek_model_registry()
+        if registry is None or not registry.needs_reload():
+            continue
+        try:
+            await asyncio.to_thread(registry.load)
+        except Exception as e:
+            # load() keeps the old version and records the error for /api/admin/models
+            print(f"Model watch reload failed: {getattr(e, 'detail', str(e))}")
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    settings = get_settings()
+    application.state.model_load_error = None
+    
+    # Load in the background so the server answers liveness checks while
+    # /api/health/ready reports 503 until the models are warm
+    loader = None
+    if settings.EAGER_MODEL_LOADING:
+        loader = asyncio.create_task(_load_models(application))
+    watcher = None
+    if settings.MODEL_WATCH_INTERVAL_SECONDS > 0:
+        watcher = asyncio.create_task(_watch_models(settings.MODEL_WATCH_INTERVAL_SECONDS))
+    
+    yield
+    
+    for task in (loader, watcher):
+        if task is not None and not task.done():
+            task.cancel()
+    service = peek_model_service()
+    if service is not None:
+        service.close()
+        if service.executor is not None:
+            service.executor.shutdown(wait=False)
 
 def create_application() -> FastAPI:
     settings = get_settings()
@@ -9,7 +59,8 @@ def create_application() -> FastAPI:
     application = FastAPI(
         title=settings.PROJECT_NAME,
         description=settings.PROJECT_DESCRIPTION,
-        version=settings.PROJECT_VERSION
+        version=settings.PROJECT_VERSION,
+        lifespan=lifespan
     )
     
     # CORS middleware setup
@@ -21,9 +72,13 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # Request counts, errors and latency for /api/metrics (outermost, so it
+    # sees the full request time)
+    application.add_middleware(MetricsMiddleware)
+    
     # Include API routes
     application.include_router(api_router, prefix="/api")
     
     return application
 
-app = create_application()
\ No newline at end of file
+app = create_application()
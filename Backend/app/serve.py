@@ -0,0 +1,138 @@
+"""
+Serving launcher.
+
+    python -m app.serve
+
+With WORKERS=1 this runs a single uvicorn server. With WORKERS > 1 the
+models are loaded and warmed up once in this (parent) process, which then
+forks WORKERS uvicorn workers sharing one listening socket. The workers
+inherit the loaded models copy-on-write instead of each loading its own copy.
+Crashed workers are replaced; SIGINT/SIGTERM stop every worker.
+
+Each process keeps its own metrics, so /api/metrics reports the worker
+that answered the scrape.
+"""
+import os
+import signal
+import socket
+import sys
+import time
+from contextlib import nullcontext
+
+import uvicorn
+
+from app.core.config import Settings, get_settings
+from app.core.threads import limit_native_threads, prefork_load, worker_threads
+
+# Seconds to wait before replacing a worker that exited unexpectedly
+RESPAWN_DELAY = 1.0
+
+
+def _check_fork_safe():
+    """Refuse to fork once state that cannot be inherited has been loaded"""
+    if "tensorflow" in sys.modules:
+        raise RuntimeError(
+            "The Keras engine is loaded and TensorFlow is not fork-safe; export NumPy weights "
+            "(python -m app.utils.export_nn_weights) or run with WORKERS=1"
+        )
+
+
+def _bind(settings: Settings) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.HOST, settings.PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, settings: Settings):
+    """Body of a forked worker; never returns"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    exit_code = 0
+    try:
+        # Models, pools and locks were reset by the after-fork hooks
+        limit_native_threads(worker_threads(settings))
+        server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+        server.run(sockets=[sock])
+    except Exception as e:
+        print(f"Worker {os.getpid()} failed: {str(e)}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def _spawn(app, sock: socket.socket, settings: Settings) -> int:
+    pid = os.fork()
+    if pid == 0:
+        _run_worker(app, sock, settings)
+    print(f"Started worker {pid}")
+    return pid
+
+
+def serve_prefork(settings: Settings):
+    """Load the models once, then fork and supervise WORKERS uvicorn workers"""
+    from app.main import app
+    from app.services.model_service import get_model_service
+    from app.services.synthetic_service import get_synthetic_service
+
+    if settings.INFERENCE_POOL_TYPE == "process":
+        raise RuntimeError(
+            "INFERENCE_POOL_TYPE=process loads a copy of the models in every pool process; "
+            "use 'thread' or 'none' with WORKERS > 1"
+        )
+
+    started = time.perf_counter()
+    # Single-threaded load and warmup: no OpenMP thread pool may exist at fork
+    with prefork_load(), limit_native_threads(1) or nullcontext():
+        get_model_service()
+    get_synthetic_service()
+    _check_fork_safe()
+    print(f"Parent {os.getpid()} loaded models in {time.perf_counter() - started:.2f}s; "
+          f"forking {settings.WORKERS} workers with {worker_threads(settings)} threads each")
+
+    sock = _bind(settings)
+    workers = {_spawn(app, sock, settings) for _ in range(settings.WORKERS)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}; replacing it")
+            time.sleep(RESPAWN_DELAY)
+            workers.add(_spawn(app, sock, settings))
+    sock.close()
+
+
+def main():
+    settings = get_settings()
+    if settings.WORKERS <= 1:
+        limit_native_threads(worker_threads(settings))
+        uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT)
+        return
+    if not hasattr(os, "fork"):
+        raise RuntimeError("WORKERS > 1 requires a platform with os.fork")
+    serve_prefork(settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.compact_forest import CompactForest
+from app.services.numpy_mlp import NumpyMLP
+from app.utils.feature_encoder import CompiledEncoder
+
+# Version of the bundle layout described by manifest.json
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+XGBOOST_FILE = "xgb_model.ubj"
+
+
+def _plain(value):
+    """JSON-serialisable copy of a NumPy scalar"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _save_arrays(bundle_dir: str, prefix: str, arrays: Dict[str, np.ndarray]) -> Dict:
+    """
+    Write each numeric array to <prefix>.<name>.npy. Scalars and string arrays
+    (format versions, activation names, ...) are kept inline in the manifest.
+    """
+    files, values = {}, {}
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        if array.ndim == 0 or array.dtype.kind in "US":
+            values[name] = array.tolist()
+            continue
+        file_name = f"{prefix}.{name}.npy"
+        np.save(os.path.join(bundle_dir, file_name), np.ascontiguousarray(array), allow_pickle=False)
+        files[name] = file_name
+    return {"files": files, "values": values}
+
+
+def _load_arrays(bundle_dir: str, spec: Dict) -> Dict[str, np.ndarray]:
+    """Memory-map every array listed in the manifest (read-only, no pickle)"""
+    arrays = {name: np.array(value) for name, value in spec["values"].items()}
+    for name, file_name in spec["files"].items():
+        arrays[name] = np.load(os.path.join(bundle_dir, file_name), mmap_mode="r", allow_pickle=False)
+    return arrays
+
+
+def source_fingerprint(model_dir: str, names: Sequence[str]) -> Dict[str, List[int]]:
+    """Size and modification time of each of the named source artifacts present in model_dir"""
+    sources = {}
+    for name in names:
+        path = os.path.join(model_dir, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            sources[name] = [stat.st_size, stat.st_mtime_ns]
+    return sources
+
+
+def stale_reason(model_dir: str, manifest: Dict, names: Sequence[str]) -> Optional[str]:
+    """
+    Why a bundle no longer matches the source artifacts it was exported from.
+
+    Parameters:
+    model_dir: Directory holding the source artifacts
+    manifest: The bundle's manifest
+    names: Source artifact file names to compare
+
+    Returns:
+    reason: Description of the mismatch, or None when the bundle is current
+    """
+    recorded = manifest.get("sources")
+    if recorded is None:
+        return "it records no fingerprint of its source artifacts"
+    current = source_fingerprint(model_dir, names)
+    changed = sorted(name for name in set(recorded) | set(current) if recorded.get(name) != current.get(name))
+    if changed:
+        return f"{', '.join(changed)} changed since it was exported"
+    return None
+
+
+def write_bundle(bundle_dir: str, forest: CompactForest, xgb_model, mlp: NumpyMLP,
+                 encoder: CompiledEncoder, feature_names: Optional[List[str]] = None,
+                 sources: Optional[Dict[str, List[int]]] = None) -> Dict:
+    """
+    Write the serving artifacts as raw .npy arrays plus a JSON manifest.
+
+    The bundle is assembled in a temporary directory next to bundle_dir and
+    moved into place at the end, so readers never see a partial bundle.
+
+    Parameters:
+    bundle_dir: Destination directory (replaced if it exists)
+    forest: Random forest as a CompactForest
+    xgb_model: Fitted XGBClassifier (stored with save_model, not pickle)
+    mlp: Neural network as a NumpyMLP
+    encoder: CompiledEncoder equivalent to the fitted Preprocessor
+    feature_names: Names reported with feature importances (optional)
+    sources: source_fingerprint of the artifacts the bundle was converted from;
+        the service ignores a bundle whose sources have changed since (optional)
+
+    Returns:
+    manifest: The manifest that was written
+    """
+    parent = os.path.dirname(os.path.abspath(bundle_dir))
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=parent)
+    try:
+        xgb_model.save_model(os.path.join(staging, XGBOOST_FILE))
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "random_forest": {"arrays": _save_arrays(staging, "random_forest", forest.to_arrays())},
+            "xgboost": {"file": XGBOOST_FILE},
+            "neural_network": {"arrays": _save_arrays(staging, "neural_network", mlp.to_arrays())},
+            "encoder": {
+                "categorical_features": encoder.categorical_features,
+                "categories": {
+                    feature: [_plain(value) for value in values]
+                    for feature, values in encoder.categories.items()
+                },
+                "numerical_features": encoder.numerical_features,
+                "arrays": _save_arrays(staging, "encoder", {
+                    name: array for name, array in (("mean", encoder.mean), ("scale", encoder.scale))
+                    if array is not None
+                })
+            },
+            "feature_names": None if feature_names is None else [str(name) for name in feature_names],
+            "sources": sources
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(bundle_dir):
+            shutil.rmtree(bundle_dir)
+        os.replace(staging, bundle_dir)
+        return manifest
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def read_manifest(bundle_dir: str) -> Dict:
+    """Parse and version-check a bundle manifest"""
+    with open(os.path.join(bundle_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    version = manifest.get("format_version")
+    if version != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact bundle format version {version}")
+    return manifest
+
+
+def load_random_forest(bundle_dir: str, manifest: Dict) -> CompactForest:
+    return CompactForest.from_arrays(_load_arrays(bundle_dir, manifest["random_forest"]["arrays"]))
+
+
+def load_xgboost(bundle_dir: str, manifest: Dict):
+    from xgboost import XGBClassifier
+
+    model = XGBClassifier()
+    model.load_model(os.path.join(bundle_dir, manifest["xgboost"]["file"]))
+    return model
+
+
+def load_neural_network(bundle_dir: str, manifest: Dict) -> NumpyMLP:
+    return NumpyMLP.from_arrays(_load_arrays(bundle_dir, manifest["neural_network"]["arrays"]))
+
+
+def load_encoder(bundle_dir: str, manifest: Dict) -> CompiledEncoder:
+    spec = manifest["encoder"]
+    arrays = _load_arrays(bundle_dir, spec["arrays"])
+    return CompiledEncoder(
+        spec["categorical_features"],
+        spec["categories"],
+        spec["numerical_features"],
+        mean=arrays.get("mean"),
+        scale=arrays.get("scale")
+    )
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.api.models import LoanApplicationRequest, ModelPrediction
+from app.core.config import get_settings
+from app.core.metrics import Histogram
+from app.services.model_service import ModelService, get_model_service
+
+BATCH_SIZE = Histogram(
+    "ldps_microbatch_size",
+    "Number of requests coalesced into one scoring batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+QUEUE_WAIT = Histogram(
+    "ldps_microbatch_queue_wait_seconds",
+    "Time a request waits in the coalescing queue before its batch is scored"
+)
+
+# (application, service it was submitted for, caller future, enqueue time)
+_Item = Tuple[LoanApplicationRequest, Optional[ModelService], asyncio.Future, float]
+
+
+class MicroBatcher:
+    def __init__(self, get_service: Callable[[], ModelService], max_batch_size: int = 64,
+                 window_ms: float = 2.0, max_in_flight: int = 1):
+        """
+        Coalesce concurrent single-application predictions into batches.
+
+        Parameters:
+        get_service: Returns the service that scores requests submitted without one
+                     (looked up per batch, so model reloads take effect)
+        max_batch_size: Flush a batch as soon as it holds this many requests
+        window_ms: Longest time the first request of a batch waits for company
+        max_in_flight: Batches scored concurrently (match the inference pool size)
+        """
+        self.get_service = get_service
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        """Bind the queue and collector task to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = loop.create_task(self._collect())
+
+    async def submit(self, application: LoanApplicationRequest,
+                     service: Optional[ModelService] = None) -> ModelPrediction:
+        """
+        Queue one application and wait for its prediction.
+
+        Parameters:
+        application: Application to score
+        service: Service that must score it, e.g. the one a cache key was built
+                 from (None: the current service when its batch runs)
+
+        Returns:
+        prediction: The application's prediction
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((application, service, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """Gather requests into batches and hand each batch to the scorer"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free scoring slot first: while every slot is busy the
+            # queue keeps filling, so the next batch comes out larger
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self._score(batch))
+
+    async def _score(self, batch: List[_Item]):
+        """Score one batch and resolve each caller's future"""
+        try:
+            batch = [item for item in batch if not item[2].cancelled()]
+            if not batch:
+                return
+            started = time.perf_counter()
+            for _, _, _, enqueued in batch:
+                QUEUE_WAIT.observe(started - enqueued)
+            BATCH_SIZE.observe(len(batch))
+
+            # A reload can land between the requests of one batch: each request is
+            # scored by the service it was submitted for, one call per service
+            groups: Dict[int, Tuple[ModelService, List[_Item]]] = {}
+            current = None
+            for item in batch:
+                service = item[1]
+                if service is None:
+                    current = current or self.get_service()
+                    service = current
+                groups.setdefault(id(service), (service, []))[1].append(item)
+            for service, items in groups.values():
+                await self._score_with(service, items)
+        finally:
+            self._slots.release()
+
+    async def _score_with(self, service: ModelService, items: List[_Item]):
+        """Score requests with one service and resolve their futures"""
+        try:
+            predictions = await service.predict_batch_async([item[0] for item in items])
+        except Exception as e:
+            for _, _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future, _), prediction in zip(items, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+    def stats(self) -> dict:
+        """Batch-size distribution and queue wait histograms"""
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window * 1000.0,
+            "batch_size": BATCH_SIZE.snapshot(),
+            "queue_wait_seconds": QUEUE_WAIT.snapshot()
+        }
+
+
+@lru_cache()
+def get_micro_batcher() -> Optional[MicroBatcher]:
+    """Factory function for MicroBatcher (singleton pattern, None when disabled)"""
+    settings = get_settings()
+    if not settings.MICROBATCH_ENABLED:
+        return None
+    return MicroBatcher(
+        get_model_service,
+        max_batch_size=settings.MICROBATCH_MAX_SIZE,
+        window_ms=settings.MICROBATCH_WINDOW_MS,
+        max_in_flight=settings.INFERENCE_POOL_SIZE if settings.INFERENCE_POOL_TYPE != "none" else 1
+    )
+
+if hasattr(os, "register_at_fork"):
+    # The batcher's queue and futures belong to the parent's event loop
+    os.register_at_fork(after_in_child=get_micro_batcher.cache_clear)
@@ -0,0 +1,236 @@
+import numpy as np
+from typing import Dict, Tuple
+
+# Version of the exported forest file layout (1: separate left/right arrays)
+FOREST_FORMAT_VERSION = 2
+
+# Upper bound on (row, tree) pairs traversed at once, to cap temporary memory
+MAX_PAIRS_PER_CHUNK = 1 << 21
+
+
+def _float32_floor(threshold: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 <= each float64 threshold.
+
+    sklearn compares float32 inputs against float64 thresholds; for a float32 x,
+    x <= t exactly when x <= floor32(t), so comparing in float32 is lossless.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class CompactForest:
+    def __init__(self, feature, threshold, children, leaf_value, roots, classes, feature_importances=None):
+        """
+        RandomForestClassifier inference over flat NumPy arrays.
+
+        Nodes of every tree are concatenated. A child index >= 0 is the next
+        node; a negative child c is a leaf, with leaf_value row ~c. Arrays are
+        used as given when their dtypes match, so memory-mapped arrays stay mapped.
+
+        Parameters:
+        feature: Split feature per node (int32)
+        threshold: Split threshold per node, go left when x <= threshold (float32)
+        children: Interleaved (right, left) children, children[2 * node + went_left] (int32)
+        leaf_value: Class probabilities per leaf, shape (n_leaves, n_classes) (float64)
+        roots: Root per tree, encoded like a child (int32)
+        classes: Class labels, as RandomForestClassifier.classes_
+        feature_importances: RandomForestClassifier.feature_importances_
+        """
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.children = np.asarray(children, dtype=np.int32)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.classes_ = np.asarray(classes)
+        self.feature_importances_ = None if feature_importances is None else np.asarray(
+            feature_importances, dtype=np.float64)
+
+    @staticmethod
+    def interleave(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Children array from separate left/right arrays (one gather picks the next node)"""
+        children = np.empty(2 * len(left), dtype=np.int32)
+        children[0::2] = right
+        children[1::2] = left
+        return children
+
+    @property
+    def left(self) -> np.ndarray:
+        return self.children[1::2]
+
+    @property
+    def right(self) -> np.ndarray:
+        return self.children[0::2]
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children,
+                                      self.leaf_value, self.roots))
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompactForest":
+        """Flatten a fitted single-output RandomForestClassifier"""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, leaf_values, roots = [], [], [], [], [], []
+        node_offset = 0
+        leaf_offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            # Node id -> global node index (splits) or encoded leaf (leaves)
+            leaf_ids = np.cumsum(is_leaf) - 1 + leaf_offset
+            split_ids = np.cumsum(~is_leaf) - 1 + node_offset
+            encoded = np.where(is_leaf, ~leaf_ids, split_ids).astype(np.int32)
+
+            splits = ~is_leaf
+            features.append(tree.feature[splits])
+            thresholds.append(tree.threshold[splits])
+            lefts.append(encoded[tree.children_left[splits]])
+            rights.append(encoded[tree.children_right[splits]])
+            roots.append(encoded[0])
+
+            # Normalised exactly as DecisionTreeClassifier.predict_proba does
+            value = tree.value[is_leaf, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            leaf_values.append(value / normalizer)
+
+            node_offset += int(splits.sum())
+            leaf_offset += int(is_leaf.sum())
+
+        if max(node_offset, leaf_offset) >= np.iinfo(np.int32).max:
+            raise ValueError("Forest is too large for int32 node indices")
+
+        threshold = _float32_floor(np.concatenate(thresholds).astype(np.float64))
+        return cls(
+            feature=np.concatenate(features),
+            threshold=threshold,
+            children=cls.interleave(np.concatenate(lefts), np.concatenate(rights)),
+            leaf_value=np.concatenate(leaf_values),
+            roots=np.array(roots),
+            classes=model.classes_,
+            feature_importances=getattr(model, "feature_importances_", None)
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Plain-array representation of the forest"""
+        arrays = {
+            "format_version": np.array(FOREST_FORMAT_VERSION),
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "children": self.children,
+            "leaf_value": self.leaf_value,
+            "roots": self.roots,
+            "classes": self.classes_
+        }
+        if self.feature_importances_ is not None:
+            arrays["feature_importances"] = self.feature_importances_
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "CompactForest":
+        """Rebuild the forest from to_arrays() output"""
+        version = int(arrays["format_version"])
+        if version == 1:
+            children = cls.interleave(arrays["left"], arrays["right"])
+        elif version == FOREST_FORMAT_VERSION:
+            children = arrays["children"]
+        else:
+            raise ValueError(f"Unsupported forest format version {version}")
+        return cls(
+            feature=arrays["feature"],
+            threshold=arrays["threshold"],
+            children=children,
+            leaf_value=arrays["leaf_value"],
+            roots=arrays["roots"],
+            classes=arrays["classes"],
+            feature_importances=arrays["feature_importances"] if "feature_importances" in arrays else None
+        )
+
+    def save(self, filename: str):
+        """Save the forest to an .npz file"""
+        np.savez(filename, **self.to_arrays())
+
+    @classmethod
+    def load(cls, filename: str) -> "CompactForest":
+        """Load a forest saved with save()"""
+        with np.load(filename, allow_pickle=False) as arrays:
+            return cls.from_arrays(arrays)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf reached by every (row, tree) pair, shape (n_rows, n_trees)"""
+        n_rows, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        # Tree-major pair order keeps consecutive lookups inside one tree's nodes
+        pairs = np.arange(self.n_estimators * n_rows)
+        offsets = np.tile(np.arange(n_rows) * n_features, self.n_estimators)
+        nodes = np.repeat(self.roots, n_rows)
+        leaves = np.empty(len(pairs), dtype=np.int32)
+
+        # Every unfinished pair takes one step down its tree per iteration
+        while True:
+            done = nodes < 0
+            n_done = np.count_nonzero(done)
+            if n_done:
+                leaves[pairs[done]] = ~nodes[done]
+                if n_done == len(nodes):
+                    break
+                active = ~done
+                pairs, offsets, nodes = pairs[active], offsets[active], nodes[active]
+            go_left = flat[offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return leaves.reshape(self.n_estimators, n_rows).T
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Mean of the per-tree class probabilities, like RandomForestClassifier.predict_proba"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D array, got shape {X.shape}")
+        proba = np.zeros((len(X), self.leaf_value.shape[1]), dtype=np.float64)
+        chunk_rows = max(1, MAX_PAIRS_PER_CHUNK // max(1, self.n_estimators))
+        for start in range(0, len(X), chunk_rows):
+            leaves = self._leaves(X[start:start + chunk_rows])
+            chunk = proba[start:start + chunk_rows]
+            # Accumulate tree by tree, in the same order as sklearn
+            for tree in range(self.n_estimators):
+                chunk += self.leaf_value[leaves[:, tree]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Most probable class per row, like RandomForestClassifier.predict"""
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compare_with_sklearn(model, forest: CompactForest, X=None, n_rows: int = 2048,
+                         seed: int = 0) -> Tuple[int, float]:
+    """
+    Disagreement between a RandomForestClassifier and its CompactForest.
+
+    Parameters:
+    model: The fitted RandomForestClassifier
+    forest: CompactForest converted from it
+    X: Rows to compare on (default: random standardized inputs)
+    n_rows: Number of random rows when X is not given
+    seed: Seed for the random rows
+
+    Returns:
+    mismatches: Rows whose predicted class differs
+    max_difference: Largest absolute difference in predicted probability
+    """
+    if X is None:
+        rng = np.random.default_rng(seed)
+        X = rng.standard_normal((n_rows, model.n_features_in_))
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X)
+    mismatches = int(np.sum(model.predict(X) != forest.predict(X)))
+    return mismatches, float(np.max(np.abs(expected - actual)))
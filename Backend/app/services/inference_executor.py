@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import Settings
+
+POOL_TYPES = ("thread", "process", "none")
+
+# ModelService owned by a process-pool worker (loaded once by the initializer)
+_worker_service = None
+
+
+def _load_worker_service(model_dir: str, version: Optional[str]):
+    global _worker_service
+    from app.services.model_service import ModelService
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    _worker_service = ModelService(model_dir=model_dir, settings=settings, version=version)
+    _worker_service.warmup(settings.WARMUP_ROWS)
+
+
+def _init_worker(model_dir: str):
+    """Process-pool initializer: load the served model version once per worker process"""
+    from app.services.model_registry import ModelRegistry
+    from app.core.config import get_settings
+
+    version, path = ModelRegistry(get_settings()).resolve()
+    _load_worker_service(path, version)
+
+
+def _worker_ready() -> bool:
+    """No-op task used to force worker start-up (and model loading)"""
+    return _worker_service is not None
+
+
+def _worker_call(model_dir: str, version: Optional[str], method: str, *args):
+    """Call a ModelService method inside a process-pool worker, on the caller's model version"""
+    try:
+        if _worker_service is None or _worker_service.model_dir != model_dir:
+            # The parent swapped versions: follow it (loaded once per worker)
+            _load_worker_service(model_dir, version)
+        return getattr(_worker_service, method)(*args)
+    except Exception as e:
+        # HTTPException does not survive pickling back to the parent
+        raise RuntimeError(getattr(e, "detail", str(e))) from None
+
+
+class InferenceExecutor:
+    def __init__(self, pool_type: str = "thread", pool_size: int = 4, model_dir: Optional[str] = None):
+        """
+        Run blocking model inference off the asyncio event loop.
+
+        Parameters:
+        pool_type: "thread" (shares the service's models), "process" (each worker
+                   loads its own copy of the models) or "none" (run inline)
+        pool_size: Number of pool workers
+        model_dir: Model directory, required for process pools
+        """
+        if pool_type not in POOL_TYPES:
+            raise ValueError(f"Unknown inference pool type '{pool_type}', expected one of {POOL_TYPES}")
+        if pool_type == "process" and not model_dir:
+            raise ValueError("A model directory is required for a process pool")
+
+        self.pool_type = pool_type
+        self.pool_size = max(1, pool_size)
+        self.model_dir = model_dir
+        self._pool = self._create_pool()
+
+    def _create_pool(self):
+        if self.pool_type == "thread":
+            return ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="inference")
+        if self.pool_type == "process":
+            # spawn, not fork: TensorFlow and OpenMP runtimes are not fork-safe
+            return ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_dir,)
+            )
+        return None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InferenceExecutor":
+        """Build the executor configured in Settings"""
+        return cls(
+            pool_type=settings.INFERENCE_POOL_TYPE,
+            pool_size=settings.INFERENCE_POOL_SIZE,
+            model_dir=settings.MODEL_DIR
+        )
+
+    def start(self):
+        """Start every process-pool worker so models are loaded before the first request"""
+        if self.pool_type == "process":
+            for _ in range(self.pool_size):
+                self._pool.submit(_worker_ready)
+
+    async def run(self, service, method: str, *args):
+        """
+        Call a ModelService scoring method on the pool and await the result.
+        Process workers call the method on their own preloaded service.
+        """
+        if self._pool is None:
+            return getattr(service, method)(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.pool_type == "process":
+            return await loop.run_in_executor(
+                self._pool, _worker_call, service.model_dir, service.version, method, *args
+            )
+        return await loop.run_in_executor(self._pool, getattr(service, method), *args)
+
+    def reset_after_fork(self):
+        """
+        Replace the pool in a forked child: the parent's pool threads (and the
+        process pool's management thread) do not exist in the child
+        """
+        if self._pool is not None:
+            self._pool = self._create_pool()
+            self.start()
+
+    def shutdown(self, wait: bool = True):
+        """Shut the pool down"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
@@ -0,0 +1,168 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import Settings
+from app.core.threads import in_prefork_load, worker_threads
+from app.services.inference_executor import InferenceExecutor
+from app.services.model_service import ModelService
+
+# Versioned layout: MODEL_DIR/versions/<version>/ holds one complete artifact
+# set, and MODEL_DIR/CURRENT names the version to serve
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+VERSION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+
+class ModelRegistry:
+    def __init__(self, settings: Settings, executor: Optional[InferenceExecutor] = None):
+        """
+        Holds the ModelService being served and swaps in new versions.
+
+        A reload builds and warms up a complete new ModelService off the
+        request path, then replaces the current one with a single reference
+        assignment. Requests that already hold the old service finish on it.
+        Without a CURRENT file, MODEL_DIR itself is served (unversioned layout).
+
+        Parameters:
+        settings: Application settings (MODEL_DIR is the registry root)
+        executor: Inference executor shared by every loaded version
+        """
+        self.settings = settings
+        self.root = settings.MODEL_DIR
+        self.executor = executor
+        self.current: Optional[ModelService] = None
+        self.current_name: Optional[str] = None  # Version directory name (None: unversioned)
+        self.last_reload: Dict = {}
+        self._failed_pointer: Optional[str] = None  # CURRENT value whose load failed (not retried)
+        self._reload_lock = threading.Lock()
+
+    def _current_file(self) -> str:
+        return os.path.join(self.root, CURRENT_FILE)
+
+    def _version_dir(self, name: str) -> str:
+        if not VERSION_NAME.match(name):
+            raise ValueError(f"Invalid model version name '{name}'")
+        return os.path.join(self.root, VERSIONS_DIR, name)
+
+    def pointer(self) -> Optional[str]:
+        """Version named by the CURRENT file, or None for the unversioned layout"""
+        try:
+            with open(self._current_file()) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name or None
+
+    def resolve(self, name: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """(version name, directory) to load: the given version, else CURRENT, else MODEL_DIR"""
+        name = name or self.pointer()
+        if name is None:
+            return None, self.root
+        path = self._version_dir(name)
+        if not os.path.isdir(path):
+            raise ValueError(f"Model version '{name}' not found in {os.path.dirname(path)}")
+        return name, path
+
+    def versions(self) -> List[str]:
+        """Available version directories"""
+        versions_dir = os.path.join(self.root, VERSIONS_DIR)
+        if not os.path.isdir(versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(versions_dir)
+            if VERSION_NAME.match(name) and os.path.isdir(os.path.join(versions_dir, name))
+        )
+
+    def needs_reload(self) -> bool:
+        """True when CURRENT names a different version than the one being served (and has not failed)"""
+        if self.current is None:
+            return False
+        pointer = self.pointer()
+        return pointer != self.current_name and pointer != self._failed_pointer
+
+    def _build(self, name: Optional[str], path: str) -> ModelService:
+        """Load and warm up a complete ModelService for one version"""
+        service = ModelService(model_dir=path, settings=self.settings, executor=self.executor, version=name)
+        # The load app.serve runs before forking must stay single-threaded so no
+        # OpenMP pool exists at fork; workers raise the limit after fork
+        service.set_threads(1 if in_prefork_load() else worker_threads(self.settings))
+        service.warmup(self.settings.WARMUP_ROWS)
+        return service
+
+    def load(self, name: Optional[str] = None, activate: bool = False) -> Dict:
+        """
+        Build the requested version (default: CURRENT) and swap it in.
+
+        Parameters:
+        name: Version to load; None follows the CURRENT file
+        activate: Also point CURRENT at the version, so restarts and other workers follow
+
+        Returns:
+        summary: Previous and new model_version, and how long the load took
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            previous = self.current.model_version if self.current is not None else None
+            # Following CURRENT (not an explicit version): a failure is remembered so
+            # needs_reload() does not retry the same broken pointer on every watch interval
+            follow_pointer = name is None
+            requested = name or self.pointer()
+            try:
+                name, path = self.resolve(requested)
+                service = self._build(name, path)
+            except Exception as e:
+                detail = getattr(e, "detail", str(e))
+                if follow_pointer:
+                    self._failed_pointer = requested
+                self.last_reload = {"ok": False, "version": requested, "error": detail, "at": time.time()}
+                print(f"Model reload failed, still serving {previous}: {detail}")
+                if isinstance(e, ValueError):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+                raise
+
+            if activate and name is not None:
+                self._write_pointer(name)
+            # The swap: new requests see the new service, in-flight ones keep the old
+            replaced = self.current
+            self.current = service
+            self.current_name = name
+            if replaced is not None and replaced is not service:
+                # Releases its ensemble pool; in-flight requests on it finish serially
+                replaced.close()
+            self._failed_pointer = None
+            self.last_reload = {
+                "ok": True,
+                "previous": previous,
+                "model_version": service.model_version,
+                "load_seconds": time.perf_counter() - started,
+                "at": time.time()
+            }
+            print(f"Serving model version {service.model_version} (previous: {previous})")
+            return self.last_reload
+
+    def _write_pointer(self, name: str):
+        """Atomically replace the CURRENT file"""
+        tmp_path = f"{self._current_file()}.tmp.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(name + "\n")
+        os.replace(tmp_path, self._current_file())
+
+    def status(self) -> Dict:
+        return {
+            "current": self.current.model_version if self.current is not None else None,
+            "pointer": self.pointer(),
+            "versions": self.versions(),
+            "last_reload": self.last_reload
+        }
+
+    def reset_after_fork(self):
+        """Recreate the reload lock and the current service's pools in a forked child"""
+        self._reload_lock = threading.Lock()
+        if self.current is not None:
+            self.current.reset_after_fork()
+            self.current.set_threads(worker_threads(self.settings))
@@ -1,81 +1,128 @@
+import hashlib
 import pickle
+import threading
+import time
 import numpy as np
-import tensorflow as tf
 from fastapi import Depends, HTTPException, status
-from typing import Dict, List, Tuple
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 import os
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from app.api.models import LoanApplicationRequest, ModelPrediction
 from app.utils.data_preprocessing import Preprocessor
-from app.core.config import get_settings
+from app.utils.feature_encoder import CompiledEncoder
+from app.services.numpy_mlp import NumpyMLP
+from app.services.compact_forest import CompactForest
+from app.services import artifact_bundle, onnx_engine
+from app.services.inference_executor import InferenceExecutor
+from app.core.config import Settings, get_settings
+from app.core.threads import configure_tensorflow_threads, worker_threads
+from app.core.metrics import (
+    CASCADE_EARLY_EXITS,
+    MEMBER_ROWS,
+    MODEL_LOAD_SECONDS,
+    PREDICTED_ROWS,
+    PREDICTION_ERRORS,
+    STAGE_LATENCY
+)
+
+# Rows per forward pass when scoring large batches with the Keras network
+NN_PREDICT_BATCH_SIZE = 4096
+
+# Ensemble members, in model1..model3 order
+ENSEMBLE_MEMBERS = ("random_forest", "xgboost", "neural_network")
+ENSEMBLE_MODES = ("vote", "cascade")
+# Vote recorded for a member the cascade did not evaluate
+SKIPPED = -1
+
+# Request field -> preprocessor column name
+COLUMN_RENAMES = {
+    'home_ownership': 'house_ownership',
+    'marital_status': 'marital_Status'
+}
+REQUEST_FIELDS = {column: field for field, column in COLUMN_RENAMES.items()}
+
+
+def bundle_source_files(settings: Settings) -> List[str]:
+    """Artifacts an artifact bundle is converted from, fingerprinted in its manifest"""
+    return [settings.MODEL_1_PATH, settings.MODEL_2_PATH, settings.MODEL_3_PATH,
+            settings.NN_WEIGHTS_PATH, settings.PREPROCESSOR_PATH]
 
 class ModelService:
-    def __init__(self, model_dir: str):
+    def __init__(self, model_dir: str, settings: Optional[Settings] = None,
+                 executor: Optional[InferenceExecutor] = None, version: Optional[str] = None):
         self.model_dir = model_dir
+        self.version = version  # Registry version name (None: unversioned MODEL_DIR)
+        self.settings = settings or get_settings()
+        if self.settings.ENSEMBLE_MODE not in ENSEMBLE_MODES:
+            raise ValueError(f"Unknown ensemble mode '{self.settings.ENSEMBLE_MODE}', expected one of {ENSEMBLE_MODES}")
+        if sorted(self.settings.CASCADE_ORDER) != sorted(ENSEMBLE_MEMBERS):
+            raise ValueError(f"CASCADE_ORDER must list each of {ENSEMBLE_MEMBERS} once")
+        self.executor = executor  # Runs inference off the event loop (None: inline)
         self.model1 = None  # Random Forest
         self.model2 = None  # XGBoost
         self.model3 = None  # Neural Network
         self.preprocessor = None  # Preprocessor
+        self.encoder = None  # CompiledEncoder built from the preprocessor
         self.feature_names = None
+        self._feature_importance_cache = None
+        self.load_timings: Dict[str, float] = {}  # Seconds per artifact, plus total and warmup
+        self.ready = False  # Set once loading and warmup have finished
+        self.model_version = None  # Version name, or a fingerprint of the loaded artifacts
+        self._ensemble_pool = None  # Scores the ensemble members concurrently (PARALLEL_ENSEMBLE)
         self._load_models()
+        if self.settings.PARALLEL_ENSEMBLE:
+            self._ensemble_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ensemble")
     
     def _load_models(self):
-        """Load all three models from saved files"""
+        """Load all three models and the preprocessor from saved files, in parallel"""
         try:
-            # Load model 1 (Random Forest)
-            rf_path = os.path.join(self.model_dir, "random_forest_model.pkl")
-            print(f"Loading Random Forest from: {rf_path}")
-            with open(rf_path, "rb") as f:
-                self.model1 = pickle.load(f)
-                print("Random Forest loaded successfully")
+            started = time.perf_counter()
+            if self.settings.MODEL_ENGINE == "onnx":
+                onnx_dir = os.path.join(self.model_dir, self.settings.ONNX_DIR)
+                if os.path.exists(os.path.join(onnx_dir, onnx_engine.MANIFEST_NAME)):
+                    self._load_onnx(onnx_dir, started)
+                    return
+                print(f"Warning: No ONNX export in {onnx_dir}, falling back to the native engines")
             
-            # Load model 2 (XGBoost)
-            xgb_path = os.path.join(self.model_dir, "xgb_model.pkl")
-            print(f"Loading XGBoost from: {xgb_path}")
-            with open(xgb_path, "rb") as f:
-                self.model2 = pickle.load(f)
-                print("XGBoost loaded successfully")
+            bundle_dir = os.path.join(self.model_dir, self.settings.ARTIFACT_BUNDLE_DIR)
+            if self.settings.ARTIFACT_FORMAT == "mmap":
+                if os.path.exists(os.path.join(bundle_dir, artifact_bundle.MANIFEST_NAME)):
+                    manifest = artifact_bundle.read_manifest(bundle_dir)
+                    reason = self._bundle_mismatch(manifest)
+                    if reason is None:
+                        self._load_bundle(bundle_dir, manifest, started)
+                        return
+                    print(f"Warning: Ignoring the artifact bundle in {bundle_dir} ({reason}), falling back to pickles")
+                else:
+                    print(f"Warning: No artifact bundle in {bundle_dir}, falling back to pickles")
             
-            # Load model 3 (Neural Network)
-            nn_path = os.path.join(self.model_dir, "neural_network_model.h5")
-            print(f"Loading Neural Network from: {nn_path}")
-            self.model3 = tf.keras.models.load_model(nn_path)
-            print("Neural Network loaded successfully")
-
-            # Load preprocessor
-            preprocessor_path = os.path.join(self.model_dir, "preprocessor.pkl")
-            print(f"Loading preprocessor from: {preprocessor_path}")
-            try:
-                with open(preprocessor_path, "rb") as f:
-                    # Try to load with custom unpickler
-                    class CustomUnpickler(pickle.Unpickler):
-                        def find_class(self, module, name):
-                            if module == "preprocessing":
-                                module = "app.utils.data_preprocessing"
-                            return super().find_class(module, name)
-                    
-                    self.preprocessor = CustomUnpickler(f).load()
-                print("Preprocessor loaded successfully")
-            except Exception as e:
-                print(f"Error loading preprocessor: {str(e)}")
-                print("Creating new preprocessor with default settings")
-                self.preprocessor = Preprocessor()
-                # Save the new preprocessor
-                with open(preprocessor_path, "wb") as f:
-                    pickle.dump(self.preprocessor, f)
-                print("New preprocessor created and saved successfully")
+            loaders = {
+                "random_forest": self._load_random_forest,
+                "xgboost": self._load_xgboost,
+                "neural_network": self._load_neural_network,
+                "preprocessor": self._load_preprocessor
+            }
+            # Artifacts are independent; unpickling, file I/O and TensorFlow
+            # start-up overlap instead of running back to back
+            with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="model-load") as pool:
+                futures = {name: pool.submit(self._timed, name, loader) for name, loader in loaders.items()}
+                artifacts = {name: future.result() for name, future in futures.items()}
             
-            # Load feature names if available
-            try:
-                features_path = os.path.join(self.model_dir, "feature_names.pkl")
-                print(f"Loading feature names from: {features_path}")
-                with open(features_path, "rb") as f:
-                    self.feature_names = pickle.load(f)
-                    print("Feature names loaded successfully")
-            except Exception as e:
-                print(f"Warning: Could not load feature names: {str(e)}")
-                self.feature_names = None
+            self.model1 = artifacts["random_forest"]
+            self.model2 = artifacts["xgboost"]
+            self.model3 = artifacts["neural_network"]
+            self.preprocessor = artifacts["preprocessor"]
+            self.feature_names = self._load_feature_names()
+            
+            if self.settings.USE_COMPILED_ENCODER:
+                self.encoder = self._timed("encoder", self._compile_encoder)
+            
+            self.model_version = self.version or self._artifact_fingerprint()
+            self.load_timings["total"] = time.perf_counter() - started
+            MODEL_LOAD_SECONDS.set(self.load_timings["total"], artifact="total")
+            print(f"Models loaded in {self.load_timings['total']:.2f}s")
                 
         except Exception as e:
             error_msg = f"Failed to load models: {str(e)}"
@@ -85,25 +132,239 @@ class ModelService:
                 detail=error_msg
             )
     
-    def _preprocess_data(self, application: LoanApplicationRequest):
-        """Preprocess the application data"""
+    def _bundle_mismatch(self, manifest: Dict) -> Optional[str]:
+        """Why the bundle cannot serve these settings and artifacts (None when it can)"""
+        # The bundle holds the compact forest and the NumPy network only
+        if self.settings.RF_ENGINE != "compact" or self.settings.NN_ENGINE != "numpy":
+            return f"RF_ENGINE={self.settings.RF_ENGINE} and NN_ENGINE={self.settings.NN_ENGINE} select other engines"
+        return artifact_bundle.stale_reason(self.model_dir, manifest, bundle_source_files(self.settings))
+    
+    def _load_bundle(self, bundle_dir: str, manifest: Dict, started: float):
+        """
+        Load the memory-mapped artifact bundle: no pickle, and the large arrays
+        are shared with other processes through the page cache
+        """
+        print(f"Loading artifact bundle from: {bundle_dir}")
+        self.model1 = self._timed("random_forest", lambda: artifact_bundle.load_random_forest(bundle_dir, manifest))
+        self.model2 = self._timed("xgboost", lambda: artifact_bundle.load_xgboost(bundle_dir, manifest))
+        self.model3 = self._timed("neural_network", lambda: artifact_bundle.load_neural_network(bundle_dir, manifest))
+        self.encoder = self._timed("encoder", lambda: artifact_bundle.load_encoder(bundle_dir, manifest))
+        self.preprocessor = None  # The bundle serves through the compiled encoder only
+        self.feature_names = manifest.get("feature_names")
+        
+        self.model_version = self.version or self._artifact_fingerprint()
+        self.load_timings["total"] = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.set(self.load_timings["total"], artifact="total")
+        print(f"Artifact bundle loaded in {self.load_timings['total']:.2f}s")
+    
+    def _load_onnx(self, onnx_dir: str, started: float):
+        """
+        Load the ONNX export: the preprocessor and every model are onnxruntime
+        sessions, and no framework runtime is imported
+        """
+        print(f"Loading ONNX models from: {onnx_dir}")
+        manifest = onnx_engine.read_manifest(onnx_dir)
+        sessions = self._timed("onnx", lambda: onnx_engine.load_models(
+            onnx_dir, manifest, worker_threads(self.settings)))
+        self.model1 = sessions["random_forest"]
+        self.model2 = sessions["xgboost"]
+        self.model3 = sessions["neural_network"]
+        self.encoder = sessions["encoder"]
+        self.preprocessor = None  # The export serves through the ONNX encoder only
+        self.feature_names = manifest.get("feature_names")
+        
+        self.model_version = self.version or self._artifact_fingerprint()
+        self.load_timings["total"] = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.set(self.load_timings["total"], artifact="total")
+        print(f"ONNX models loaded in {self.load_timings['total']:.2f}s")
+    
+    def _artifact_fingerprint(self) -> str:
+        """Short hash of the model directory's (and bundle's and ONNX export's) file names, sizes and modification times"""
+        digest = hashlib.sha1()
+        directories = [
+            self.model_dir,
+            os.path.join(self.model_dir, self.settings.ARTIFACT_BUNDLE_DIR),
+            os.path.join(self.model_dir, self.settings.ONNX_DIR)
+        ]
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    stat = os.stat(path)
+                    name = os.path.relpath(path, self.model_dir)
+                    digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:12]
+    
+    def _timed(self, name: str, loader):
+        """Run a loader and record how long it took in load_timings"""
+        started = time.perf_counter()
+        result = loader()
+        self.load_timings[name] = time.perf_counter() - started
+        MODEL_LOAD_SECONDS.set(self.load_timings[name], artifact=name)
+        return result
+    
+    def _load_random_forest(self):
+        """Load model 1 (Random Forest): the compact engine if selected and exported, otherwise the pickle"""
+        rf_path = os.path.join(self.model_dir, "random_forest_model.pkl")
+        if self.settings.RF_ENGINE == "compact":
+            arrays_path = os.path.join(self.model_dir, self.settings.RF_ARRAYS_PATH)
+            if not os.path.exists(arrays_path):
+                print(f"Warning: {arrays_path} not found, falling back to the sklearn pickle")
+            elif os.path.exists(rf_path) and os.stat(arrays_path).st_mtime_ns < os.stat(rf_path).st_mtime_ns:
+                # The forest was retrained after the arrays were exported
+                print(f"Warning: {arrays_path} is older than {rf_path}, falling back to the sklearn pickle")
+            else:
+                print(f"Loading Random Forest arrays from: {arrays_path}")
+                model = CompactForest.load(arrays_path)
+                print("Random Forest loaded successfully (compact engine)")
+                return model
+        
+        print(f"Loading Random Forest from: {rf_path}")
+        with open(rf_path, "rb") as f:
+            model = pickle.load(f)
+        print("Random Forest loaded successfully")
+        return model
+    
+    def _load_xgboost(self):
+        """Load model 2 (XGBoost)"""
+        xgb_path = os.path.join(self.model_dir, "xgb_model.pkl")
+        print(f"Loading XGBoost from: {xgb_path}")
+        with open(xgb_path, "rb") as f:
+            model = pickle.load(f)
+        print("XGBoost loaded successfully")
+        return model
+    
+    def _load_preprocessor(self):
+        """Load the fitted preprocessor, creating a default one if it cannot be read"""
+        preprocessor_path = os.path.join(self.model_dir, "preprocessor.pkl")
+        print(f"Loading preprocessor from: {preprocessor_path}")
+        try:
+            with open(preprocessor_path, "rb") as f:
+                # Try to load with custom unpickler
+                class CustomUnpickler(pickle.Unpickler):
+                    def find_class(self, module, name):
+                        # Pickled by the notebook (preprocessing) or BuildModel (bm_preprocessing)
+                        if module in ("preprocessing", "bm_preprocessing"):
+                            module = "app.utils.data_preprocessing"
+                        return super().find_class(module, name)
+                
+                preprocessor = CustomUnpickler(f).load()
+            print("Preprocessor loaded successfully")
+        except Exception as e:
+            print(f"Error loading preprocessor: {str(e)}")
+            print("Creating new preprocessor with default settings")
+            preprocessor = Preprocessor()
+            # Save the new preprocessor
+            with open(preprocessor_path, "wb") as f:
+                pickle.dump(preprocessor, f)
+            print("New preprocessor created and saved successfully")
+        return preprocessor
+    
+    def _load_feature_names(self):
+        """Load feature names if available"""
         try:
-            # Convert Pydantic model to DataFrame
+            features_path = os.path.join(self.model_dir, "feature_names.pkl")
+            print(f"Loading feature names from: {features_path}")
+            with open(features_path, "rb") as f:
+                feature_names = pickle.load(f)
+            print("Feature names loaded successfully")
+            return feature_names
+        except Exception as e:
+            print(f"Warning: Could not load feature names: {str(e)}")
+            return None
+    
+    def warmup(self, rows: int):
+        """
+        Score synthetic rows once through the batch and single-row paths so
+        first-call costs (graph tracing, lazy allocations) are paid before
+        real traffic arrives, then mark the service ready
+        """
+        if rows > 0:
+            from app.services.synthetic_service import get_synthetic_service
+            
+            started = time.perf_counter()
+            applications = get_synthetic_service().generate(count=rows, default_ratio=0.5)
+            self.predict_batch(applications)
+            self.predict(applications[0])
+            self.load_timings["warmup"] = time.perf_counter() - started
+            MODEL_LOAD_SECONDS.set(self.load_timings["warmup"], artifact="warmup")
+            print(f"Warmup finished in {self.load_timings['warmup']:.2f}s")
+        self.ready = True
+    
+    def _load_neural_network(self):
+        """Load the NumPy engine if selected and exported, otherwise the Keras model"""
+        if self.settings.NN_ENGINE == "numpy":
+            weights_path = os.path.join(self.model_dir, self.settings.NN_WEIGHTS_PATH)
+            if os.path.exists(weights_path):
+                print(f"Loading Neural Network weights from: {weights_path}")
+                model = NumpyMLP.load(weights_path)
+                print("Neural Network loaded successfully (NumPy engine)")
+                return model
+            print(f"Warning: {weights_path} not found, falling back to Keras")
+        
+        # Imported lazily: TensorFlow is only needed for the Keras engine
+        import tensorflow as tf
+        
+        configure_tensorflow_threads(worker_threads(self.settings))
+        nn_path = os.path.join(self.model_dir, "neural_network_model.h5")
+        print(f"Loading Neural Network from: {nn_path}")
+        model = tf.keras.models.load_model(nn_path)
+        print("Neural Network loaded successfully")
+        return model
+    
+    def _to_dataframe(self, applications: List[LoanApplicationRequest]) -> pd.DataFrame:
+        """Convert applications into the DataFrame layout expected by the preprocessor"""
+        records = []
+        for application in applications:
             data_dict = application.dict()
             # Convert enum values to their string representations
             for key, value in data_dict.items():
                 if hasattr(value, 'value'):
                     data_dict[key] = value.value
-            
-            df = pd.DataFrame([data_dict])
-            
-            # Rename columns to match expected format
-            df = df.rename(columns={
-                'home_ownership': 'house_ownership'
-            })
-            
-            # Transform the data
-            return self.preprocessor.transform(df)
+            records.append(data_dict)
+        
+        df = pd.DataFrame(records)
+        
+        # Rename columns to match expected format
+        return df.rename(columns=COLUMN_RENAMES)
+    
+    def _to_columns(self, applications: List[LoanApplicationRequest]) -> Dict[str, list]:
+        """Column-oriented view of the applications keyed by preprocessor column name"""
+        columns = {}
+        for feature in self.encoder.input_features:
+            field = REQUEST_FIELDS.get(feature, feature)
+            values = [getattr(application, field) for application in applications]
+            if values and hasattr(values[0], 'value'):
+                values = [value.value for value in values]
+            columns[feature] = values
+        return columns
+    
+    def _compile_encoder(self) -> Optional[CompiledEncoder]:
+        """Compile the preprocessor into a CompiledEncoder, or None if it cannot match transform"""
+        fields = getattr(LoanApplicationRequest, "model_fields", None) or LoanApplicationRequest.__fields__
+        input_columns = [COLUMN_RENAMES.get(name, name) for name in fields]
+        try:
+            encoder = CompiledEncoder.from_preprocessor(self.preprocessor, input_columns)
+            if not encoder.matches(self.preprocessor):
+                raise ValueError("compiled output differs from Preprocessor.transform")
+            print(f"Compiled feature encoder ready ({encoder.n_features} columns)")
+            return encoder
+        except Exception as e:
+            print(f"Warning: Falling back to DataFrame preprocessing: {str(e)}")
+            return None
+    
+    def _build_features(self, applications: List[LoanApplicationRequest]) -> np.ndarray:
+        """Encode and scale applications into the model input matrix"""
+        if self.encoder is not None:
+            return self.encoder.encode_columns(self._to_columns(applications))
+        return self.preprocessor.transform(self._to_dataframe(applications))
+    
+    def _preprocess_data(self, application: LoanApplicationRequest):
+        """Preprocess the application data"""
+        try:
+            return self.preprocessor.transform(self._to_dataframe([application]))
         except Exception as e:
             error_msg = f"Preprocessing error: {str(e)}"
             print(error_msg)
@@ -112,67 +373,187 @@ class ModelService:
                 detail=error_msg
             )
     
+    def _feature_importance(self) -> Optional[Dict[str, float]]:
+        """Feature importance from model 1 if available (identical for every row)"""
+        if self._feature_importance_cache is None and hasattr(self.model1, "feature_importances_") and self.feature_names:
+            importance = self.model1.feature_importances_
+            self._feature_importance_cache = {
+                name: float(imp) for name, imp in
+                zip(self.feature_names, importance)
+            }
+        return self._feature_importance_cache
+    
     def predict(self, application: LoanApplicationRequest) -> ModelPrediction:
         """Make prediction using all models and ensemble their results"""
-        try:
-            print(f"Application data: {application}")
-            
-            # Convert Pydantic model to DataFrame
-            data_dict = application.dict()
-            # Convert enum values to their string representations
-            for key, value in data_dict.items():
-                if hasattr(value, 'value'):
-                    data_dict[key] = value.value
-            
-            df = pd.DataFrame([data_dict])
-            
-            # Rename columns to match expected format
-            df = df.rename(columns={
-                'home_ownership': 'house_ownership',
-                'marital_status': 'marital_Status'
+        return self.predict_batch([application])[0]
+    
+    def predict_batch(self, applications: List[LoanApplicationRequest]) -> List[ModelPrediction]:
+        """
+        Score a batch of applications: one preprocessor pass and one
+        predict call per model for the whole batch
+        """
+        if not applications:
+            return []
+        return self._predict(lambda: self._build_features(applications))
+    
+    def predict_columns(self, columns: Mapping[str, Sequence]) -> List[ModelPrediction]:
+        """
+        Score column-oriented data (e.g. a SyntheticService.generate_columns
+        DataFrame) keyed by request field name, without per-row request objects
+        """
+        return self._predict(lambda: self._build_features_from_columns(columns))
+    
+    def _build_features_from_columns(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Encode and scale columns keyed by request field name"""
+        if self.encoder is not None:
+            return self.encoder.encode_columns({
+                feature: columns[REQUEST_FIELDS.get(feature, feature)]
+                for feature in self.encoder.input_features
             })
+        return self.preprocessor.transform(pd.DataFrame(columns).rename(columns=COLUMN_RENAMES))
+    
+    def _score_random_forest(self, X: np.ndarray) -> np.ndarray:
+        with STAGE_LATENCY.time(stage="random_forest"):
+            return np.asarray(self.model1.predict(X)).astype(int).ravel()
+    
+    def _score_xgboost(self, X: np.ndarray) -> np.ndarray:
+        with STAGE_LATENCY.time(stage="xgboost"):
+            return np.asarray(self.model2.predict(X)).astype(int).ravel()
+    
+    def _score_neural_network(self, X: np.ndarray) -> np.ndarray:
+        """Raw default probabilities from the neural network"""
+        with STAGE_LATENCY.time(stage="neural_network"):
+            return np.asarray(
+                self.model3.predict(X, batch_size=NN_PREDICT_BATCH_SIZE, verbose=0),
+                dtype=float
+            ).ravel()
+    
+    def _score_members(self, members: Sequence[str], X: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Raw output of each named member on X (class votes, or probabilities for
+        the neural network), concurrently when PARALLEL_ENSEMBLE is on
+        """
+        scorers = {
+            "random_forest": self._score_random_forest,
+            "xgboost": self._score_xgboost,
+            "neural_network": self._score_neural_network
+        }
+        for member in members:
+            MEMBER_ROWS.inc(len(X), member=member)
+        pool = self._ensemble_pool
+        if pool is not None and len(members) > 1:
+            try:
+                futures = {member: pool.submit(scorers[member], X) for member in members}
+            except RuntimeError:
+                # Closed by a reload that swapped this service out mid-request; finish serially
+                pass
+            else:
+                return {member: future.result() for member, future in futures.items()}
+        return {member: scorers[member](X) for member in members}
+    
+    def _cascade(self, X: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Majority vote that scores the first two members of CASCADE_ORDER on
+        every row and the third only where they disagree.
+        
+        Returns:
+        votes: Per-member votes in ENSEMBLE_MEMBERS order (SKIPPED where not evaluated)
+        probs3: Neural network probabilities (NaN where not evaluated)
+        ensemble: Majority vote, identical to evaluating all three members
+        """
+        def member_votes(member: str, output: np.ndarray) -> np.ndarray:
+            return (output > 0.5).astype(int) if member == "neural_network" else output
+        
+        first, second, third = self.settings.CASCADE_ORDER
+        outputs = self._score_members((first, second), X)
+        votes = {member: np.full(len(X), SKIPPED) for member in ENSEMBLE_MEMBERS}
+        probs3 = np.full(len(X), np.nan)
+        for member, output in outputs.items():
+            votes[member] = member_votes(member, output)
+            if member == "neural_network":
+                probs3 = output
+        
+        with STAGE_LATENCY.time(stage="ensemble"):
+            ensemble = votes[first].copy()
+            undecided = votes[first] != votes[second]
+        n_undecided = int(np.count_nonzero(undecided))
+        CASCADE_EARLY_EXITS.inc(len(X) - n_undecided)
+        if n_undecided:
+            # A 1-1 split: the third member casts the deciding vote
+            output = self._score_members((third,), X[undecided])[third]
+            votes[third][undecided] = member_votes(third, output)
+            if third == "neural_network":
+                probs3[undecided] = output
+            ensemble[undecided] = votes[third][undecided]
+        return [votes[member] for member in ENSEMBLE_MEMBERS], probs3, ensemble
+    
+    def set_threads(self, n_threads: int):
+        """Cap the native threads the models use per predict call"""
+        for model in (self.model1, self.model2):
+            if hasattr(model, "get_params") and "n_jobs" in model.get_params():
+                model.set_params(n_jobs=n_threads)
+        # ONNX sessions are rebuilt with the new intra-op thread count
+        for session in (self.encoder, self.model1, self.model2, self.model3):
+            if isinstance(session, onnx_engine.OnnxSession):
+                session.set_threads(n_threads)
+    
+    def reset_after_fork(self):
+        """Recreate thread pools in a forked child (threads do not survive fork)"""
+        if self._ensemble_pool is not None:
+            self._ensemble_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ensemble")
+        if self.executor is not None:
+            self.executor.reset_after_fork()
+    
+    def close(self):
+        """Release the ensemble pool"""
+        if self._ensemble_pool is not None:
+            self._ensemble_pool.shutdown(wait=False)
+            self._ensemble_pool = None
+    
+    def _predict(self, build_features) -> List[ModelPrediction]:
+        """Build the feature matrix, run every model once and ensemble the results"""
+        try:
+            with STAGE_LATENCY.time(stage="encode"):
+                X = build_features()
+            if len(X) == 0:
+                return []
             
-            # Use the already loaded preprocessor
-            print("Using preprocessor to transform data")
-            X = self.preprocessor.transform(df)
-            print(f"Preprocessed data shape: {X.shape}")
-            
-            # Get predictions from each model
-            pred1 = int(self.model1.predict(X)[0])
-            print(f"Random Forest prediction: {pred1}")
-            
-            pred2 = int(self.model2.predict(X)[0])
-            print(f"XGBoost prediction: {pred2}")
-            
-            # For neural network, get raw probability and convert to binary
-            prob3 = float(self.model3.predict(X)[0][0])
-            pred3 = int(prob3 > 0.5)
-            print(f"Neural Network prediction: {pred3} (probability: {prob3})")
-            
-            # Ensemble prediction (simple majority vote)
-            predictions = [pred1, pred2, pred3]
-            ensemble_pred = max(set(predictions), key=predictions.count)
-            print(f"Ensemble prediction: {ensemble_pred}")
+            if self.settings.ENSEMBLE_MODE == "cascade":
+                votes, probs3, ensemble = self._cascade(X)
+            else:
+                outputs = self._score_members(ENSEMBLE_MEMBERS, X)
+                probs3 = outputs["neural_network"]
+                votes = [outputs["random_forest"], outputs["xgboost"], (probs3 > 0.5).astype(int)]
+                
+                # Ensemble prediction (simple majority vote of three binary models)
+                with STAGE_LATENCY.time(stage="ensemble"):
+                    ensemble = ((votes[0] + votes[1] + votes[2]) >= 2).astype(int)
             
-            # Get feature importance from model 1 if available
-            feature_importance = None
-            if hasattr(self.model1, "feature_importances_") and self.feature_names:
-                importance = self.model1.feature_importances_
-                feature_importance = {
-                    name: float(imp) for name, imp in
-                    zip(self.feature_names, importance)
-                }
+            feature_importance = self._feature_importance()
             
-            return ModelPrediction(
-                model1_prediction=pred1,
-                model2_prediction=pred2,
-                model3_prediction=pred3,
-                ensemble_prediction=ensemble_pred,
-                default_probability=prob3,
-                feature_importance=feature_importance
-            )
+            with STAGE_LATENCY.time(stage="response"):
+                preds1, preds2, preds3 = (vote.tolist() for vote in votes)
+                probabilities = probs3.tolist()
+                predictions = []
+                for i in range(len(X)):
+                    row_votes = (preds1[i], preds2[i], preds3[i])
+                    predictions.append(ModelPrediction(
+                        model1_prediction=None if row_votes[0] == SKIPPED else row_votes[0],
+                        model2_prediction=None if row_votes[1] == SKIPPED else row_votes[1],
+                        model3_prediction=None if row_votes[2] == SKIPPED else row_votes[2],
+                        ensemble_prediction=int(ensemble[i]),
+                        default_probability=None if row_votes[2] == SKIPPED else probabilities[i],
+                        feature_importance=feature_importance,
+                        model_version=self.model_version,
+                        skipped_models=[
+                            member for member, vote in zip(ENSEMBLE_MEMBERS, row_votes) if vote == SKIPPED
+                        ]
+                    ))
+            PREDICTED_ROWS.inc(len(predictions))
+            return predictions
             
         except Exception as e:
+            PREDICTION_ERRORS.inc()
             error_msg = f"Prediction error: {str(e)}"
             print(error_msg)
             import traceback
@@ -181,9 +562,67 @@ class ModelService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=error_msg
             )
+    
+    async def predict_async(self, application: LoanApplicationRequest) -> ModelPrediction:
+        """Awaitable predict that runs on the inference executor"""
+        return (await self.predict_batch_async([application]))[0]
+    
+    async def predict_batch_async(self, applications: List[LoanApplicationRequest]) -> List[ModelPrediction]:
+        """Awaitable predict_batch that runs on the inference executor"""
+        if self.executor is None:
+            return self.predict_batch(applications)
+        return await self.executor.run(self, "predict_batch", applications)
+    
+    async def predict_columns_async(self, columns: Mapping[str, Sequence]) -> List[ModelPrediction]:
+        """Awaitable predict_columns that runs on the inference executor"""
+        if self.executor is None:
+            return self.predict_columns(columns)
+        return await self.executor.run(self, "predict_columns", columns)
+
+_model_service_lock = threading.Lock()
 
 @lru_cache()
-def get_model_service() -> ModelService:
-    """Factory function for ModelService (singleton pattern)"""
+def _create_model_registry():
+    from app.services.model_registry import ModelRegistry
+    
     settings = get_settings()
-    return ModelService(model_dir=settings.MODEL_DIR)
\ No newline at end of file
+    executor = InferenceExecutor.from_settings(settings)
+    executor.start()
+    registry = ModelRegistry(settings, executor=executor)
+    registry.load()
+    return registry
+
+def get_model_registry():
+    """Factory function for the ModelRegistry (singleton pattern); loads CURRENT on first use"""
+    # The lock keeps a request racing the startup loader from building a second copy
+    with _model_service_lock:
+        return _create_model_registry()
+
+def peek_model_registry():
+    """The ModelRegistry if it has already been built, without triggering a load"""
+    if _create_model_registry.cache_info().currsize == 0:
+        return None
+    return get_model_registry()
+
+def get_model_service() -> ModelService:
+    """The ModelService currently being served (swapped atomically on reload)"""
+    return get_model_registry().current
+
+def peek_model_service() -> Optional[ModelService]:
+    """The ModelService if it has already been built, without triggering a load"""
+    registry = peek_model_registry()
+    return registry.current if registry is not None else None
+
+def _reset_after_fork():
+    """
+    Keep the inherited singleton usable in a forked worker (see app.serve):
+    the models are shared copy-on-write, pools and locks are recreated
+    """
+    global _model_service_lock
+    _model_service_lock = threading.Lock()
+    registry = peek_model_registry()
+    if registry is not None:
+        registry.reset_after_fork()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,315 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from app.services.numpy_mlp import NumpyMLP
+from app.utils.feature_encoder import CompiledEncoder
+
+# Version of the ONNX directory layout described by manifest.json
+ONNX_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+MODEL_FILES = {
+    "encoder": "encoder.onnx",
+    "random_forest": "random_forest.onnx",
+    "xgboost": "xgboost.onnx",
+    "neural_network": "neural_network.onnx"
+}
+# Opsets of the default and ai.onnx.ml domains used by every exported graph
+ONNX_OPSET = 15
+ONNX_ML_OPSET = 3
+# IR version matching those opsets (readable by older onnxruntime releases)
+ONNX_IR_VERSION = 8
+
+# Graph input/output names
+FEATURES = "features"
+NUMERICAL = "numerical"
+PROBABILITIES = "probabilities"
+
+# Keras activation -> ONNX operator
+ACTIVATION_OPS = {
+    "relu": "Relu",
+    "sigmoid": "Sigmoid",
+    "tanh": "Tanh",
+    "linear": "Identity"
+}
+
+
+def _opsets():
+    from onnx import helper
+
+    return [helper.make_opsetid("", ONNX_OPSET), helper.make_opsetid("ai.onnx.ml", ONNX_ML_OPSET)]
+
+
+def encoder_to_onnx(encoder: CompiledEncoder):
+    """
+    ONNX graph equivalent to CompiledEncoder.encode_columns.
+
+    Inputs are one string tensor (n_rows, 1) per categorical feature and a
+    float64 NUMERICAL tensor (n_rows, n_numerical). The one-hot blocks are
+    ai.onnx.ml OneHotEncoder nodes (unknown categories give all zeros, as in
+    Preprocessor.transform) and scaling runs in float64, so the output matches
+    the compiled encoder exactly.
+    """
+    from onnx import TensorProto, helper, numpy_helper
+
+    inputs, nodes, initializers, blocks = [], [], [], []
+    for i, feature in enumerate(encoder.categorical_features):
+        inputs.append(helper.make_tensor_value_info(feature, TensorProto.STRING, [None, 1]))
+        nodes.append(helper.make_node(
+            "OneHotEncoder", [feature], [f"onehot_{i}"], domain="ai.onnx.ml",
+            cats_strings=[str(value) for value in encoder.categories[feature]], zeros=1
+        ))
+        nodes.append(helper.make_node("Flatten", [f"onehot_{i}"], [f"onehot_flat_{i}"], axis=1))
+        blocks.append(f"onehot_flat_{i}")
+    if blocks:
+        nodes.append(helper.make_node("Concat", blocks, ["onehot"], axis=1))
+        nodes.append(helper.make_node("Cast", ["onehot"], ["onehot_double"], to=TensorProto.DOUBLE))
+        blocks = ["onehot_double"]
+
+    inputs.append(helper.make_tensor_value_info(
+        NUMERICAL, TensorProto.DOUBLE, [None, len(encoder.numerical_features)]))
+    nodes.append(helper.make_node("Concat", blocks + [NUMERICAL], ["encoded"], axis=1))
+
+    current = "encoded"
+    for op, name, values in (("Sub", "mean", encoder.mean), ("Div", "scale", encoder.scale)):
+        if values is None:
+            continue
+        initializers.append(numpy_helper.from_array(np.asarray(values, dtype=np.float64), name))
+        nodes.append(helper.make_node(op, [current, name], [f"{current}_{op.lower()}"]))
+        current = f"{current}_{op.lower()}"
+    nodes.append(helper.make_node("Identity", [current], [FEATURES]))
+
+    graph = helper.make_graph(
+        nodes, "encoder", inputs,
+        [helper.make_tensor_value_info(FEATURES, TensorProto.DOUBLE, [None, encoder.n_features])],
+        initializer=initializers
+    )
+    return helper.make_model(graph, opset_imports=_opsets(), ir_version=ONNX_IR_VERSION)
+
+
+def mlp_to_onnx(mlp: NumpyMLP):
+    """ONNX graph of the Dense network: MatMul + Add + activation per layer"""
+    from onnx import TensorProto, helper, numpy_helper
+
+    nodes, initializers = [], []
+    current = FEATURES
+    for i, (kernel, bias, activation) in enumerate(zip(mlp.kernels, mlp.biases, mlp.activations)):
+        initializers.append(numpy_helper.from_array(kernel, f"kernel_{i}"))
+        initializers.append(numpy_helper.from_array(bias, f"bias_{i}"))
+        nodes.append(helper.make_node("MatMul", [current, f"kernel_{i}"], [f"matmul_{i}"]))
+        nodes.append(helper.make_node("Add", [f"matmul_{i}", f"bias_{i}"], [f"dense_{i}"]))
+        current = PROBABILITIES if i == len(mlp.kernels) - 1 else f"activation_{i}"
+        nodes.append(helper.make_node(ACTIVATION_OPS[activation], [f"dense_{i}"], [current]))
+
+    graph = helper.make_graph(
+        nodes, "neural_network",
+        [helper.make_tensor_value_info(FEATURES, TensorProto.FLOAT, [None, mlp.n_features])],
+        [helper.make_tensor_value_info(PROBABILITIES, TensorProto.FLOAT, [None, mlp.kernels[-1].shape[1]])],
+        initializer=initializers
+    )
+    return helper.make_model(graph, opset_imports=_opsets(), ir_version=ONNX_IR_VERSION)
+
+
+def forest_to_onnx(model):
+    """ONNX graph of a RandomForestClassifier (skl2onnx, probabilities as a plain tensor)"""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    return convert_sklearn(
+        model,
+        initial_types=[(FEATURES, FloatTensorType([None, model.n_features_in_]))],
+        options={id(model): {"zipmap": False}},
+        target_opset={"": ONNX_OPSET, "ai.onnx.ml": ONNX_ML_OPSET}
+    )
+
+
+def xgboost_to_onnx(model):
+    """ONNX graph of an XGBClassifier (onnxmltools)"""
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    return convert_xgboost(
+        model,
+        initial_types=[(FEATURES, FloatTensorType([None, model.n_features_in_]))],
+        target_opset=ONNX_OPSET
+    )
+
+
+def write_onnx_models(onnx_dir: str, encoder: CompiledEncoder, forest, xgb_model, mlp: NumpyMLP,
+                      feature_names: Optional[List[str]] = None) -> Dict:
+    """
+    Convert the preprocessor and the three models to ONNX files plus a JSON manifest.
+
+    The directory is assembled next to onnx_dir and moved into place at the
+    end, so readers never see a partial export.
+
+    Parameters:
+    onnx_dir: Destination directory (replaced if it exists)
+    encoder: CompiledEncoder equivalent to the fitted Preprocessor
+    forest: Fitted RandomForestClassifier
+    xgb_model: Fitted XGBClassifier
+    mlp: Neural network as a NumpyMLP
+    feature_names: Names reported with feature importances (optional)
+
+    Returns:
+    manifest: The manifest that was written
+    """
+    graphs = {
+        "encoder": encoder_to_onnx(encoder),
+        "random_forest": forest_to_onnx(forest),
+        "xgboost": xgboost_to_onnx(xgb_model),
+        "neural_network": mlp_to_onnx(mlp)
+    }
+    parent = os.path.dirname(os.path.abspath(onnx_dir))
+    staging = tempfile.mkdtemp(prefix=".onnx-", dir=parent)
+    try:
+        for name, graph in graphs.items():
+            with open(os.path.join(staging, MODEL_FILES[name]), "wb") as f:
+                f.write(graph.SerializeToString())
+        manifest = {
+            "format_version": ONNX_FORMAT_VERSION,
+            "files": MODEL_FILES,
+            "categorical_features": encoder.categorical_features,
+            "numerical_features": encoder.numerical_features,
+            "classes": np.asarray(forest.classes_).tolist(),
+            "feature_importances": np.asarray(forest.feature_importances_).tolist(),
+            "feature_names": None if feature_names is None else [str(name) for name in feature_names]
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(onnx_dir):
+            shutil.rmtree(onnx_dir)
+        os.replace(staging, onnx_dir)
+        return manifest
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def read_manifest(onnx_dir: str) -> Dict:
+    """Parse and version-check an ONNX export manifest"""
+    with open(os.path.join(onnx_dir, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    version = manifest.get("format_version")
+    if version != ONNX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported ONNX export format version {version}")
+    return manifest
+
+
+class OnnxSession:
+    def __init__(self, path: str, n_threads: int = 1):
+        """
+        One onnxruntime InferenceSession over an exported graph.
+
+        The session is rebuilt by set_threads, which is also how a forked
+        worker replaces a session created in the parent (see ModelRegistry).
+
+        Parameters:
+        path: Path of the .onnx file
+        n_threads: Intra-op threads used by each run call
+        """
+        self.path = path
+        self.n_threads = None
+        self.session = None
+        self.set_threads(n_threads)
+
+    def set_threads(self, n_threads: int):
+        """(Re)create the session with n_threads intra-op threads"""
+        if n_threads == self.n_threads and self.session is not None:
+            return
+        # Imported lazily: onnxruntime is only needed for MODEL_ENGINE="onnx"
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = n_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.n_threads = n_threads
+
+    def run(self, feeds: Dict[str, np.ndarray], outputs: Optional[List[str]] = None) -> List[np.ndarray]:
+        return self.session.run(outputs, feeds)
+
+
+class OnnxEncoder(OnnxSession):
+    def __init__(self, path: str, categorical_features: Sequence[str], numerical_features: Sequence[str],
+                 n_threads: int = 1):
+        """Exported preprocessor with the CompiledEncoder interface used by ModelService"""
+        self.categorical_features = list(categorical_features)
+        self.numerical_features = list(numerical_features)
+        super().__init__(path, n_threads)
+
+    @property
+    def input_features(self) -> List[str]:
+        return self.categorical_features + self.numerical_features
+
+    def encode_columns(self, columns: Mapping[str, Sequence]) -> np.ndarray:
+        """Encode and scale column-oriented data, like CompiledEncoder.encode_columns"""
+        feeds = {
+            feature: np.array([str(value) for value in columns[feature]], dtype=object).reshape(-1, 1)
+            for feature in self.categorical_features
+        }
+        feeds[NUMERICAL] = np.column_stack([
+            np.asarray(columns[feature], dtype=np.float64) for feature in self.numerical_features
+        ])
+        return self.run(feeds, [FEATURES])[0]
+
+
+class OnnxClassifier(OnnxSession):
+    def __init__(self, path: str, classes: Sequence, feature_importances: Optional[Sequence] = None,
+                 n_threads: int = 1):
+        """Exported tree ensemble with the predict/predict_proba interface of the sklearn models"""
+        self.classes_ = np.asarray(classes)
+        self.feature_importances_ = None if feature_importances is None else np.asarray(
+            feature_importances, dtype=np.float64)
+        super().__init__(path, n_threads)
+        outputs = [output.name for output in self.session.get_outputs()]
+        self.label_output, self.probability_output = outputs[0], outputs[1]
+
+    def predict(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.run({FEATURES: X}, [self.label_output])[0]
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.run({FEATURES: X}, [self.probability_output])[0]
+
+
+class OnnxNetwork(OnnxSession):
+    """Exported neural network with the predict interface of the Keras model"""
+
+    def predict(self, X, batch_size: Optional[int] = None, verbose=0) -> np.ndarray:
+        """
+        Output probabilities, shape (n_rows, 1); the whole batch is one run call.
+
+        batch_size and verbose are accepted for call compatibility with Keras.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.run({FEATURES: X}, [PROBABILITIES])[0]
+
+
+def load_models(onnx_dir: str, manifest: Dict, n_threads: int = 1) -> Dict[str, OnnxSession]:
+    """One session per exported graph, keyed like MODEL_FILES"""
+    files = manifest["files"]
+    return {
+        "encoder": OnnxEncoder(
+            os.path.join(onnx_dir, files["encoder"]),
+            manifest["categorical_features"],
+            manifest["numerical_features"],
+            n_threads
+        ),
+        "random_forest": OnnxClassifier(
+            os.path.join(onnx_dir, files["random_forest"]),
+            manifest["classes"],
+            manifest.get("feature_importances"),
+            n_threads
+        ),
+        "xgboost": OnnxClassifier(os.path.join(onnx_dir, files["xgboost"]), manifest["classes"], None, n_threads),
+        "neural_network": OnnxNetwork(os.path.join(onnx_dir, files["neural_network"]), n_threads)
+    }
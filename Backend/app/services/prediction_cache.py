@@ -0,0 +1,176 @@
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.api.models import LoanApplicationRequest, ModelPrediction
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+
+
+class PredictionCache:
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 300.0):
+        """
+        In-process LRU/TTL cache of predictions with single-flight deduplication.
+
+        Parameters:
+        max_size: Maximum number of cached predictions (least recently used are evicted)
+        ttl_seconds: Lifetime of a cached prediction
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, ModelPrediction]]" = OrderedDict()
+        self._in_flight: Dict[Tuple, asyncio.Task] = {}
+        self._model_version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(application: LoanApplicationRequest) -> Tuple:
+        """Canonical, hashable form of an application (enum values unwrapped, numbers as float)"""
+        items = []
+        for name, value in sorted(application.dict().items()):
+            if hasattr(value, 'value'):
+                value = value.value
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = float(value)
+            items.append((name, value))
+        return tuple(items)
+
+    def invalidate(self):
+        """Drop every cached prediction"""
+        self._entries.clear()
+        self.invalidations += 1
+
+    def _check_version(self, model_version: Optional[str]):
+        """Invalidate automatically when the loaded models change"""
+        if model_version != self._model_version:
+            if self._model_version is not None:
+                self.invalidate()
+            self._model_version = model_version
+
+    def _get(self, key: Tuple) -> Optional[ModelPrediction]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, prediction = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return prediction
+
+    def _put(self, key: Tuple, prediction: ModelPrediction):
+        self._entries[key] = (time.monotonic() + self.ttl, prediction)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        application: LoanApplicationRequest,
+        model_version: Optional[str],
+        compute: Callable[[], Awaitable[ModelPrediction]]
+    ) -> ModelPrediction:
+        """
+        Return the cached prediction, join an identical in-flight computation,
+        or run compute() and cache its result.
+        """
+        self._check_version(model_version)
+        key = (model_version,) + self.make_key(application)
+
+        prediction = self._get(key)
+        if prediction is not None:
+            self.hits += 1
+            return prediction
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            # shield: one caller disconnecting must not cancel the shared computation
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        # The computation runs as its own task, so cancelling the caller that
+        # started it (client disconnect) does not cancel it for the waiters
+        task = asyncio.ensure_future(self._compute_and_cache(key, model_version, compute))
+        # Mark a failure retrieved even when every caller has gone away
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute_and_cache(
+        self,
+        key: Tuple,
+        model_version: Optional[str],
+        compute: Callable[[], Awaitable[ModelPrediction]]
+    ) -> ModelPrediction:
+        """Run compute() for an in-flight key and cache the result"""
+        try:
+            prediction = await compute()
+        finally:
+            self._in_flight.pop(key, None)
+
+        # Models may have been swapped while computing; only cache current results
+        if model_version == self._model_version:
+            self._put(key, prediction)
+        return prediction
+
+    def stats(self) -> dict:
+        """Size limits and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": True,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "model_version": self._model_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+    def render_metrics(self) -> List[str]:
+        """Cache counters in Prometheus text format"""
+        lines = []
+        counters = (
+            ("hits", "Predictions served from the cache"),
+            ("misses", "Predictions computed because nothing was cached"),
+            ("coalesced", "Requests that joined an identical in-flight computation"),
+            ("evictions", "Entries evicted by the size limit"),
+            ("expirations", "Entries dropped after their TTL"),
+            ("invalidations", "Full cache invalidations")
+        )
+        for name, description in counters:
+            metric = f"ldps_prediction_cache_{name}_total"
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter",
+                      f"{metric} {getattr(self, name)}"]
+        lines += ["# HELP ldps_prediction_cache_size Cached predictions",
+                  "# TYPE ldps_prediction_cache_size gauge",
+                  f"ldps_prediction_cache_size {len(self._entries)}"]
+        return lines
+
+
+@lru_cache()
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """Factory function for PredictionCache (singleton pattern, None when disabled)"""
+    settings = get_settings()
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return None
+    cache = PredictionCache(
+        max_size=settings.PREDICTION_CACHE_SIZE,
+        ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS
+    )
+    REGISTRY.register_collector(cache.render_metrics)
+    return cache
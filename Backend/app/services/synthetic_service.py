@@ -22,101 +22,98 @@ class SyntheticService:
         self.experience_range = (0, 50)
         self.current_job_years_range = (0, 50)
         self.current_house_years_range = (0, 50)
-    
-    def _generate_defaulter(self, index: int) -> LoanApplicationRequest:
-        """Generate synthetic data for likely defaulter"""
-        # Generate data
-        data = LoanApplicationRequest(
-            age=np.random.randint(self.age_range[0], self.age_range[0]*2),
-            income=np.random.uniform(self.income_range[0], self.income_range[1]),
-            current_house_years=int(np.random.randint(self.current_house_years_range[0], self.current_house_years_range[1])),
-            current_job_years=int(np.random.randint(self.current_job_years_range[0], self.current_job_years_range[1])),
-            experience=int(np.random.randint(0, 3)),
-            home_ownership=np.random.choice([e.value for e in HomeOwnershipType]),
-            car_ownership=np.random.choice([e.value for e in CarOwnership]),
-            profession=np.random.choice([e.value for e in Profession]),
-            state=np.random.choice([e.value for e in State])
+
+        # Enum values drawn from for the categorical fields
+        self.home_ownership_values = np.array([e.value for e in HomeOwnershipType])
+        self.car_ownership_values = np.array([e.value for e in CarOwnership])
+        self.profession_values = np.array([e.value for e in Profession])
+        self.state_values = np.array([e.value for e in State])
+
+    def generate_columns(self, count: int = 1, default_ratio: Optional[float] = 0.3,
+                         seed: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                         num_defaulters: Optional[int] = None) -> pd.DataFrame:
+        """
+        Generate synthetic applications as columns, one NumPy draw per field.
+
+        Likely defaulters are young, have 0-2 years of experience and any income;
+        likely non-defaulters are 30+, have 5+ years of experience and at least
+        1.5x the minimum income. Rows are shuffled.
+
+        Parameters:
+        count: Number of rows
+        default_ratio: Fraction of likely defaulters
+        seed: Seed for a new np.random.Generator (ignored when rng is given)
+        rng: Generator to draw from, for reproducible multi-chunk streams
+        num_defaulters: Exact number of likely defaulters (overrides default_ratio)
+
+        Returns:
+        data: DataFrame with one column per LoanApplicationRequest field, plus is_defaulter
+        """
+        rng = rng if rng is not None else np.random.default_rng(seed)
+
+        if num_defaulters is None:
+            num_defaulters = int(count * default_ratio)
+        is_defaulter = np.zeros(count, dtype=bool)
+        is_defaulter[:num_defaulters] = True
+        rng.shuffle(is_defaulter)
+
+        age = rng.integers(
+            np.where(is_defaulter, self.age_range[0], 30),
+            np.where(is_defaulter, self.age_range[0] * 2, self.age_range[1])
         )
-        print(f"\nDefaulter Entry #{index + 1}:")
-        print(f"Age: {data.age}")
-        print(f"Income: ₹{data.income:,.2f}")
-        print(f"Experience: {data.experience} years")
-        print(f"Current Job Years: {data.current_job_years}")
-        print(f"Current House Years: {data.current_house_years}")
-        print(f"Home Ownership: {data.home_ownership}")
-        print(f"Car Ownership: {data.car_ownership}")
-        print(f"Profession: {data.profession}")
-        print(f"State: {data.state}")
-        print("-" * 50)
-        return data
-    
-    def _generate_non_defaulter(self, index: int) -> LoanApplicationRequest:
-        """Generate synthetic data for likely non-defaulter"""
-        # Generate data
-        data = LoanApplicationRequest(
-            age=np.random.randint(30, self.age_range[1]),
-            income=np.random.uniform(self.income_range[0] * 1.5, self.income_range[1]),
-            current_house_years=int(np.random.randint(self.current_house_years_range[0], self.current_house_years_range[1])),
-            current_job_years=int(np.random.randint(self.current_job_years_range[0], self.current_job_years_range[1])),
-            experience=int(np.random.randint(5, 50)),
-            car_ownership=np.random.choice([e.value for e in CarOwnership]),
-            home_ownership=np.random.choice([e.value for e in HomeOwnershipType]),
-            profession=np.random.choice([e.value for e in Profession]),
-            state=np.random.choice([e.value for e in State])
+        income = rng.uniform(
+            np.where(is_defaulter, self.income_range[0], self.income_range[0] * 1.5),
+            self.income_range[1]
         )
-        print(f"\nNon-Defaulter Entry #{index + 1}:")
-        print(f"Age: {data.age}")
-        print(f"Income: ₹{data.income:,.2f}")
-        print(f"Experience: {data.experience} years")
-        print(f"Current Job Years: {data.current_job_years}")
-        print(f"Current House Years: {data.current_house_years}")
-        print(f"Home Ownership: {data.home_ownership}")
-        print(f"Car Ownership: {data.car_ownership}")
-        print(f"Profession: {data.profession}")
-        print(f"State: {data.state}")
-        print("-" * 50)
-        return data
-    
-    def generate(self, count: int = 1, default_ratio: Optional[float] = 0.3) -> List[LoanApplicationRequest]:
+        experience = rng.integers(np.where(is_defaulter, 0, 5), np.where(is_defaulter, 3, 50))
+        current_job_years = rng.integers(*self.current_job_years_range, size=count)
+        current_house_years = rng.integers(*self.current_house_years_range, size=count)
+
+        return pd.DataFrame({
+            "age": age,
+            "income": income,
+            "experience": experience,
+            "current_job_years": current_job_years,
+            "current_house_years": current_house_years,
+            "home_ownership": rng.choice(self.home_ownership_values, size=count),
+            "car_ownership": rng.choice(self.car_ownership_values, size=count),
+            "profession": rng.choice(self.profession_values, size=count),
+            "state": rng.choice(self.state_values, size=count),
+            "is_defaulter": is_defaulter
+        })
+
+    def generate(self, count: int = 1, default_ratio: Optional[float] = 0.3,
+                 seed: Optional[int] = None) -> List[LoanApplicationRequest]:
         """Generate synthetic loan application data"""
-        print(f"\nGenerating {count} synthetic records with {default_ratio*100:.1f}% defaulters")
-        print("=" * 50)
-        
-        synthetic_data = []
-        
-        # Calculate how many defaulters to generate
-        num_defaulters = int(count * default_ratio)
-        num_non_defaulters = count - num_defaulters
-        
-        print(f"Generating {num_defaulters} defaulters and {num_non_defaulters} non-defaulters")
-        print("=" * 50)
-        
-        print("\nDEFAULTER ENTRIES:")
-        print("=" * 50)
-        # Generate defaulters
-        for i in range(num_defaulters):
-            synthetic_data.append(self._generate_defaulter(i))
-        
-        print("\nNON-DEFAULTER ENTRIES:")
-        print("=" * 50)
-        # Generate non-defaulters
-        for i in range(num_non_defaulters):
-            synthetic_data.append(self._generate_non_defaulter(i))
-        
-        # Shuffle the data
-        np.random.shuffle(synthetic_data)
-        
-        # Print final summary
-        print("\nSUMMARY:")
-        print("=" * 50)
-        print(f"Total entries generated: {len(synthetic_data)}")
-        print(f"Defaulters: {num_defaulters}")
-        print(f"Non-defaulters: {num_non_defaulters}")
-        print("=" * 50)
-        
-        return synthetic_data
+        data = self.generate_columns(count=count, default_ratio=default_ratio, seed=seed)
+        num_defaulters = int(data["is_defaulter"].sum())
+        print(f"Generated {count} synthetic records: {num_defaulters} defaulters, "
+              f"{count - num_defaulters} non-defaulters")
+
+        records = data.drop(columns=["is_defaulter"]).to_dict("records")
+        return [LoanApplicationRequest(**record) for record in records]
+
+    def generate_chunks(self, count: int, default_ratio: Optional[float] = 0.3,
+                        seed: Optional[int] = None, chunk_size: int = 1000):
+        """
+        Yield generate_columns DataFrames of at most chunk_size rows, so any
+        count can be produced in bounded memory. The defaulter split across
+        all chunks matches generate(count, default_ratio) exactly.
+        """
+        rng = np.random.default_rng(seed)
+        total_defaulters = int(count * default_ratio)
+        produced = 0
+        defaulters_so_far = 0
+        while produced < count:
+            size = min(chunk_size, count - produced)
+            produced += size
+            # Spread defaulters proportionally, with the remainder in the last chunk
+            target = total_defaulters if produced == count else total_defaulters * produced // count
+            chunk_defaulters = target - defaulters_so_far
+            defaulters_so_far = target
+            yield self.generate_columns(count=size, rng=rng, num_defaulters=chunk_defaulters)
 
 @lru_cache()
 def get_synthetic_service() -> SyntheticService:
     """Factory function for SyntheticService (singleton pattern)"""
-    return SyntheticService()
\ No newline at end of file
+    return SyntheticService()
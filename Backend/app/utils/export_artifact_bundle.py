@@ -0,0 +1,104 @@
+import argparse
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from app.core.config import Settings
+from app.services import artifact_bundle
+from app.services.compact_forest import CompactForest
+from app.services.model_service import ModelService, bundle_source_files
+from app.services.numpy_mlp import NumpyMLP
+from app.services.synthetic_service import SyntheticService
+
+# Largest acceptable difference in default probability between the pickles and the bundle
+PARITY_TOLERANCE = 1e-5
+
+
+def export_artifact_bundle(model_dir: str, bundle_name: str = "bundle", rows: int = 2000,
+                           tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Convert the pickled artifacts in model_dir into a memory-mappable bundle and check parity.
+
+    Parameters:
+    model_dir: Directory holding the pickled models and preprocessor
+    bundle_name: Bundle directory name inside model_dir
+    rows: Synthetic rows scored by both services for the parity check
+    tolerance: Largest acceptable absolute difference in default probability
+
+    Returns:
+    difference: Max absolute default probability difference between the two services
+    """
+    # Reference service straight from the pickles, with the engines the bundle replaces
+    source = ModelService(model_dir, settings=Settings(
+        MODEL_DIR=model_dir, ARTIFACT_FORMAT="pickle", RF_ENGINE="sklearn", USE_COMPILED_ENCODER=True
+    ))
+    if source.encoder is None:
+        raise ValueError("The preprocessor cannot be compiled, so it cannot be bundled")
+    mlp = source.model3 if isinstance(source.model3, NumpyMLP) else NumpyMLP.from_keras(source.model3)
+
+    # Written and checked under a temporary name: a bundle that fails parity is
+    # never left where the service would load it
+    staging_name = f".{bundle_name}.{os.getpid()}"
+    staging_dir = os.path.join(model_dir, staging_name)
+    try:
+        artifact_bundle.write_bundle(
+            staging_dir,
+            forest=CompactForest.from_sklearn(source.model1),
+            xgb_model=source.model2,
+            mlp=mlp,
+            encoder=source.encoder,
+            feature_names=source.feature_names,
+            sources=artifact_bundle.source_fingerprint(model_dir, bundle_source_files(source.settings))
+        )
+
+        bundled = ModelService(model_dir, settings=Settings(
+            MODEL_DIR=model_dir, ARTIFACT_FORMAT="mmap", ARTIFACT_BUNDLE_DIR=staging_name,
+            RF_ENGINE="compact", NN_ENGINE="numpy"
+        ))
+        if bundled.preprocessor is not None:
+            raise ValueError("The bundle was written but could not be loaded")
+
+        columns = SyntheticService().generate_columns(rows, seed=0)
+        columns.pop("is_defaulter")
+        expected = source.predict_columns(columns)
+        actual = bundled.predict_columns(columns)
+        for field in ("model1_prediction", "model2_prediction", "model3_prediction", "ensemble_prediction"):
+            mismatches = sum(getattr(e, field) != getattr(a, field) for e, a in zip(expected, actual))
+            if mismatches:
+                raise ValueError(f"Bundle disagrees with the pickles on {field} for {mismatches} rows")
+        difference = float(np.max(np.abs(
+            np.array([e.default_probability for e in expected]) - np.array([a.default_probability for a in actual])
+        )))
+        if difference > tolerance:
+            raise ValueError(f"Bundle probabilities differ by {difference:.3g} (tolerance {tolerance:.3g})")
+
+        # Swap the checked bundle in; the old one is only removed once replaced
+        bundle_dir = os.path.join(model_dir, bundle_name)
+        retired_dir = os.path.join(model_dir, f".{bundle_name}.old.{os.getpid()}")
+        if os.path.exists(bundle_dir):
+            os.replace(bundle_dir, retired_dir)
+        os.replace(staging_dir, bundle_dir)
+        shutil.rmtree(retired_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return difference
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export the models as a memory-mappable artifact bundle")
+    parser.add_argument("--model-dir", default=settings.MODEL_DIR)
+    parser.add_argument("--bundle", default=settings.ARTIFACT_BUNDLE_DIR)
+    args = parser.parse_args()
+
+    try:
+        difference = export_artifact_bundle(args.model_dir, args.bundle)
+    except Exception as e:
+        print(f"Export failed: {str(e)}")
+        sys.exit(1)
+    print(f"Exported {os.path.join(args.model_dir, args.bundle)} "
+          f"(max default probability difference vs pickles: {difference:.3g})")
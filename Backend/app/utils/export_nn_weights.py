@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+
+from app.services.numpy_mlp import NumpyMLP, max_abs_difference
+
+# Largest acceptable difference between Keras and NumPy probabilities
+PARITY_TOLERANCE = 1e-5
+
+
+def export_nn_weights(h5_path: str, npz_path: str, tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Export a Keras .h5 network to a plain .npz weight file and check parity.
+
+    Parameters:
+    h5_path: Path to the saved Keras model
+    npz_path: Destination of the exported weights
+    tolerance: Largest acceptable absolute difference in output probability
+
+    Returns:
+    difference: Max absolute output difference between Keras and NumPy
+    """
+    import tensorflow as tf
+
+    keras_model = tf.keras.models.load_model(h5_path)
+    mlp = NumpyMLP.from_keras(keras_model)
+    difference = max_abs_difference(keras_model, mlp)
+    if difference > tolerance:
+        raise ValueError(f"NumPy forward pass differs from Keras by {difference:.3g} (tolerance {tolerance:.3g})")
+
+    mlp.save(npz_path)
+    # Round-trip through the file to catch serialization problems
+    difference = max(difference, max_abs_difference(keras_model, NumpyMLP.load(npz_path)))
+    return difference
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export the Keras network to NumPy weights")
+    parser.add_argument("--model-dir", default=settings.MODEL_DIR)
+    parser.add_argument("--h5", default=settings.MODEL_3_PATH)
+    parser.add_argument("--out", default=settings.NN_WEIGHTS_PATH)
+    args = parser.parse_args()
+
+    h5_path = os.path.join(args.model_dir, args.h5)
+    npz_path = os.path.join(args.model_dir, args.out)
+    try:
+        difference = export_nn_weights(h5_path, npz_path)
+    except Exception as e:
+        print(f"Export failed: {str(e)}")
+        sys.exit(1)
+    print(f"Exported {h5_path} -> {npz_path} (max abs difference vs Keras: {difference:.3g})")
@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from app.core.config import Settings
+from app.services import onnx_engine
+from app.services.model_service import ModelService
+from app.services.numpy_mlp import NumpyMLP
+from app.services.synthetic_service import SyntheticService
+
+# Largest acceptable difference in default probability between the pickles and ONNX
+PARITY_TOLERANCE = 1e-5
+
+
+def export_onnx(model_dir: str, onnx_name: str = "onnx", rows: int = 2000,
+                tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Convert the preprocessor and the three models in model_dir to ONNX and check parity.
+
+    Parameters:
+    model_dir: Directory holding the pickled models, the network and the preprocessor
+    onnx_name: Export directory name inside model_dir
+    rows: Synthetic rows scored by both services for the parity check
+    tolerance: Largest acceptable absolute difference in default probability
+
+    Returns:
+    difference: Max absolute default probability difference between the two services
+    """
+    # Reference service straight from the pickles (and the .h5, or its exported weights)
+    source = ModelService(model_dir, settings=Settings(
+        MODEL_DIR=model_dir, MODEL_ENGINE="native", ARTIFACT_FORMAT="pickle", RF_ENGINE="sklearn",
+        USE_COMPILED_ENCODER=True
+    ))
+    if source.encoder is None:
+        raise ValueError("The preprocessor cannot be compiled, so it cannot be exported")
+    mlp = source.model3 if isinstance(source.model3, NumpyMLP) else NumpyMLP.from_keras(source.model3)
+
+    onnx_engine.write_onnx_models(
+        os.path.join(model_dir, onnx_name),
+        encoder=source.encoder,
+        forest=source.model1,
+        xgb_model=source.model2,
+        mlp=mlp,
+        feature_names=source.feature_names
+    )
+
+    exported = ModelService(model_dir, settings=Settings(
+        MODEL_DIR=model_dir, MODEL_ENGINE="onnx", ONNX_DIR=onnx_name
+    ))
+    if not isinstance(exported.encoder, onnx_engine.OnnxEncoder):
+        raise ValueError("The ONNX models were written but could not be loaded")
+
+    columns = SyntheticService().generate_columns(rows, seed=0)
+    columns.pop("is_defaulter")
+    # The encoder graph must reproduce the preprocessor exactly
+    if not np.array_equal(exported.encoder.encode_columns(source.encoder.probe_columns()),
+                          source.encoder.encode_columns(source.encoder.probe_columns())):
+        raise ValueError("ONNX encoder output differs from the preprocessor")
+
+    expected = source.predict_columns(columns)
+    actual = exported.predict_columns(columns)
+    for field in ("model1_prediction", "model2_prediction", "model3_prediction", "ensemble_prediction"):
+        mismatches = sum(getattr(e, field) != getattr(a, field) for e, a in zip(expected, actual))
+        if mismatches:
+            raise ValueError(f"ONNX disagrees with the pickles on {field} for {mismatches} rows")
+    difference = float(np.max(np.abs(
+        np.array([e.default_probability for e in expected]) - np.array([a.default_probability for a in actual])
+    )))
+    if difference > tolerance:
+        raise ValueError(f"ONNX probabilities differ by {difference:.3g} (tolerance {tolerance:.3g})")
+    return difference
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Export the preprocessor and models to ONNX")
+    parser.add_argument("--model-dir", default=settings.MODEL_DIR)
+    parser.add_argument("--out", default=settings.ONNX_DIR)
+    args = parser.parse_args()
+
+    try:
+        difference = export_onnx(args.model_dir, args.out)
+    except Exception as e:
+        print(f"Export failed: {str(e)}")
+        sys.exit(1)
+    print(f"Exported {os.path.join(args.model_dir, args.out)} "
+          f"(max default probability difference vs pickles: {difference:.3g})")
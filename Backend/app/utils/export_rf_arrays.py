@@ -0,0 +1,70 @@
+import argparse
+import os
+import pickle
+import sys
+
+from app.services.compact_forest import CompactForest, compare_with_sklearn
+
+# Largest acceptable difference between sklearn and compact probabilities
+PARITY_TOLERANCE = 1e-9
+
+
+def export_rf_arrays(pkl_path: str, npz_path: str, tolerance: float = PARITY_TOLERANCE) -> float:
+    """
+    Flatten a pickled RandomForestClassifier into a compact .npz file and check parity.
+
+    Parameters:
+    pkl_path: Path to the pickled forest
+    npz_path: Destination of the flattened arrays
+    tolerance: Largest acceptable absolute difference in class probability
+
+    Returns:
+    difference: Max absolute probability difference between sklearn and the compact engine
+    """
+    with open(pkl_path, "rb") as f:
+        model = pickle.load(f)
+    forest = CompactForest.from_sklearn(model)
+
+    difference = 0.0
+    # Check the converted forest, then a round trip through a temporary file that
+    # only replaces npz_path once it passes (the compact engine prefers the .npz)
+    tmp_path = f"{npz_path}.tmp.{os.getpid()}.npz"
+    try:
+        for candidate in (forest, None):
+            if candidate is None:
+                forest.save(tmp_path)
+                candidate = CompactForest.load(tmp_path)
+            mismatches, max_difference = compare_with_sklearn(model, candidate)
+            if mismatches or max_difference > tolerance:
+                raise ValueError(
+                    f"Compact forest disagrees with sklearn on {mismatches} rows "
+                    f"(max probability difference {max_difference:.3g}, tolerance {tolerance:.3g})"
+                )
+            difference = max(difference, max_difference)
+        os.replace(tmp_path, npz_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return difference
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Flatten the RandomForest into compact NumPy arrays")
+    parser.add_argument("--model-dir", default=settings.MODEL_DIR)
+    parser.add_argument("--pkl", default=settings.MODEL_1_PATH)
+    parser.add_argument("--out", default=settings.RF_ARRAYS_PATH)
+    args = parser.parse_args()
+
+    pkl_path = os.path.join(args.model_dir, args.pkl)
+    npz_path = os.path.join(args.model_dir, args.out)
+    try:
+        difference = export_rf_arrays(pkl_path, npz_path)
+    except Exception as e:
+        print(f"Export failed: {str(e)}")
+        sys.exit(1)
+    print(f"Exported {pkl_path} -> {npz_path} "
+          f"({os.path.getsize(pkl_path) / 1e6:.1f} MB -> {os.path.getsize(npz_path) / 1e6:.1f} MB, "
+          f"max abs difference vs sklearn: {difference:.3g})")
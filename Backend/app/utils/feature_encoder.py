@@ -0,0 +1,159 @@
+import numpy as np
+from typing import Dict, List, Mapping, Optional, Sequence
+
+
+class CompiledEncoder:
+    def __init__(self, categorical_features, categories, numerical_features, mean=None, scale=None):
+        """
+        DataFrame-free equivalent of Preprocessor.transform for serving.
+
+        Parameters:
+        categorical_features: Ordered categorical feature names, as laid out by _encode_categories
+        categories: Dictionary mapping each categorical feature to its ordered training categories
+        numerical_features: Ordered numerical feature names, appended after the one-hot blocks
+        mean: Scaler mean_ (None when the scaler was fitted with with_mean=False)
+        scale: Scaler scale_ (None when the scaler was fitted with with_std=False)
+        """
+        self.categorical_features = list(categorical_features)
+        self.numerical_features = list(numerical_features)
+        self.categories = {feature: list(categories[feature]) for feature in self.categorical_features}
+
+        # Fixed category -> output column index for every categorical feature
+        self.column_maps: List[Dict[object, int]] = []
+        offset = 0
+        for feature in self.categorical_features:
+            values = self.categories[feature]
+            self.column_maps.append({value: offset + i for i, value in enumerate(values)})
+            offset += len(values)
+        self.numerical_offset = offset
+        self.n_features = offset + len(self.numerical_features)
+
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    @property
+    def input_features(self) -> List[str]:
+        """Column names the encoder reads from each row"""
+        return self.categorical_features + self.numerical_features
+
+    @property
+    def feature_names(self) -> List[str]:
+        """Output column names, in the order produced by Preprocessor._encode_categories"""
+        names = []
+        for feature in self.categorical_features:
+            names.extend(str(value) for value in self.categories[feature])
+        return names + self.numerical_features
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor, input_columns: Sequence[str]) -> "CompiledEncoder":
+        """
+        Compile a fitted Preprocessor for rows that carry the given input columns.
+
+        Parameters:
+        preprocessor: A fitted Preprocessor
+        input_columns: Column names present in the DataFrames the preprocessor would receive
+
+        Returns:
+        encoder: CompiledEncoder producing the same matrix as preprocessor.transform
+        """
+        input_columns = set(input_columns)
+        categorical_features = [f for f in preprocessor.categorical_features if f in input_columns]
+
+        categories = {}
+        for feature in categorical_features:
+            if feature not in preprocessor.categories:
+                raise ValueError(f"Categorical feature '{feature}' has no fitted categories")
+            categories[feature] = list(preprocessor.categories[feature])
+
+        missing = [f for f in preprocessor.numerical_features if f not in input_columns]
+        if missing:
+            raise ValueError(f"Missing numerical features: {missing}")
+
+        scaler = preprocessor.scaler
+        if not hasattr(scaler, "n_features_in_"):
+            raise ValueError("Preprocessor scaler is not fitted")
+
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) else None
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) else None
+        encoder = cls(categorical_features, categories, preprocessor.numerical_features, mean, scale)
+
+        if encoder.n_features != scaler.n_features_in_:
+            raise ValueError(
+                f"Encoded width {encoder.n_features} does not match scaler width {scaler.n_features_in_}"
+            )
+        fitted_names = getattr(scaler, "feature_names_in_", None)
+        if fitted_names is not None and [str(n) for n in fitted_names] != encoder.feature_names:
+            raise ValueError("Encoded column order does not match the scaler's fitted feature names")
+        return encoder
+
+    def encode_columns(self, columns: Mapping[str, Sequence], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode and scale column-oriented data.
+
+        Parameters:
+        columns: Mapping from input feature name to a sequence of values (one per row)
+        out: Optional preallocated float64 array of shape (n_rows, n_features)
+
+        Returns:
+        encoded_data: Scaled numpy array, identical to Preprocessor.transform
+        """
+        n_rows = len(columns[self.numerical_features[0]])
+        if out is None:
+            out = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        else:
+            if out.shape != (n_rows, self.n_features):
+                raise ValueError(f"Output buffer has shape {out.shape}, expected {(n_rows, self.n_features)}")
+            out.fill(0.0)
+
+        rows = np.arange(n_rows)
+        for feature, column_map in zip(self.categorical_features, self.column_maps):
+            # Unknown categories map to -1 and leave the block all zeros, as in transform
+            indices = np.fromiter(
+                (column_map.get(value, -1) for value in columns[feature]),
+                dtype=np.intp,
+                count=n_rows
+            )
+            known = indices >= 0
+            out[rows[known], indices[known]] = 1.0
+
+        for i, feature in enumerate(self.numerical_features):
+            out[:, self.numerical_offset + i] = columns[feature]
+
+        if self.mean is not None:
+            out -= self.mean
+        if self.scale is not None:
+            out /= self.scale
+        return out
+
+    def encode_records(self, records: Sequence[Mapping], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode and scale row-oriented data (a sequence of dictionaries).
+
+        Parameters:
+        records: Rows keyed by input feature name
+        out: Optional preallocated float64 array of shape (n_rows, n_features)
+
+        Returns:
+        encoded_data: Scaled numpy array, identical to Preprocessor.transform
+        """
+        columns = {feature: [record[feature] for record in records] for feature in self.input_features}
+        return self.encode_columns(columns, out=out)
+
+    def probe_columns(self) -> Dict[str, list]:
+        """Columns covering every known category plus an unseen one, for parity checks"""
+        n_rows = max([len(values) for values in self.categories.values()] + [1]) + 1
+        columns = {}
+        for feature in self.categorical_features:
+            values = self.categories[feature] + ["__unseen__"]
+            columns[feature] = [values[i % len(values)] for i in range(n_rows)]
+        for i, feature in enumerate(self.numerical_features):
+            columns[feature] = [float(row * (i + 1)) for row in range(n_rows)]
+        return columns
+
+    def matches(self, preprocessor) -> bool:
+        """Check that this encoder reproduces preprocessor.transform exactly on probe rows"""
+        import pandas as pd
+
+        columns = self.probe_columns()
+        expected = preprocessor.transform(pd.DataFrame(columns))
+        return np.array_equal(self.encode_columns(columns), np.asarray(expected, dtype=np.float64))
@@ -10,7 +10,7 @@ def inspect_preprocessor():
         # Use custom unpickler to handle module name changes
         class CustomUnpickler(pickle.Unpickler):
             def find_class(self, module, name):
-                if module == "preprocessing":
+                if module in ("preprocessing", "bm_preprocessing"):
                     module = "data_preprocessing"
                 return super().find_class(module, name)
         
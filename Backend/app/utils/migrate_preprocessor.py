@@ -0,0 +1,157 @@
+import argparse
+import glob
+import io
+import os
+import pickle
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_preprocessing import Preprocessor
+
+# Modules a Preprocessor may have been pickled from: the notebook, BuildModel and the backend
+PREPROCESSOR_MODULES = ("preprocessing", "bm_preprocessing", "data_preprocessing", "app.utils.data_preprocessing")
+
+
+class PreprocessorUnpickler(pickle.Unpickler):
+    """Loads a Preprocessor pickled by any of its modules, remembering which one"""
+
+    def __init__(self, file):
+        super().__init__(file)
+        self.source_module = None
+
+    def find_class(self, module, name):
+        if module in PREPROCESSOR_MODULES and name == "Preprocessor":
+            self.source_module = module
+            return Preprocessor
+        return super().find_class(module, name)
+
+
+def dumps_as(preprocessor: Preprocessor, module: str) -> bytes:
+    """
+    Pickle the preprocessor under the module it was originally pickled from.
+
+    BuildModel reads its pickles back as bm_preprocessing.Preprocessor, so a
+    migrated file must keep that class reference rather than the backend's.
+
+    Parameters:
+    preprocessor: Preprocessor to pickle
+    module: Module name the class reference is written under
+
+    Returns:
+    data: The pickle bytes
+    """
+    if module == Preprocessor.__module__:
+        return pickle.dumps(preprocessor)
+
+    # Placeholder class registered under the original module for the duration of the dump
+    placeholder = types.ModuleType(module)
+    placeholder.Preprocessor = type("Preprocessor", (), {"__module__": module})
+
+    class Pickler(pickle.Pickler):
+        def reducer_override(self, obj):
+            if type(obj) is Preprocessor:
+                # Loads as Preprocessor() followed by __setstate__
+                return placeholder.Preprocessor, (), obj.__getstate__()
+            return NotImplemented
+
+    previous = sys.modules.get(module)
+    sys.modules[module] = placeholder
+    try:
+        buffer = io.BytesIO()
+        Pickler(buffer).dump(preprocessor)
+    finally:
+        if previous is None:
+            del sys.modules[module]
+        else:
+            sys.modules[module] = previous
+    return buffer.getvalue()
+
+
+def probe_frame(preprocessor: Preprocessor) -> pd.DataFrame:
+    """Rows covering every fitted category, with varied numerical values"""
+    features = [f for f in preprocessor.categorical_features if f in preprocessor.categories]
+    n_rows = max([len(preprocessor.categories[f]) for f in features] + [1])
+    frame = {f: [preprocessor.categories[f][i % len(preprocessor.categories[f])] for i in range(n_rows)]
+             for f in features if preprocessor.categories[f]}
+    for i, feature in enumerate(preprocessor.numerical_features):
+        frame[feature] = np.arange(n_rows, dtype=np.float64) * (i + 1)
+    return pd.DataFrame(frame)
+
+
+def migrate_preprocessor(path: str, backup: bool = True) -> tuple:
+    """
+    Rewrite a pickled Preprocessor in the compact vocabulary-only state format.
+
+    Parameters:
+    path: preprocessor.pkl to migrate
+    backup: Keep the original file as <path>.bak
+
+    Returns:
+    before, after: File size in bytes before and after (equal when left unchanged)
+    """
+    with open(path, "rb") as f:
+        original = f.read()
+    unpickler = PreprocessorUnpickler(io.BytesIO(original))
+    preprocessor = unpickler.load()
+    if unpickler.source_module is None or not isinstance(preprocessor, Preprocessor):
+        raise ValueError(f"{path} does not hold a Preprocessor")
+
+    migrated = dumps_as(preprocessor, unpickler.source_module)
+    if len(migrated) >= len(original):
+        # Already in the compact format
+        return len(original), len(original)
+
+    # The rewritten file must load back and encode exactly like the original
+    reloaded = PreprocessorUnpickler(io.BytesIO(migrated)).load()
+    if hasattr(preprocessor.scaler, "n_features_in_"):
+        probe = probe_frame(preprocessor)
+        if not np.array_equal(preprocessor.transform(probe), reloaded.transform(probe)):
+            raise ValueError(f"Migrated preprocessor in {path} encodes differently; file left unchanged")
+
+    if backup:
+        with open(f"{path}.bak", "wb") as f:
+            f.write(original)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(migrated)
+    os.replace(tmp_path, path)
+    return len(original), len(migrated)
+
+
+def find_preprocessors(model_dir: str) -> list:
+    """preprocessor.pkl of the unversioned layout and of every version under model_dir"""
+    paths = [os.path.join(model_dir, "preprocessor.pkl")]
+    paths += sorted(glob.glob(os.path.join(model_dir, "versions", "*", "preprocessor.pkl")))
+    return [path for path in paths if os.path.isfile(path)]
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Shrink pickled preprocessors to the vocabulary-only format")
+    parser.add_argument("paths", nargs="*", help="preprocessor.pkl files (default: every one in --model-dir)")
+    parser.add_argument("--model-dir", default=settings.MODEL_DIR)
+    parser.add_argument("--no-backup", action="store_true", help="Do not keep the originals as .bak files")
+    args = parser.parse_args()
+
+    paths = args.paths or find_preprocessors(args.model_dir)
+    if not paths:
+        print(f"No preprocessor.pkl found in {args.model_dir}")
+        sys.exit(1)
+    failed = False
+    for path in paths:
+        try:
+            before, after = migrate_preprocessor(path, backup=not args.no_backup)
+        except Exception as e:
+            print(f"{path}: migration failed: {str(e)}")
+            failed = True
+            continue
+        if before == after:
+            print(f"{path}: already compact ({before / 1e6:.2f} MB)")
+        else:
+            print(f"{path}: {before / 1e6:.2f} MB -> {after / 1e6:.3f} MB")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.neural_network import MLPClassifier
+from xgboost import XGBClassifier
+
+from app.services.model_service import COLUMN_RENAMES
+from app.services.compact_forest import CompactForest
+from app.services.numpy_mlp import NumpyMLP
+from app.services.synthetic_service import SyntheticService
+from app.utils.data_preprocessing import Preprocessor
+
+
+def synthetic_applications(count: int, default_ratio: float = 0.3, seed: int = 0):
+    """Seeded SyntheticService applications"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SyntheticService().generate(count=count, default_ratio=default_ratio, seed=seed)
+
+
+def training_frame(n_rows: int, default_ratio: float = 0.3, seed: int = 0):
+    """Labelled training DataFrame built from the synthetic defaulter/non-defaulter profiles"""
+    data = SyntheticService().generate_columns(count=n_rows, default_ratio=default_ratio, seed=seed)
+    labels = data.pop("is_defaulter").astype(int).values
+    return data.rename(columns=COLUMN_RENAMES), labels
+
+
+def build_fixture_models(model_dir: str, n_rows: int = 2000, n_estimators: int = 50, seed: int = 0) -> str:
+    """
+    Train small stand-in models on generated data and write them in the
+    layout ModelService loads from MODEL_DIR.
+
+    The neural network is a scikit-learn MLP with the serving network's
+    hidden layer sizes, exported to the NumPy engine's weight file, so no
+    TensorFlow is needed.
+
+    Parameters:
+    model_dir: Directory to write the artifacts to
+    n_rows: Number of generated training rows
+    n_estimators: Trees per forest / boosting rounds
+    seed: Seed for data generation and model training
+
+    Returns:
+    model_dir: The directory that was written
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    data, labels = training_frame(n_rows, seed=seed)
+
+    preprocessor = Preprocessor()
+    X = preprocessor.fit_transform(data)
+
+    rf = RandomForestClassifier(n_estimators=n_estimators, max_depth=16, random_state=seed, n_jobs=-1)
+    rf.fit(X, labels)
+    xgb = XGBClassifier(n_estimators=n_estimators, max_depth=6, random_state=seed, n_jobs=-1)
+    xgb.fit(X, labels)
+    mlp = MLPClassifier(hidden_layer_sizes=(128, 64, 32), max_iter=50, random_state=seed)
+    mlp.fit(X, labels)
+
+    with open(os.path.join(model_dir, "preprocessor.pkl"), "wb") as f:
+        pickle.dump(preprocessor, f)
+    with open(os.path.join(model_dir, "random_forest_model.pkl"), "wb") as f:
+        pickle.dump(rf, f)
+    CompactForest.from_sklearn(rf).save(os.path.join(model_dir, "random_forest_model.npz"))
+    with open(os.path.join(model_dir, "xgb_model.pkl"), "wb") as f:
+        pickle.dump(xgb, f)
+
+    activations = ["relu"] * len(mlp.hidden_layer_sizes) + ["sigmoid"]
+    NumpyMLP(mlp.coefs_, mlp.intercepts_, activations).save(
+        os.path.join(model_dir, "neural_network_model.npz")
+    )
+    return model_dir
@@ -0,0 +1,208 @@
+"""
+HTTP load test and latency benchmark for the prediction API.
+
+Starts the app (app.main:create_application) under uvicorn in a child
+process, by default against small fixture models trained on generated data.
+Then it drives the prediction endpoints at a fixed concurrency with seeded
+SyntheticService inputs and prints throughput and latency percentiles as JSON.
+
+Run from the Backend directory:
+
+    python -m benchmarks.http_load --concurrency 32 --requests 2000 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.fixtures import build_fixture_models, synthetic_applications
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("predict", "predict-synthetic", "predict-batch")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(model_dir: str, port: int, env_overrides: dict) -> subprocess.Popen:
+    """Run the app factory under uvicorn in a child process"""
+    env = dict(os.environ, MODEL_DIR=model_dir, **env_overrides)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:create_application", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float):
+    """Poll /api/health/ready until the models are loaded and warm"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            response = await client.get("/api/health/ready")
+            if response.status_code == 200:
+                return response.json()
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("Server did not become ready in time")
+
+
+def request_payloads(endpoint: str, applications: list, rows_per_request: int) -> list:
+    """Request bodies for an endpoint, cycling through the generated applications"""
+    bodies = [application.dict() if hasattr(application, "dict") else application for application in applications]
+    bodies = json.loads(json.dumps(bodies, default=lambda value: getattr(value, "value", str(value))))
+    if endpoint == "predict":
+        return bodies
+    if endpoint == "predict-batch":
+        return [
+            [bodies[(start + i) % len(bodies)] for i in range(rows_per_request)]
+            for start in range(0, len(bodies), rows_per_request)
+        ]
+    return [{"count": rows_per_request, "default_ratio": 0.3}]
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: str, payloads: list,
+                       n_requests: int, concurrency: int, rows_per_request: int) -> dict:
+    """Send n_requests to one endpoint from `concurrency` workers and summarise the latencies"""
+    latencies = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/{endpoint}", json=payloads[i % len(payloads)])
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    rows = 1 if endpoint == "predict" else rows_per_request
+    latency_ms = np.array(latencies) * 1000.0
+    return {
+        "endpoint": f"/api/{endpoint}",
+        "requests": n_requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "rows_per_request": rows,
+        "duration_seconds": elapsed,
+        "requests_per_second": n_requests / elapsed,
+        "rows_per_second": n_requests * rows / elapsed,
+        "latency_ms": {
+            "mean": float(latency_ms.mean()),
+            "p50": float(np.percentile(latency_ms, 50)),
+            "p95": float(np.percentile(latency_ms, 95)),
+            "p99": float(np.percentile(latency_ms, 99)),
+            "max": float(latency_ms.max())
+        }
+    }
+
+
+async def run_benchmark(args, model_dir: str) -> dict:
+    port = _free_port()
+    env_overrides = {
+        "NN_ENGINE": args.nn_engine,
+        "RF_ENGINE": args.rf_engine,
+        "PREDICTION_CACHE_ENABLED": str(args.cache).lower(),
+        "MICROBATCH_ENABLED": str(not args.no_microbatch).lower(),
+        "PARALLEL_ENSEMBLE": str(args.parallel_ensemble).lower(),
+        "ENSEMBLE_MODE": args.ensemble_mode
+    }
+    server = start_server(model_dir, port, env_overrides)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120.0) as client:
+            readiness = await wait_until_ready(client, server, args.startup_timeout)
+            applications = synthetic_applications(args.input_pool, seed=args.seed)
+
+            results = []
+            for endpoint in args.endpoints:
+                payloads = request_payloads(endpoint, applications, args.rows_per_request)
+                if args.warmup:
+                    await run_endpoint(client, endpoint, payloads, args.warmup, args.concurrency, args.rows_per_request)
+                results.append(await run_endpoint(
+                    client, endpoint, payloads, args.requests, args.concurrency, args.rows_per_request
+                ))
+        return {
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "model_load_timings": readiness.get("load_timings"),
+            "results": results
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP load test for the loan default prediction API")
+    parser.add_argument("--model-dir", help="Use existing artifacts instead of training fixture models")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint")
+    parser.add_argument("--rows-per-request", type=int, default=32, help="Batch size for batch/synthetic endpoints")
+    parser.add_argument("--input-pool", type=int, default=1000, help="Distinct generated applications")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nn-engine", choices=("numpy", "keras"), default="numpy")
+    parser.add_argument("--rf-engine", choices=("compact", "sklearn"), default="compact")
+    parser.add_argument("--cache", action="store_true", help="Keep the prediction cache enabled")
+    parser.add_argument("--no-microbatch", action="store_true", help="Disable /predict micro-batching")
+    parser.add_argument("--parallel-ensemble", action="store_true", help="Score ensemble members concurrently")
+    parser.add_argument("--ensemble-mode", choices=("vote", "cascade"), default="vote")
+    parser.add_argument("--fixture-rows", type=int, default=2000)
+    parser.add_argument("--fixture-estimators", type=int, default=50)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="ldps-bench-") as tmp_dir:
+        model_dir = args.model_dir or build_fixture_models(
+            tmp_dir, n_rows=args.fixture_rows, n_estimators=args.fixture_estimators, seed=args.seed
+        )
+        report = asyncio.run(run_benchmark(args, model_dir))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Offline inference micro-benchmark across batch sizes and engines.
+
+Times Preprocessor.transform, the compiled encoder and each model's
+predict/predict_proba (plus every alternate engine the service supports)
+at several batch sizes, without HTTP in the way. Reports rows/sec,
+per-row latency and peak traced memory, and writes a JSON file that can
+be diffed between versions.
+
+Run from the Backend directory:
+
+    python -m benchmarks.inference_matrix --output before.json
+    python -m benchmarks.inference_matrix --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from app.core.config import Settings
+from app.services.model_service import ModelService
+from app.services import onnx_engine
+from app.services.compact_forest import CompactForest
+from app.services.numpy_mlp import NumpyMLP
+from benchmarks.fixtures import build_fixture_models, synthetic_applications
+
+DEFAULT_BATCH_SIZES = (1, 8, 64, 512, 4096)
+
+
+class Case(NamedTuple):
+    stage: str  # what is computed (encode, random_forest, ...)
+    engine: str  # how it is computed (dataframe, compiled, sklearn, numpy, ...)
+    op: str  # method name (transform, predict, predict_proba)
+    input_kind: str  # "frame", "columns" or "matrix"
+    fn: Callable
+
+
+def build_cases(service: ModelService, model_dir: str) -> List[Case]:
+    """Every (stage, engine, op) combination available for these artifacts"""
+    with open(os.path.join(model_dir, "random_forest_model.pkl"), "rb") as f:
+        random_forest = pickle.load(f)
+    cases = [
+        Case("encode", "dataframe", "transform", "frame", service.preprocessor.transform),
+        Case("random_forest", "sklearn", "predict", "matrix", random_forest.predict),
+        Case("random_forest", "sklearn", "predict_proba", "matrix", random_forest.predict_proba),
+        Case("xgboost", "xgboost", "predict", "matrix", service.model2.predict),
+        Case("xgboost", "xgboost", "predict_proba", "matrix", service.model2.predict_proba),
+    ]
+    if service.encoder is not None:
+        cases.append(Case("encode", "compiled", "transform", "columns", service.encoder.encode_columns))
+
+    arrays_path = os.path.join(model_dir, service.settings.RF_ARRAYS_PATH)
+    if os.path.exists(arrays_path):
+        forest = CompactForest.load(arrays_path)
+        cases.append(Case("random_forest", "compact", "predict", "matrix", forest.predict))
+        cases.append(Case("random_forest", "compact", "predict_proba", "matrix", forest.predict_proba))
+
+    weights_path = os.path.join(model_dir, service.settings.NN_WEIGHTS_PATH)
+    if os.path.exists(weights_path):
+        cases.append(Case("neural_network", "numpy", "predict", "matrix", NumpyMLP.load(weights_path).predict))
+
+    h5_path = os.path.join(model_dir, "neural_network_model.h5")
+    if os.path.exists(h5_path):
+        try:
+            import tensorflow as tf
+
+            keras_model = tf.keras.models.load_model(h5_path)
+            cases.append(Case("neural_network", "keras", "predict", "matrix",
+                              lambda X: keras_model.predict(X, verbose=0)))
+        except ImportError:
+            print("TensorFlow not installed; skipping the Keras engine")
+
+    onnx_dir = os.path.join(model_dir, service.settings.ONNX_DIR)
+    if os.path.exists(os.path.join(onnx_dir, onnx_engine.MANIFEST_NAME)):
+        try:
+            sessions = onnx_engine.load_models(onnx_dir, onnx_engine.read_manifest(onnx_dir))
+            cases.extend([
+                Case("encode", "onnx", "transform", "columns", sessions["encoder"].encode_columns),
+                Case("random_forest", "onnx", "predict", "matrix", sessions["random_forest"].predict),
+                Case("random_forest", "onnx", "predict_proba", "matrix", sessions["random_forest"].predict_proba),
+                Case("xgboost", "onnx", "predict", "matrix", sessions["xgboost"].predict),
+                Case("xgboost", "onnx", "predict_proba", "matrix", sessions["xgboost"].predict_proba),
+                Case("neural_network", "onnx", "predict", "matrix", sessions["neural_network"].predict),
+            ])
+        except ImportError:
+            print("onnxruntime not installed; skipping the ONNX engine")
+    return cases
+
+
+def time_case(fn: Callable, batch, min_time: float, min_repeats: int) -> Dict:
+    """Time repeated calls of fn(batch) and measure peak traced memory of one call"""
+    fn(batch)  # warm caches and lazy initialisation
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_repeats or time.perf_counter() - started < min_time:
+        call_started = time.perf_counter()
+        fn(batch)
+        timings.append(time.perf_counter() - call_started)
+
+    tracemalloc.start()
+    fn(batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = np.array(timings)
+    return {"repeats": len(timings), "call_seconds_median": float(np.median(timings)),
+            "call_seconds_min": float(timings.min()), "peak_traced_bytes": int(peak)}
+
+
+def run_matrix(service: ModelService, model_dir: str, batch_sizes, min_time: float,
+               min_repeats: int, seed: int) -> List[Dict]:
+    applications = synthetic_applications(max(batch_sizes), seed=seed)
+    frame = service._to_dataframe(applications)
+    columns = {feature: list(frame[feature]) for feature in frame.columns}
+    matrix = np.asarray(service.preprocessor.transform(frame))
+
+    results = []
+    for case in build_cases(service, model_dir):
+        for batch_size in batch_sizes:
+            if case.input_kind == "frame":
+                batch = frame.iloc[:batch_size]
+            elif case.input_kind == "columns":
+                batch = {feature: values[:batch_size] for feature, values in columns.items()}
+            else:
+                batch = matrix[:batch_size]
+
+            timing = time_case(case.fn, batch, min_time, min_repeats)
+            per_call = timing["call_seconds_median"]
+            results.append({
+                "key": f"{case.stage}/{case.engine}/{case.op}/{batch_size}",
+                "stage": case.stage,
+                "engine": case.engine,
+                "op": case.op,
+                "batch_size": batch_size,
+                "rows_per_second": batch_size / per_call,
+                "per_row_latency_us": per_call / batch_size * 1e6,
+                **timing
+            })
+            print(f"{results[-1]['key']:<45} {results[-1]['rows_per_second']:>14,.0f} rows/s "
+                  f"{results[-1]['per_row_latency_us']:>12,.2f} us/row")
+    return results
+
+
+def compare(results: List[Dict], baseline_path: str) -> List[Dict]:
+    """Throughput ratio of every key present in both runs (>1 means faster now)"""
+    with open(baseline_path) as f:
+        baseline = {row["key"]: row for row in json.load(f)["results"]}
+    comparison = []
+    for row in results:
+        previous = baseline.get(row["key"])
+        if previous:
+            comparison.append({
+                "key": row["key"],
+                "speedup": row["rows_per_second"] / previous["rows_per_second"],
+                "peak_traced_bytes_delta": row["peak_traced_bytes"] - previous["peak_traced_bytes"]
+            })
+    return comparison
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline inference benchmark matrix")
+    parser.add_argument("--model-dir", help="Use existing artifacts instead of training fixture models")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds timed per cell")
+    parser.add_argument("--min-repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixture-rows", type=int, default=2000)
+    parser.add_argument("--fixture-estimators", type=int, default=50)
+    parser.add_argument("--output", default="inference_matrix.json")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="ldps-bench-") as tmp_dir:
+        model_dir = args.model_dir or build_fixture_models(
+            tmp_dir, n_rows=args.fixture_rows, n_estimators=args.fixture_estimators, seed=args.seed
+        )
+        # Every engine is constructed explicitly in build_cases; no warmup needed here
+        # Pickle format: the DataFrame preprocessor is benchmarked too
+        settings = Settings(MODEL_DIR=model_dir, WARMUP_ROWS=0, ARTIFACT_FORMAT="pickle")
+        service = ModelService(model_dir=model_dir, settings=settings)
+        results = run_matrix(service, model_dir, sorted(args.batch_sizes), args.min_time,
+                             args.min_repeats, args.seed)
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__
+        },
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results
+    }
+    if args.compare:
+        report["comparison"] = compare(results, args.compare)
+        for row in report["comparison"]:
+            print(f"{row['key']:<45} x{row['speedup']:.2f}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
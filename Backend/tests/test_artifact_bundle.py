@@ -0,0 +1,74 @@
+import os
+import pickle
+
+import pytest
+
+from app.core.config import Settings
+from app.services import artifact_bundle
+from app.services.model_service import ModelService
+from app.utils import export_artifact_bundle as exporter
+from benchmarks.fixtures import build_fixture_models
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    model_dir = str(tmp_path / "models")
+    build_fixture_models(model_dir, n_rows=1500, n_estimators=10)
+    exporter.export_artifact_bundle(model_dir, rows=200)
+    return model_dir
+
+
+def serves_bundle(model_dir, **overrides):
+    service = ModelService(model_dir, settings=Settings(MODEL_DIR=model_dir, **overrides))
+    # The bundle serves through the compiled encoder only
+    return service.preprocessor is None
+
+
+def test_default_settings_serve_a_current_bundle(model_dir):
+    assert serves_bundle(model_dir)
+
+
+def test_explicit_engines_bypass_the_bundle(model_dir):
+    assert not serves_bundle(model_dir, RF_ENGINE="sklearn")
+    # The fixture has no Keras model to fall back to, so only the decision is checked
+    service = ModelService(model_dir, settings=Settings(MODEL_DIR=model_dir))
+    service.settings = Settings(MODEL_DIR=model_dir, NN_ENGINE="keras")
+    manifest = artifact_bundle.read_manifest(os.path.join(model_dir, "bundle"))
+    assert "NN_ENGINE=keras" in service._bundle_mismatch(manifest)
+
+
+def test_rewritten_model_invalidates_the_bundle(model_dir):
+    path = os.path.join(model_dir, "xgb_model.pkl")
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+    model.set_params(n_estimators=model.n_estimators + 1)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+    assert not serves_bundle(model_dir)
+    exporter.export_artifact_bundle(model_dir, rows=200)
+    assert serves_bundle(model_dir)
+
+
+def test_failed_parity_keeps_the_previous_bundle(model_dir):
+    manifest_path = os.path.join(model_dir, "bundle", "manifest.json")
+    with open(manifest_path) as f:
+        manifest = f.read()
+
+    with pytest.raises(ValueError):
+        exporter.export_artifact_bundle(model_dir, rows=200, tolerance=-1.0)
+
+    with open(manifest_path) as f:
+        assert f.read() == manifest
+    assert sorted(name for name in os.listdir(model_dir) if "bundle" in name) == ["bundle"]
+
+
+def test_failed_first_export_leaves_no_bundle(tmp_path):
+    model_dir = str(tmp_path / "models")
+    build_fixture_models(model_dir, n_rows=1500, n_estimators=10)
+
+    with pytest.raises(ValueError):
+        exporter.export_artifact_bundle(model_dir, rows=200, tolerance=-1.0)
+
+    assert not any("bundle" in name for name in os.listdir(model_dir))
+    assert not serves_bundle(model_dir)
@@ -0,0 +1,59 @@
+import asyncio
+
+from app.api.models import ModelPrediction
+from app.api.routes import predict_loan_default
+from app.services.batching import MicroBatcher
+from app.services.prediction_cache import PredictionCache
+from benchmarks.fixtures import synthetic_applications
+
+
+class StubService:
+    """Predictions tagged with the service's model version, recording each batch it scored"""
+
+    def __init__(self, model_version):
+        self.model_version = model_version
+        self.batches = []
+
+    async def predict_batch_async(self, applications):
+        self.batches.append(len(applications))
+        await asyncio.sleep(0)
+        return [
+            ModelPrediction(model1_prediction=0, model2_prediction=0, model3_prediction=0,
+                            ensemble_prediction=0, default_probability=0.1, model_version=self.model_version)
+            for _ in applications
+        ]
+
+
+def test_requests_are_scored_by_the_service_they_were_submitted_for():
+    old, new = StubService("v1"), StubService("v2")
+    batcher = MicroBatcher(lambda: new, max_batch_size=16, window_ms=20.0)
+    applications = synthetic_applications(6, seed=0)
+
+    async def run():
+        # A reload lands while the batch is being collected
+        return await asyncio.gather(
+            *(batcher.submit(application, old) for application in applications[:3]),
+            *(batcher.submit(application, new) for application in applications[3:5]),
+            batcher.submit(applications[5])
+        )
+
+    predictions = asyncio.run(run())
+
+    assert [p.model_version for p in predictions] == ["v1"] * 3 + ["v2"] * 3
+    assert old.batches == [3] and new.batches == [3]
+
+
+def test_cache_key_and_scorer_use_the_same_version():
+    old, new = StubService("v1"), StubService("v2")
+    # The batcher's own lookup already returns the reloaded service
+    batcher = MicroBatcher(lambda: new, max_batch_size=16, window_ms=1.0)
+    cache = PredictionCache(max_size=16, ttl_seconds=60.0)
+    application = synthetic_applications(1, seed=1)[0]
+
+    async def run():
+        return await predict_loan_default(application, model_service=old, batcher=batcher, cache=cache)
+
+    prediction = asyncio.run(run())
+
+    assert prediction.model_version == "v1"
+    assert new.batches == []
@@ -0,0 +1,117 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.services.model_service import ENSEMBLE_MEMBERS, ModelService
+from app.services.synthetic_service import SyntheticService
+from benchmarks.fixtures import build_fixture_models
+
+
+class StubClassifier:
+    """Votes 1 where sign * a column of X is positive, counting the rows it scored"""
+
+    def __init__(self, column, sign=1):
+        self.column, self.sign, self.rows = column, sign, 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return (self.sign * X[:, self.column] > 0).astype(int)
+
+
+class StubNetwork(StubClassifier):
+    """Sigmoid of the same column: the vote is its probability > 0.5"""
+
+    def predict(self, X, batch_size=None, verbose=0):
+        self.rows += len(X)
+        return 1.0 / (1.0 + np.exp(-self.sign * X[:, [self.column]]))
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    return build_fixture_models(str(tmp_path_factory.mktemp("models")), n_rows=1500, n_estimators=10)
+
+
+@pytest.fixture(scope="module")
+def columns():
+    columns = SyntheticService().generate_columns(400, seed=0)
+    columns.pop("is_defaulter")
+    return columns
+
+
+def stub_service(model_dir, columns_by_member, signs=None, **overrides):
+    """Service whose three members are stubs reading the given numerical columns"""
+    service = ModelService(model_dir, settings=Settings(MODEL_DIR=model_dir, ARTIFACT_FORMAT="pickle", **overrides))
+    offset = service.encoder.numerical_offset
+    stubs = {
+        member: (StubNetwork if member == "neural_network" else StubClassifier)(
+            offset + column, sign=(signs or {}).get(member, 1)
+        )
+        for member, column in columns_by_member.items()
+    }
+    service.model1, service.model2, service.model3 = (stubs[member] for member in ENSEMBLE_MEMBERS)
+    return service, stubs
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(ENSEMBLE_MEMBERS)))
+def test_cascade_matches_vote_mode(model_dir, columns, order):
+    members = {"random_forest": 0, "xgboost": 1, "neural_network": 2}
+    vote, _ = stub_service(model_dir, members)
+    cascade, stubs = stub_service(model_dir, members, ENSEMBLE_MODE="cascade", CASCADE_ORDER=list(order))
+
+    expected = vote.predict_columns(columns)
+    actual = cascade.predict_columns(columns)
+
+    first, second, third = order
+    disagreements = 0
+    for e, a in zip(expected, actual):
+        assert a.ensemble_prediction == e.ensemble_prediction
+        full = dict(zip(ENSEMBLE_MEMBERS, (e.model1_prediction, e.model2_prediction, e.model3_prediction)))
+        reported = dict(zip(ENSEMBLE_MEMBERS, (a.model1_prediction, a.model2_prediction, a.model3_prediction)))
+        if full[first] == full[second]:
+            assert reported[third] is None
+            assert a.skipped_models == [third]
+        else:
+            disagreements += 1
+            assert a.skipped_models == []
+        assert {m: v for m, v in reported.items() if v is not None} == {
+            m: full[m] for m in reported if reported[m] is not None
+        }
+        if "neural_network" in a.skipped_models:
+            assert a.default_probability is None
+        else:
+            assert a.default_probability == e.default_probability
+    assert 0 < disagreements < len(actual)
+    assert stubs[first].rows == stubs[second].rows == len(actual)
+    assert stubs[third].rows == disagreements
+
+
+def test_agreeing_members_never_score_the_third(model_dir, columns):
+    # random_forest and xgboost read the same column, so they always agree
+    service, stubs = stub_service(model_dir, {"random_forest": 0, "xgboost": 0, "neural_network": 2},
+                                  ENSEMBLE_MODE="cascade", CASCADE_ORDER=list(ENSEMBLE_MEMBERS))
+
+    predictions = service.predict_columns(columns)
+
+    assert stubs["neural_network"].rows == 0
+    for p in predictions:
+        assert p.model3_prediction is None and p.default_probability is None
+        assert p.skipped_models == ["neural_network"]
+        assert p.ensemble_prediction == p.model1_prediction
+
+
+def test_disagreeing_members_always_score_the_third(model_dir, columns):
+    # xgboost votes the opposite of random_forest on every row
+    service, stubs = stub_service(model_dir, {"random_forest": 0, "xgboost": 0, "neural_network": 2},
+                                  signs={"xgboost": -1},
+                                  ENSEMBLE_MODE="cascade", CASCADE_ORDER=list(ENSEMBLE_MEMBERS))
+
+    predictions = service.predict_columns(columns)
+
+    assert stubs["neural_network"].rows == len(predictions)
+    for p in predictions:
+        assert p.skipped_models == []
+        assert p.model1_prediction != p.model2_prediction
+        assert p.ensemble_prediction == p.model3_prediction
+        assert p.default_probability is not None
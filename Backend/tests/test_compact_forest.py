@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.core.config import Settings
+from app.services.compact_forest import CompactForest, compare_with_sklearn
+from app.services.model_service import ModelService
+from app.utils.data_preprocessing import Preprocessor
+from app.utils import export_rf_arrays as export_module
+from benchmarks.fixtures import build_fixture_models, synthetic_applications, training_frame
+
+
+@pytest.fixture(scope="module")
+def deep_forest():
+    """Unpruned (depth 50) forest of 60 trees on encoded synthetic applications"""
+    data, labels = training_frame(3000, seed=3)
+    X = Preprocessor().fit_transform(data)
+    model = RandomForestClassifier(n_estimators=60, max_depth=50, random_state=0, n_jobs=1).fit(X, labels)
+    return model, X
+
+
+def threshold_rows(model, X, per_tree=40, seed=0):
+    """Rows whose split feature sits exactly on, just below and just above a float32-rounded threshold"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        splits = np.flatnonzero(tree.children_left >= 0)
+        for node in rng.choice(splits, size=min(per_tree, len(splits)), replace=False):
+            value = np.float32(tree.threshold[node])
+            for x in (value, np.nextafter(value, np.float32(-np.inf)), np.nextafter(value, np.float32(np.inf))):
+                row = X[rng.integers(len(X))].astype(np.float32)
+                row[tree.feature[node]] = x
+                rows.append(row)
+    return np.array(rows, dtype=np.float32)
+
+
+def test_compact_forest_is_bit_identical_to_sklearn(deep_forest, tmp_path):
+    model, X = deep_forest
+    path = str(tmp_path / "random_forest_model.npz")
+    CompactForest.from_sklearn(model).save(path)
+    forest = CompactForest.load(path)
+
+    for rows in (X.astype(np.float32), threshold_rows(model, X)):
+        mismatches, difference = compare_with_sklearn(model, forest, rows)
+        assert mismatches == 0
+        np.testing.assert_array_equal(forest.predict_proba(rows), model.predict_proba(rows))
+        assert difference == 0.0
+
+
+def test_compact_engine_matches_pickle_engine(tmp_path):
+    model_dir = build_fixture_models(str(tmp_path), n_rows=1500, n_estimators=30)
+    services = {
+        engine: ModelService(model_dir, settings=Settings(
+            MODEL_DIR=model_dir, RF_ENGINE=engine, ARTIFACT_FORMAT="pickle", NN_ENGINE="numpy"
+        ))
+        for engine in ("compact", "sklearn")
+    }
+    assert isinstance(services["compact"].model1, CompactForest)
+    assert isinstance(services["sklearn"].model1, RandomForestClassifier)
+
+    applications = synthetic_applications(300, seed=5)
+    expected = services["sklearn"].predict_batch(applications)
+    actual = services["compact"].predict_batch(applications)
+    assert [p.model1_prediction for p in actual] == [p.model1_prediction for p in expected]
+    assert [p.default_probability for p in actual] == [p.default_probability for p in expected]
+
+
+def test_failed_export_keeps_the_previous_arrays(tmp_path, monkeypatch):
+    model_dir = build_fixture_models(str(tmp_path), n_rows=1500, n_estimators=10)
+    pkl_path = os.path.join(model_dir, "random_forest_model.pkl")
+    npz_path = os.path.join(model_dir, "random_forest_model.npz")
+    previous = b"previous export"
+    with open(npz_path, "wb") as f:
+        f.write(previous)
+    # The converted forest passes, the round trip through the file does not
+    results = iter([(0, 0.0), (3, 0.5)])
+    monkeypatch.setattr(export_module, "compare_with_sklearn", lambda model, forest: next(results))
+
+    with pytest.raises(ValueError):
+        export_module.export_rf_arrays(pkl_path, npz_path)
+
+    with open(npz_path, "rb") as f:
+        assert f.read() == previous
+    assert sorted(name for name in os.listdir(model_dir) if name.startswith("random_forest")) == [
+        "random_forest_model.npz", "random_forest_model.pkl"
+    ]
+
+
+def test_arrays_older_than_the_pickle_are_not_served(tmp_path):
+    model_dir = build_fixture_models(str(tmp_path), n_rows=1500, n_estimators=10)
+    settings = Settings(MODEL_DIR=model_dir, ARTIFACT_FORMAT="pickle")
+    assert isinstance(ModelService(model_dir, settings=settings).model1, CompactForest)
+
+    # The forest is retrained after the export
+    pkl_stat = os.stat(os.path.join(model_dir, "random_forest_model.pkl"))
+    npz_path = os.path.join(model_dir, "random_forest_model.npz")
+    os.utime(npz_path, ns=(pkl_stat.st_atime_ns, pkl_stat.st_mtime_ns - 10**9))
+
+    assert isinstance(ModelService(model_dir, settings=settings).model1, RandomForestClassifier)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.data_preprocessing import Preprocessor
+from app.utils.feature_encoder import CompiledEncoder
+from benchmarks.fixtures import training_frame
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    data, _ = training_frame(1000, seed=0)
+    preprocessor = Preprocessor().fit(data)
+    encoder = CompiledEncoder.from_preprocessor(preprocessor, data.columns)
+    return preprocessor, encoder
+
+
+def assert_same_encoding(preprocessor, encoder, frame):
+    expected = preprocessor.transform(frame)
+    columns = {column: frame[column].tolist() for column in reversed(frame.columns)}
+    np.testing.assert_array_equal(encoder.encode_columns(columns), expected)
+    np.testing.assert_array_equal(encoder.encode_records(frame.to_dict("records")), expected)
+
+
+def test_known_rows_match_transform(fitted):
+    preprocessor, encoder = fitted
+    data, _ = training_frame(300, seed=1)
+
+    assert_same_encoding(preprocessor, encoder, data)
+    # Input column order does not matter to either path
+    assert_same_encoding(preprocessor, encoder, data[data.columns[::-1]])
+
+
+def test_unknown_categories_encode_as_all_zero_blocks(fitted):
+    preprocessor, encoder = fitted
+    data, _ = training_frame(50, seed=2)
+    for i, feature in enumerate(encoder.categorical_features):
+        data.loc[i::len(encoder.categorical_features), feature] = "__unseen__"
+
+    assert_same_encoding(preprocessor, encoder, data)
+
+
+def test_missing_values_match_transform(fitted):
+    preprocessor, encoder = fitted
+    data, _ = training_frame(50, seed=3)
+    data = data.astype({feature: object for feature in encoder.categorical_features})
+    data.loc[::3, encoder.categorical_features[0]] = None
+    data.loc[1::3, encoder.categorical_features[-1]] = np.nan
+    data.loc[::4, encoder.numerical_features[0]] = np.nan
+    data.loc[2::5, encoder.numerical_features[-1]] = np.nan
+
+    expected = preprocessor.transform(data)
+    assert np.isnan(expected).any()
+    assert_same_encoding(preprocessor, encoder, data)
+
+
+def test_matches_detects_a_different_preprocessor(fitted):
+    preprocessor, encoder = fitted
+    other = Preprocessor().fit(training_frame(1000, seed=4)[0])
+
+    assert encoder.matches(preprocessor)
+    assert not encoder.matches(other)
@@ -0,0 +1,96 @@
+import os
+import shutil
+
+import pytest
+
+from app.core.config import Settings
+from app.core.threads import prefork_load
+from app.services.model_registry import ModelRegistry
+from benchmarks.fixtures import build_fixture_models, synthetic_applications
+
+
+@pytest.fixture(scope="module")
+def fixture_version(tmp_path_factory):
+    """One complete artifact set, copied into each test's registry root"""
+    return build_fixture_models(str(tmp_path_factory.mktemp("fixture")), n_rows=1000, n_estimators=10)
+
+
+def make_root(tmp_path, fixture_version, *versions):
+    for version in versions:
+        shutil.copytree(fixture_version, tmp_path / "versions" / version)
+    return str(tmp_path)
+
+
+def point_at(root, version):
+    with open(os.path.join(root, "CURRENT"), "w") as f:
+        f.write(version + "\n")
+
+
+def registry_for(root, **overrides):
+    settings = Settings(MODEL_DIR=root, ARTIFACT_FORMAT="pickle", WARMUP_ROWS=2, WORKERS=1, **overrides)
+    return ModelRegistry(settings)
+
+
+def test_broken_pointer_is_not_retried(tmp_path, fixture_version):
+    root = make_root(tmp_path, fixture_version, "good")
+    # Incomplete version: only the preprocessor was published
+    os.makedirs(tmp_path / "versions" / "broken")
+    shutil.copy(os.path.join(fixture_version, "preprocessor.pkl"), tmp_path / "versions" / "broken")
+    point_at(root, "good")
+    registry = registry_for(root)
+    registry.load()
+    good = registry.current
+
+    point_at(root, "broken")
+    assert registry.needs_reload()
+    with pytest.raises(Exception):
+        registry.load()
+
+    assert registry.current is good
+    assert registry.last_reload["ok"] is False
+    # The watcher must not rebuild the broken version on every interval
+    assert not registry.needs_reload()
+
+    # A new pointer is followed again
+    shutil.rmtree(tmp_path / "versions" / "broken")
+    shutil.copytree(fixture_version, tmp_path / "versions" / "fixed")
+    point_at(root, "fixed")
+    assert registry.needs_reload()
+    registry.load()
+    assert registry.current_name == "fixed"
+
+
+def test_swapped_out_service_is_closed(tmp_path, fixture_version):
+    root = make_root(tmp_path, fixture_version, "v1", "v2")
+    point_at(root, "v1")
+    registry = registry_for(root, PARALLEL_ENSEMBLE=True)
+    registry.load()
+    old = registry.current
+    assert old._ensemble_pool is not None
+
+    registry.load("v2")
+
+    assert registry.current is not old
+    assert registry.current._ensemble_pool is not None
+    assert old._ensemble_pool is None
+    # Requests still holding the old service finish on it (serially)
+    applications = synthetic_applications(5, seed=1)
+    assert len(old.predict_batch(applications)) == 5
+
+
+def test_only_the_prefork_load_is_single_threaded(tmp_path, fixture_version):
+    root = make_root(tmp_path, fixture_version, "v1")
+    point_at(root, "v1")
+    settings = Settings(MODEL_DIR=root, ARTIFACT_FORMAT="pickle", WARMUP_ROWS=2, WORKERS=4, WORKER_THREADS=3)
+
+    # WORKERS > 1 under a plain uvicorn/gunicorn launch: workers keep their thread budget
+    registry = ModelRegistry(settings)
+    registry.load()
+    assert registry.current.model2.get_params()["n_jobs"] == 3
+
+    with prefork_load():
+        registry = ModelRegistry(settings)
+        registry.load()
+    assert registry.current.model2.get_params()["n_jobs"] == 1
+    registry.reset_after_fork()
+    assert registry.current.model2.get_params()["n_jobs"] == 3
@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.core.config import Settings
+from app.services import onnx_engine
+from app.services.model_service import ModelService
+from app.utils.export_onnx import export_onnx
+from benchmarks.fixtures import build_fixture_models, synthetic_applications
+
+
+def test_onnx_engine_matches_native_engine(tmp_path):
+    model_dir = build_fixture_models(str(tmp_path), n_rows=1500, n_estimators=20)
+    difference = export_onnx(model_dir)
+    assert difference <= 1e-5
+
+    native = ModelService(model_dir, settings=Settings(MODEL_DIR=model_dir, ARTIFACT_FORMAT="pickle"))
+    exported = ModelService(model_dir, settings=Settings(MODEL_DIR=model_dir, MODEL_ENGINE="onnx"))
+    assert isinstance(exported.encoder, onnx_engine.OnnxEncoder)
+
+    applications = synthetic_applications(300, seed=4)
+    expected = native.predict_batch(applications)
+    actual = exported.predict_batch(applications)
+    for field in ("model1_prediction", "model2_prediction", "model3_prediction", "ensemble_prediction"):
+        assert [getattr(p, field) for p in actual] == [getattr(p, field) for p in expected]
+    np.testing.assert_allclose([p.default_probability for p in actual],
+                               [p.default_probability for p in expected], atol=1e-5)
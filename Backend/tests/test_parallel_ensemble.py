@@ -0,0 +1,75 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.core.config import Settings
+from app.services.model_service import ENSEMBLE_MEMBERS, ModelService
+from app.services.synthetic_service import SyntheticService
+from benchmarks.fixtures import build_fixture_models
+
+
+class StubMember:
+    """Votes (or, as the network, a probability) from one column of X, recording the scoring threads"""
+
+    def __init__(self, column, probability=False):
+        self.column, self.probability, self.threads = column, probability, set()
+
+    def predict(self, X, batch_size=None, verbose=0):
+        self.threads.add(threading.current_thread().name)
+        if self.probability:
+            return 1.0 / (1.0 + np.exp(-X[:, [self.column]]))
+        return (X[:, self.column] > 0).astype(int)
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    return build_fixture_models(str(tmp_path_factory.mktemp("models")), n_rows=1500, n_estimators=10)
+
+
+@pytest.fixture(scope="module")
+def columns():
+    columns = SyntheticService().generate_columns(300, seed=0)
+    columns.pop("is_defaulter")
+    return columns
+
+
+def stub_service(model_dir, parallel):
+    service = ModelService(model_dir, settings=Settings(
+        MODEL_DIR=model_dir, ARTIFACT_FORMAT="pickle", PARALLEL_ENSEMBLE=parallel
+    ))
+    offset = service.encoder.numerical_offset
+    service.model1, service.model2, service.model3 = (
+        StubMember(offset + i, probability=member == "neural_network") for i, member in enumerate(ENSEMBLE_MEMBERS)
+    )
+    return service
+
+
+def test_parallel_scoring_matches_serial(model_dir, columns):
+    serial = stub_service(model_dir, parallel=False)
+    parallel = stub_service(model_dir, parallel=True)
+
+    assert parallel.predict_columns(columns) == serial.predict_columns(columns)
+    for member in (parallel.model1, parallel.model2, parallel.model3):
+        assert all(name.startswith("ensemble") for name in member.threads)
+    for member in (serial.model1, serial.model2, serial.model3):
+        assert member.threads == {threading.current_thread().name}
+
+
+def test_closed_service_scores_serially(model_dir, columns):
+    expected = stub_service(model_dir, parallel=False).predict_columns(columns)
+    service = stub_service(model_dir, parallel=True)
+
+    service.close()
+
+    assert service.predict_columns(columns) == expected
+
+
+def test_shut_down_pool_falls_back_to_serial(model_dir, columns):
+    expected = stub_service(model_dir, parallel=False).predict_columns(columns)
+    service = stub_service(model_dir, parallel=True)
+    # A reload shut the pool down while this request still held the service
+    service._ensemble_pool.shutdown(wait=True)
+
+    assert service.predict_columns(columns) == expected
+    assert service.model1.threads == {threading.current_thread().name}
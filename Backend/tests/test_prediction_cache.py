@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.api.models import ModelPrediction
+from app.services.prediction_cache import PredictionCache
+from app.services.synthetic_service import SyntheticService
+
+
+def application(seed=0):
+    return SyntheticService().generate(count=1, seed=seed)[0]
+
+
+def prediction(probability=0.25):
+    return ModelPrediction(model1_prediction=0, model2_prediction=0, model3_prediction=0,
+                           ensemble_prediction=0, default_probability=probability)
+
+
+def test_cancelled_owner_does_not_cancel_coalesced_waiters():
+    async def scenario():
+        cache = PredictionCache()
+        release = asyncio.Event()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await release.wait()
+            return prediction()
+
+        owner = asyncio.ensure_future(cache.get_or_compute(application(), "v1", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute(application(), "v1", compute))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert (await waiter).default_probability == 0.25
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        # Computed once, and the result was cached for later callers
+        assert calls == [1]
+        assert cache.coalesced == 1
+        assert (await cache.get_or_compute(application(), "v1", compute)).default_probability == 0.25
+        assert cache.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        cache = PredictionCache()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            raise RuntimeError("scoring failed")
+
+        callers = [asyncio.ensure_future(cache.get_or_compute(application(), "v1", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.stats()["size"] == 0
+        assert not cache._in_flight
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.data_preprocessing import Preprocessor
+from benchmarks.fixtures import training_frame
+
+
+def test_categorical_encoders_is_a_deprecated_alias():
+    data, _ = training_frame(300, seed=0)
+    fitted = Preprocessor().fit(data)
+    encoders = {feature: pd.get_dummies(pd.Categorical(data[feature])) for feature in fitted.categories}
+
+    with pytest.warns(DeprecationWarning):
+        legacy = Preprocessor(fitted.scaler, categorical_encoders=encoders)
+
+    assert legacy.categories == fitted.categories
+    np.testing.assert_array_equal(legacy.transform(data), fitted.transform(data))
+
+
+def test_version_1_state_is_migrated():
+    data, _ = training_frame(300, seed=0)
+    fitted = Preprocessor().fit(data)
+    state = {key: value for key, value in fitted.__getstate__().items() if key not in ("categories", "state_version")}
+    state["categorical_encoders"] = {feature: pd.get_dummies(pd.Categorical(data[feature]))
+                                     for feature in fitted.categories}
+
+    legacy = Preprocessor.__new__(Preprocessor)
+    legacy.__setstate__(state)
+
+    assert legacy.categories == fitted.categories
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(legacy)).transform(data), fitted.transform(data))
@@ -0,0 +1,29 @@
+import importlib
+import os
+import sys
+
+# The serving backend owns the formats only it reads (ONNX export, compact
+# forest arrays, artifact bundle); BuildModel imports it through here, on demand
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Backend")
+
+
+def import_backend(name):
+    """
+    Import a module of the backend's app package (Backend/app).
+    
+    Parameters:
+    name: Dotted module name, e.g. "app.services.onnx_engine"
+    
+    Returns:
+    module: The imported module
+    
+    Raises ImportError when name resolves outside Backend/, e.g. because an
+    unrelated top-level app package was imported first.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    module = importlib.import_module(name)
+    location = os.path.abspath(getattr(module, "__file__", None) or "")
+    if not location.startswith(BACKEND_DIR + os.sep):
+        raise ImportError(f"{name} was imported from {location or 'an unknown location'}, not from {BACKEND_DIR}")
+    return module
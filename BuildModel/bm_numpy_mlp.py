@@ -0,0 +1,134 @@
+# Training-side copy of Backend/app/services/numpy_mlp.py: BuildModel writes the
+# .npz weight format the backend serves from (NN_ENGINE="numpy") without
+# importing the backend. Keep the two in step; the format is pinned by
+# WEIGHTS_FORMAT_VERSION and tests/test_nn_export.py loads the files with the
+# backend's reader.
+import numpy as np
+from typing import Dict, List, Optional
+
+# Version of the exported weight file layout
+WEIGHTS_FORMAT_VERSION = 1
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _sigmoid(x):
+    # Split by sign so exp never overflows
+    out = np.empty_like(x)
+    positive = x >= 0
+    out[positive] = 1.0 / (1.0 + np.exp(-x[positive]))
+    exp_x = np.exp(x[~positive])
+    out[~positive] = exp_x / (1.0 + exp_x)
+    return out
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "linear": _linear
+}
+
+
+class NumpyMLP:
+    def __init__(self, kernels: List[np.ndarray], biases: List[np.ndarray], activations: List[str]):
+        """
+        Forward pass of a Dense-only Keras network in plain NumPy.
+
+        Parameters:
+        kernels: Dense layer kernels, shape (n_in, n_out), in layer order
+        biases: Dense layer biases, shape (n_out,)
+        activations: Activation name per Dense layer (see ACTIVATIONS)
+        """
+        if not (len(kernels) == len(biases) == len(activations)):
+            raise ValueError("kernels, biases and activations must have the same length")
+        unknown = [name for name in activations if name not in ACTIVATIONS]
+        if unknown:
+            raise ValueError(f"Unsupported activations: {unknown}")
+
+        self.kernels = [np.asarray(k, dtype=np.float32) for k in kernels]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self._activation_fns = [ACTIVATIONS[name] for name in self.activations]
+
+    @property
+    def n_features(self) -> int:
+        return self.kernels[0].shape[0]
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyMLP":
+        """Extract Dense weights from a Keras model (Dropout layers are inference no-ops)"""
+        kernels, biases, activations = [], [], []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "Dropout":
+                continue
+            if kind != "Dense":
+                raise ValueError(f"Unsupported layer type for NumPy inference: {kind}")
+            kernel, bias = layer.get_weights()
+            activation = layer.get_config()["activation"]
+            if not isinstance(activation, str):
+                activation = activation.get("config", {}).get("name", str(activation))
+            kernels.append(kernel)
+            biases.append(bias)
+            activations.append(activation)
+        return cls(kernels, biases, activations)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Plain-array representation of the network"""
+        arrays = {
+            "format_version": np.array(WEIGHTS_FORMAT_VERSION),
+            "activations": np.array(self.activations)
+        }
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f"kernel_{i}"] = kernel
+            arrays[f"bias_{i}"] = bias
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "NumpyMLP":
+        """Rebuild the network from to_arrays() output"""
+        version = int(arrays["format_version"])
+        if version != WEIGHTS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported NN weights format version {version}")
+        activations = [str(name) for name in arrays["activations"]]
+        kernels = [arrays[f"kernel_{i}"] for i in range(len(activations))]
+        biases = [arrays[f"bias_{i}"] for i in range(len(activations))]
+        return cls(kernels, biases, activations)
+
+    def save(self, filename: str):
+        """Save the weights to an .npz file"""
+        np.savez(filename, **self.to_arrays())
+
+    @classmethod
+    def load(cls, filename: str) -> "NumpyMLP":
+        """Load weights saved with save()"""
+        with np.load(filename, allow_pickle=False) as arrays:
+            return cls.from_arrays(arrays)
+
+    def predict(self, X, batch_size: Optional[int] = None, verbose=0) -> np.ndarray:
+        """
+        Output probabilities, shape (n_rows, 1), like keras Model.predict.
+
+        batch_size and verbose are accepted for call compatibility with Keras.
+        """
+        out = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self._activation_fns):
+            out = out @ kernel
+            out += bias
+            out = activation(out)
+        return out
+
+
+def max_abs_difference(keras_model, mlp: NumpyMLP, n_rows: int = 512, seed: int = 0) -> float:
+    """Largest absolute difference between Keras and NumPy outputs on random standardized inputs"""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_rows, mlp.n_features)).astype(np.float32)
+    expected = np.asarray(keras_model.predict(X, verbose=0), dtype=np.float32)
+    return float(np.max(np.abs(expected - mlp.predict(X))))
@@ -2,18 +2,29 @@ import pandas as pd
 from sklearn.preprocessing import StandardScaler
 from imblearn.over_sampling import SMOTE
 import pickle
+import warnings
+
+# Version of the pickled state: 1 kept each feature's full training one-hot
+# frame in categorical_encoders, 2 keeps only the ordered categories
+STATE_VERSION = 2
 
 class Preprocessor:
-    def __init__(self, fitted_scaler=None, categorical_encoders=None):
+    def __init__(self, fitted_scaler=None, categories=None, categorical_encoders=None):
         """
         Initialize the preprocessor.
         
         Parameters:
         fitted_scaler: A fitted StandardScaler object (optional)
-        categorical_encoders: Dictionary with fitted one-hot encoders for each category (optional)
+        categories: Dictionary with the ordered one-hot categories of each feature (optional)
+        categorical_encoders: Deprecated, dictionary with each feature's one-hot frame (optional)
         """
+        if categorical_encoders:
+            warnings.warn("categorical_encoders is deprecated, pass categories instead",
+                          DeprecationWarning, stacklevel=2)
+            if not categories:
+                categories = {feature: encoded.columns.tolist() for feature, encoded in categorical_encoders.items()}
         self.scaler = fitted_scaler if fitted_scaler else StandardScaler()
-        self.categorical_encoders = categorical_encoders if categorical_encoders else {}
+        self.categories = categories if categories else {}
         self.numerical_features = ['income', 'age', 'experience', 'current_job_years', 'current_house_years']
         self.categorical_features = ['house_ownership', 'profession', 'state', 'car_ownership', 'marital_status']
     
@@ -27,13 +38,10 @@ class Preprocessor:
         Returns:
         self: Fitted preprocessor
         """
-        # Fit one-hot encoders for each categorical feature
+        # Record the one-hot columns of each categorical feature, in pd.get_dummies order
         for feature in self.categorical_features:
             if feature in data.columns:
-                self.categorical_encoders[feature] = pd.get_dummies(data[feature])
-        
-        # Extract numerical features
-        numerical_data = data[self.numerical_features]
+                self.categories[feature] = pd.Categorical(data[feature]).categories.tolist()
         
         # Combine all features for scaling
         encoded_data = self._encode_categories(data)
@@ -61,9 +69,9 @@ class Preprocessor:
                 encoded = pd.get_dummies(data[feature])
                 
                 # Make sure all categories from training are present
-                if feature in self.categorical_encoders:
+                if feature in self.categories:
                     # Get all columns from training data
-                    expected_columns = self.categorical_encoders[feature].columns
+                    expected_columns = self.categories[feature]
                     
                     # Add missing columns with zeros
                     for col in expected_columns:
@@ -128,6 +136,29 @@ class Preprocessor:
             return self.transform(data, apply_smote=True, labels=labels)
         
         return self.transform(data)
+    
+    def __getstate__(self):
+        """Pickled state: the category vocabularies, the scaler and the feature lists"""
+        state = self.__dict__.copy()
+        state["state_version"] = STATE_VERSION
+        return state
+    
+    def __setstate__(self, state):
+        """
+        Restore a pickled preprocessor, migrating older state versions.
+        
+        Parameters:
+        state: Pickled attribute dictionary
+        """
+        state = dict(state)
+        version = state.pop("state_version", 1)
+        if version > STATE_VERSION:
+            raise ValueError(f"Preprocessor state version {version} is newer than supported ({STATE_VERSION})")
+        if version == 1:
+            # Only the column index of the stored one-hot frames was ever used
+            encoders = state.pop("categorical_encoders", {})
+            state["categories"] = {feature: encoded.columns.tolist() for feature, encoded in encoders.items()}
+        self.__dict__.update(state)
 
 def preprocess_for_prediction(data, preprocessor_path):
     """
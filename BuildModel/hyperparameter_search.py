@@ -0,0 +1,228 @@
+"""
+Budgeted hyperparameter search for the tree ensembles.
+
+Successive halving (HalvingRandomSearchCV) samples many candidate settings,
+scores them with StratifiedKFold on a small slice of the cached (not yet
+oversampled) training matrices, and gives only the best third more rows in each round; weak
+candidates stop early instead of being trained on the full data. Candidates
+are scored by a serving-aware objective: cross-validated AUC minus a penalty
+for single-row predict latency and for pickled artifact size, so a cheaper
+model wins when it gives up no meaningful accuracy. SMOTE runs inside each
+fold (an imblearn Pipeline), so synthetic neighbours of validation rows never
+reach the training folds.
+
+    python hyperparameter_search.py --data processed_training_data.csv --output tuned_params.json
+    python train_ensemble.py --data processed_training_data.csv --params tuned_params.json
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingRandomSearchCV)
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold
+from xgboost import XGBClassifier
+
+BUILD_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Candidate values per model (sampled at random, without replacement)
+SEARCH_SPACES = {
+    "random_forest": {
+        "n_estimators": [50, 100, 200, 400, 800],
+        "max_depth": [8, 12, 16, 24, 50, None],
+        "min_samples_leaf": [1, 2, 5, 10],
+        "max_features": ["sqrt", 0.3, 0.5]
+    },
+    "xgboost": {
+        "n_estimators": [50, 100, 200, 400, 800],
+        "max_depth": [3, 4, 6, 8, 12, 50],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+        "min_child_weight": [1, 5]
+    }
+}
+
+# Objective penalties: AUC given up per millisecond of single-row latency and per MB of artifact
+LATENCY_WEIGHT = 0.002
+SIZE_WEIGHT = 0.0005
+# Finalists re-measured serially on the held-out test matrix after the search
+N_FINALISTS = 5
+# Step name of the model in the search pipeline (its parameters are prefixed with it)
+MODEL_STEP = "model"
+
+
+def base_estimator(model):
+    """Untuned estimator with the fixed settings of the training pipeline (one thread per fit)"""
+    if model == "random_forest":
+        return RandomForestClassifier(criterion="gini", random_state=42, n_jobs=1)
+    return XGBClassifier(eval_metric="auc", random_state=42, n_jobs=1, verbosity=0)
+
+
+def search_pipeline(model):
+    """SMOTE followed by the estimator: oversamples the training folds only, as training oversamples its split"""
+    return Pipeline([("smote", SMOTE(random_state=2)), (MODEL_STEP, base_estimator(model))])
+
+
+def served_model(estimator):
+    """The model the backend would load (the last step of a search pipeline)"""
+    return estimator.steps[-1][1] if isinstance(estimator, Pipeline) else estimator
+
+
+def measure_latency_ms(estimator, X, repeats=7):
+    """Best-of-repeats time of predict_proba on one row, in milliseconds"""
+    row = np.ascontiguousarray(X[:1])
+    estimator.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        estimator.predict_proba(row)
+        timings.append(time.perf_counter() - started)
+    # The minimum is the least disturbed by other search workers on the machine
+    return min(timings) * 1000.0
+
+
+def artifact_size_mb(estimator):
+    """Size of the pickled estimator, as the backend would load it"""
+    return len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6
+
+
+class ServingObjective:
+    def __init__(self, latency_weight=LATENCY_WEIGHT, size_weight=SIZE_WEIGHT):
+        """
+        Scorer for the search: AUC minus serving-cost penalties (higher is better).
+
+        Parameters:
+        latency_weight: AUC given up per millisecond of single-row predict latency
+        size_weight: AUC given up per MB of pickled artifact
+        """
+        self.latency_weight = latency_weight
+        self.size_weight = size_weight
+
+    def components(self, estimator, X, y):
+        """AUC, latency (ms) and size (MB) of a fitted estimator on (X, y)"""
+        auc = roc_auc_score(y, estimator.predict_proba(X)[:, 1])
+        model = served_model(estimator)
+        return auc, measure_latency_ms(model, X), artifact_size_mb(model)
+
+    def score(self, auc, latency_ms, size_mb):
+        return auc - self.latency_weight * latency_ms - self.size_weight * size_mb
+
+    def __call__(self, estimator, X, y):
+        return self.score(*self.components(estimator, X, y))
+
+
+def search_model(model, trainData, trainLabels, testData, testLabels, objective, n_candidates=48,
+                 factor=3, n_folds=3, n_jobs=-1, seed=42):
+    """
+    Successive-halving search for one model, then a serial re-measure of the finalists.
+
+    Parameters:
+    model: "random_forest" or "xgboost"
+    trainData, trainLabels: Cached training matrices, not oversampled (SMOTE runs per fold)
+    testData, testLabels: Cached test matrices used to re-measure the finalists
+    objective: ServingObjective used both as the CV scorer and for the finalists
+    n_candidates: Settings sampled for the first round
+    factor: Fraction of candidates kept per round is 1/factor, and their rows grow by factor
+    n_folds: StratifiedKFold splits
+    n_jobs: Parallel fits (-1: all cores)
+    seed: Sampling and fold seed
+
+    Returns:
+    result: Best params with their test AUC, latency, size and objective, plus every finalist
+    """
+    started = time.perf_counter()
+    search = HalvingRandomSearchCV(
+        search_pipeline(model),
+        {f"{MODEL_STEP}__{name}": values for name, values in SEARCH_SPACES[model].items()},
+        n_candidates=n_candidates,
+        factor=factor,
+        resource="n_samples",
+        cv=StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed),
+        scoring=objective,
+        refit=False,
+        random_state=seed,
+        n_jobs=n_jobs,
+        error_score=-np.inf
+    )
+    search.fit(trainData, trainLabels)
+    print(f"{model}: {search.n_iterations_} halving rounds over {len(search.cv_results_['params'])} fits "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Finalists: the best-scoring settings of the last round, refitted on all
+    # (oversampled) training rows and measured one at a time (CV latencies share the CPU)
+    results = search.cv_results_
+    last_round = np.flatnonzero(results["iter"] == results["iter"].max())
+    ranked = last_round[np.argsort(-results["mean_test_score"][last_round])][:N_FINALISTS]
+    finalists = []
+    for index in ranked:
+        params = {name.split("__", 1)[1]: value for name, value in results["params"][index].items()}
+        estimator = search_pipeline(model).set_params(**{f"{MODEL_STEP}__{n}": v for n, v in params.items()})
+        estimator.fit(trainData, trainLabels)
+        auc, latency_ms, size_mb = objective.components(estimator, testData, testLabels)
+        finalists.append({
+            "params": params,
+            "cv_objective": float(results["mean_test_score"][index]),
+            "test_auc": float(auc),
+            "latency_ms": float(latency_ms),
+            "size_mb": float(size_mb),
+            "objective": float(objective.score(auc, latency_ms, size_mb))
+        })
+    finalists.sort(key=lambda finalist: -finalist["objective"])
+    best = dict(finalists[0])
+    best["finalists"] = finalists
+    print(f"{model}: best {best['params']} (test AUC {best['test_auc']:.5f}, "
+          f"{best['latency_ms']:.2f} ms/row, {best['size_mb']:.1f} MB)")
+    return best
+
+
+def run_search(csv_path, models=tuple(SEARCH_SPACES), cache_dir="prepared", **search_args):
+    """Load the cached training matrices and search every requested model"""
+    sys.path.insert(0, BUILD_DIR)
+    import trainingPipeline
+
+    data_train, data_test, y_train, y_test = trainingPipeline.load_training_split(csv_path)
+    # Oversampling happens inside the search, per training fold
+    prepared = trainingPipeline.prepare_training_data(
+        data_train, y_train, data_test, y_test, cache_dir=cache_dir, apply_smote=False, preprocessor_path=None
+    )
+    objective = ServingObjective(search_args.pop("latency_weight", LATENCY_WEIGHT),
+                                 search_args.pop("size_weight", SIZE_WEIGHT))
+    return {
+        model: search_model(model, prepared["trainData"], prepared["trainLabels"],
+                            prepared["testData"], prepared["testLabels"], objective, **search_args)
+        for model in models
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving search for the tree ensembles")
+    parser.add_argument("--data", default="processed_training_data.csv", help="Processed training CSV")
+    parser.add_argument("--models", nargs="+", choices=list(SEARCH_SPACES), default=list(SEARCH_SPACES))
+    parser.add_argument("--output", default="tuned_params.json")
+    parser.add_argument("--cache-dir", default="prepared", help="Prepared-data cache directory")
+    parser.add_argument("--candidates", type=int, default=48)
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--folds", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits (-1: all cores)")
+    parser.add_argument("--latency-weight", type=float, default=LATENCY_WEIGHT,
+                        help="AUC given up per millisecond of single-row latency")
+    parser.add_argument("--size-weight", type=float, default=SIZE_WEIGHT,
+                        help="AUC given up per MB of artifact")
+    args = parser.parse_args()
+
+    results = run_search(
+        args.data, args.models, args.cache_dir,
+        n_candidates=args.candidates, factor=args.factor, n_folds=args.folds, n_jobs=args.jobs,
+        latency_weight=args.latency_weight, size_weight=args.size_weight
+    )
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Tuned parameters written to {args.output}")
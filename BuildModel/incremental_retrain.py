@@ -0,0 +1,321 @@
+"""
+Incremental retraining of a published model version from a new labelled batch.
+
+Instead of retraining on the full history, each model is updated from the
+base version: XGBoost keeps boosting the existing booster (xgb_model=), the
+RandomForest grows extra trees on the new rows (warm_start) and the Keras
+network is fine-tuned for a few epochs at a lower learning rate. Every
+candidate is scored against a holdout next to the model it would replace;
+only candidates that do not lose more than --tolerance AUC are promoted,
+the others are carried over unchanged. The result is published as a new
+version beside the base, in the layout train_ensemble.py writes.
+
+    python incremental_retrain.py --data new_outcomes.csv --activate
+"""
+import argparse
+import copy
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+BUILD_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODELS_ROOT = os.path.join(os.path.dirname(BUILD_DIR), "Backend", "ml_models")
+
+MODEL_FILES = {
+    "random_forest": "random_forest_model.pkl",
+    "xgboost": "xgb_model.pkl",
+    "neural_network": "neural_network_model.h5"
+}
+# Update sizes: boosting rounds and trees added, fine-tuning epochs and learning rate
+XGB_ROUNDS = 50
+RF_TREES = 100
+NN_EPOCHS = 3
+NN_LEARNING_RATE = 1e-4
+# Largest holdout AUC a candidate may give up against the model it replaces
+AUC_TOLERANCE = 0.002
+# Serving artifacts derived from the models and the preprocessor: never copied
+# from the base, rebuilt from the new version's files when the base had them
+DERIVED_ARTIFACTS = ("bundle", "onnx", "random_forest_model.npz")
+
+
+def resolve_base(models_root, version=None):
+    """
+    Directory of the version to start from.
+
+    Parameters:
+    models_root: Backend MODEL_DIR
+    version: Version name (default: the one named by models_root/CURRENT)
+
+    Returns:
+    version, version_dir: The base version name and its directory
+    """
+    if version is None:
+        current = os.path.join(models_root, "CURRENT")
+        if not os.path.exists(current):
+            raise ValueError(f"No CURRENT file in {models_root}; pass the base version explicitly")
+        with open(current) as f:
+            version = f.read().strip()
+    version_dir = os.path.join(models_root, "versions", version)
+    if not os.path.isdir(version_dir):
+        raise ValueError(f"Model version '{version}' not found in {os.path.dirname(version_dir)}")
+    return version, version_dir
+
+
+def update_preprocessor(preprocessor, data):
+    """
+    Copy of the preprocessor with its scaler statistics updated from new rows.
+
+    The one-hot vocabulary stays fixed (the models' input width cannot change);
+    categories unseen at fit time still encode as zeros.
+
+    Parameters:
+    preprocessor: Fitted Preprocessor of the base version
+    data: New feature rows
+
+    Returns:
+    updated: Preprocessor whose scaler has also seen data
+    """
+    updated = copy.deepcopy(preprocessor)
+    updated.scaler.partial_fit(updated._encode_categories(data))
+    return updated
+
+
+def holdout_auc(model, X, y):
+    """AUC of a fitted model (sklearn, XGBoost or Keras) on the holdout"""
+    if hasattr(model, "predict_proba"):
+        scores = model.predict_proba(X)[:, 1]
+    else:
+        scores = model.predict(X, verbose=0).ravel()
+    return roc_auc_score(y, scores)
+
+
+def continue_xgboost(base, X, y, rounds=XGB_ROUNDS, n_jobs=-1):
+    """Boost `rounds` more trees on top of the base booster, fitted to the new rows"""
+    from xgboost import XGBClassifier
+
+    params = base.get_params()
+    params.update(n_estimators=rounds, n_jobs=n_jobs)
+    candidate = XGBClassifier(**params)
+    candidate.fit(X, y, xgb_model=base.get_booster())
+    # n_estimators describes the whole booster again (the ONNX converter derives the class count from it)
+    candidate.set_params(n_estimators=candidate.get_booster().num_boosted_rounds())
+    return candidate
+
+
+def extend_forest(base, X, y, trees=RF_TREES, n_jobs=-1):
+    """Copy of the base forest with `trees` extra trees grown on the new rows (warm_start)"""
+    candidate = copy.deepcopy(base)
+    candidate.set_params(warm_start=True, n_estimators=base.n_estimators + trees, n_jobs=n_jobs)
+    candidate.fit(X, y)
+    # Saved like a freshly trained forest, so a later plain fit() starts over
+    candidate.set_params(warm_start=False)
+    return candidate
+
+
+def fine_tune_network(base_path, X, y, epochs=NN_EPOCHS, learning_rate=NN_LEARNING_RATE):
+    """Load the base network and train it a few epochs on the new rows at a lower learning rate"""
+    from tensorflow.keras.models import load_model
+    from tensorflow.keras.optimizers import Adam
+
+    candidate = load_model(base_path)
+    candidate.compile(optimizer=Adam(learning_rate=learning_rate), loss="binary_crossentropy", metrics=["AUC"])
+    candidate.fit(X, y, epochs=epochs, batch_size=32, verbose=2)
+    return candidate
+
+
+def retrain_incremental(csv_path, models_root=DEFAULT_MODELS_ROOT, base_version=None, version=None,
+                        holdout_path=None, holdout_size=0.2, models=tuple(MODEL_FILES), update_scaler=False,
+                        apply_smote=True, tolerance=AUC_TOLERANCE, n_jobs=-1, activate=False, onnx=False):
+    """
+    Update the base version's models from a new batch and publish the promoted ones as a new version.
+
+    Parameters:
+    csv_path: New labelled rows (processed training CSV layout, with risk_flag)
+    models_root: Backend MODEL_DIR
+    base_version: Version to update (default: CURRENT)
+    version: New version name (default: a UTC timestamp)
+    holdout_path: Labelled CSV to gate on; default: a stratified split of the new batch
+    holdout_size: Fraction of the new batch held out when no holdout_path is given
+    models: Models to update; the others are carried over
+    update_scaler: Also update the scaler statistics (shifts every model's inputs, so any rejection aborts)
+    apply_smote: Oversample the new batch with SMOTE, as full training does
+    tolerance: Largest holdout AUC loss a candidate may show against the base model
+    n_jobs: Threads for the tree models
+    activate: Point models_root/CURRENT at the new version
+    onnx: Also export the new version to ONNX (always done when the base version has an export)
+
+    Returns:
+    version_dir: The published version directory, or None when no candidate passed the gate
+    """
+    if update_scaler and set(models) != set(MODEL_FILES):
+        # A carried-over model would be served behind a scaler it was never trained on
+        raise ValueError("Updating the scaler requires updating all three models")
+    sys.path.insert(0, BUILD_DIR)
+    import trainingPipeline
+    from bm_backend import import_backend
+    from train_ensemble import write_current
+
+    started = time.perf_counter()
+    base_version, base_dir = resolve_base(models_root, base_version)
+    version = version or time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    versions_dir = os.path.join(models_root, "versions")
+    version_dir = os.path.join(versions_dir, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version '{version}' already exists in {versions_dir}")
+
+    batch = pd.read_csv(csv_path)
+    if holdout_path:
+        holdout = pd.read_csv(holdout_path)
+    else:
+        batch, holdout = train_test_split(batch, test_size=holdout_size, stratify=batch["risk_flag"],
+                                          random_state=42)
+    data, labels = batch.drop(columns="risk_flag").reset_index(drop=True), batch["risk_flag"].reset_index(drop=True)
+    holdout_data, holdout_labels = holdout.drop(columns="risk_flag"), holdout["risk_flag"].to_numpy()
+    print(f"Updating version {base_version} from {len(data):,} new rows (holdout {len(holdout_data):,} rows)")
+
+    with open(os.path.join(base_dir, "preprocessor.pkl"), "rb") as f:
+        base_preprocessor = pickle.load(f)
+    preprocessor = update_preprocessor(base_preprocessor, data) if update_scaler else base_preprocessor
+    if apply_smote:
+        X, y = preprocessor.transform(data, labels, apply_smote=True)
+    else:
+        X, y = preprocessor.transform(data), labels
+    X, y = np.asarray(X), np.asarray(y)
+    base_holdout = base_preprocessor.transform(holdout_data)
+    candidate_holdout = preprocessor.transform(holdout_data)
+
+    report = {"base_version": base_version, "rows": len(data), "holdout_rows": len(holdout_data),
+              "update_scaler": update_scaler, "models": {}}
+    candidates = {}
+    for model in models:
+        model_started = time.perf_counter()
+        base_path = os.path.join(base_dir, MODEL_FILES[model])
+        if model == "neural_network":
+            from tensorflow.keras.models import load_model
+
+            base = load_model(base_path)
+            candidate = fine_tune_network(base_path, X, y)
+        else:
+            with open(base_path, "rb") as f:
+                base = pickle.load(f)
+            if model == "xgboost":
+                candidate = continue_xgboost(base, X, y, n_jobs=n_jobs)
+            else:
+                candidate = extend_forest(base, X, y, n_jobs=n_jobs)
+
+        base_auc = holdout_auc(base, base_holdout, holdout_labels)
+        candidate_auc = holdout_auc(candidate, candidate_holdout, holdout_labels)
+        promoted = candidate_auc >= base_auc - tolerance
+        report["models"][model] = {"base_auc": float(base_auc), "candidate_auc": float(candidate_auc),
+                                   "promoted": bool(promoted)}
+        print(f"{model}: holdout AUC {base_auc:.5f} -> {candidate_auc:.5f} "
+              f"({'promoted' if promoted else 'rejected'}, {time.perf_counter() - model_started:.1f}s)")
+        if promoted:
+            candidates[model] = candidate
+
+    if not candidates:
+        print("No candidate passed the holdout gate; nothing published")
+        return None
+    if update_scaler and len(candidates) < len(models):
+        print("A model was rejected after the scaler update; nothing published")
+        return None
+
+    # Assembled next to the final directory and renamed at the end, so the
+    # backend never sees a partial version (dot-prefixed names are not versions)
+    staging = tempfile.mkdtemp(prefix=f".{version}-", dir=versions_dir)
+    try:
+        for name in os.listdir(base_dir):
+            # Promoted models and stale derived artifacts are not carried over
+            if name in DERIVED_ARTIFACTS or name in {MODEL_FILES[model] for model in candidates}:
+                continue
+            if name == "neural_network_model.npz" and "neural_network" in candidates:
+                continue
+            source = os.path.join(base_dir, name)
+            (shutil.copytree if os.path.isdir(source) else shutil.copy2)(source, os.path.join(staging, name))
+        with open(os.path.join(staging, "preprocessor.pkl"), "wb") as f:
+            pickle.dump(preprocessor, f)
+        for model, candidate in candidates.items():
+            path = os.path.join(staging, MODEL_FILES[model])
+            if model == "neural_network":
+                candidate.save(path)
+                trainingPipeline.export_nn_weights(candidate, os.path.join(staging, "neural_network_model.npz"))
+            else:
+                with open(path, "wb") as f:
+                    pickle.dump(candidate, f)
+        with open(os.path.join(staging, "retrain.json"), "w") as f:
+            json.dump(report, f, indent=2)
+
+        derived = [name for name in DERIVED_ARTIFACTS if os.path.exists(os.path.join(base_dir, name))]
+        if "random_forest_model.npz" in derived:
+            export_rf_arrays = import_backend("app.utils.export_rf_arrays").export_rf_arrays
+            export_rf_arrays(os.path.join(staging, MODEL_FILES["random_forest"]),
+                             os.path.join(staging, "random_forest_model.npz"))
+        if "bundle" in derived:
+            export_artifact_bundle = import_backend("app.utils.export_artifact_bundle").export_artifact_bundle
+            # Holds every model and the encoder, so it is rebuilt whenever anything changed
+            export_artifact_bundle(staging)
+        if onnx or "onnx" in derived:
+            from tensorflow.keras.models import load_model
+
+            loaded = {}
+            for model in ("random_forest", "xgboost"):
+                with open(os.path.join(staging, MODEL_FILES[model]), "rb") as f:
+                    loaded[model] = pickle.load(f)
+            trainingPipeline.export_onnx(
+                preprocessor, loaded["random_forest"], loaded["xgboost"],
+                load_model(os.path.join(staging, MODEL_FILES["neural_network"])),
+                onnx_dir=os.path.join(staging, "onnx"),
+                feature_names=trainingPipeline.encoded_feature_names(preprocessor)
+            )
+
+        os.chmod(staging, 0o755)
+        os.replace(staging, version_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if activate:
+        write_current(models_root, version)
+    print(f"Model version {version} written to {version_dir} in {time.perf_counter() - started:.1f}s"
+          + (" and activated" if activate else ""))
+    return version_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally update a model version from a new labelled batch")
+    parser.add_argument("--data", required=True, help="New labelled rows (processed training CSV layout)")
+    parser.add_argument("--models-root", default=DEFAULT_MODELS_ROOT, help="Backend MODEL_DIR")
+    parser.add_argument("--base-version", help="Version to update (default: CURRENT)")
+    parser.add_argument("--version", help="New version name (default: UTC timestamp)")
+    parser.add_argument("--holdout", help="Labelled CSV for the promotion gate (default: split of --data)")
+    parser.add_argument("--holdout-size", type=float, default=0.2)
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_FILES), default=list(MODEL_FILES))
+    parser.add_argument("--update-scaler", action="store_true", help="Also update the scaler statistics")
+    parser.add_argument("--no-smote", action="store_true", help="Do not oversample the new batch")
+    parser.add_argument("--tolerance", type=float, default=AUC_TOLERANCE,
+                        help="Largest holdout AUC loss a candidate may show")
+    parser.add_argument("--jobs", type=int, default=-1, help="Threads for the tree models (-1: all cores)")
+    parser.add_argument("--activate", action="store_true", help="Point CURRENT at the new version")
+    parser.add_argument("--onnx", action="store_true", help="Also export the new version to ONNX")
+    args = parser.parse_args()
+
+    try:
+        version_dir = retrain_incremental(
+            args.data, args.models_root, args.base_version, args.version, args.holdout, args.holdout_size,
+            args.models, args.update_scaler, not args.no_smote, args.tolerance, args.jobs, args.activate,
+            args.onnx
+        )
+    except Exception as e:
+        print(f"Retraining failed: {str(e)}")
+        sys.exit(1)
+    if version_dir is None:
+        sys.exit(1)
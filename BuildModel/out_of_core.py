@@ -0,0 +1,394 @@
+"""
+Out-of-core training path for training CSVs larger than memory.
+
+The CSV is read once in typed chunks. That single pass splits rows into
+train/test, collects the category vocabulary, fits the numerical scaler with
+StandardScaler.partial_fit, and writes a compact columnar cache to disk
+(category codes and raw numerical values per chunk, never the dense one-hot
+matrix). XGBoost then trains from the cache through its external-memory
+DataIter interface, one scaled chunk in memory at a time. SMOTE would need
+the whole dataset in memory, so class imbalance is handled with
+scale_pos_weight instead.
+
+The outputs (preprocessor.pkl, xgb_model.pkl) have the same format as the
+in-memory pipeline. The preprocessor is rebuilt from chunk statistics without
+SMOTE, so the RandomForest and network of an in-memory run cannot share it:
+the artifacts go to a directory of their own, never over an existing set.
+
+    python out_of_core.py --data loan_book.csv --out ooc_model/
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+BUILD_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BUILD_DIR)
+
+from bm_preprocessing import Preprocessor
+
+# Bump when the cache layout or the preparation steps change
+CACHE_VERSION = 1
+LABEL_COLUMN = "risk_flag"
+DEFAULT_CHUNKSIZE = 500_000
+CHUNK_ARRAYS = ("codes", "numerical", "labels", "is_test")
+
+# Defaults for the out-of-core XGBoost model (shallower than the in-memory
+# max_depth=50: hist trees on millions of rows need far less depth)
+XGB_PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "auc",
+    "tree_method": "hist",
+    "max_depth": 8,
+    "eta": 0.1,
+    "max_bin": 256
+}
+XGB_ROUNDS = 400
+
+
+def _feature_lists():
+    """Categorical and numerical feature names, as the Preprocessor defines them"""
+    preprocessor = Preprocessor()
+    return list(preprocessor.categorical_features), list(preprocessor.numerical_features)
+
+
+def cache_key(csv_path, chunksize, test_size, seed):
+    """Hash of the CSV file (path, size, modification time) and the preparation config"""
+    stat = os.stat(csv_path)
+    categorical, numerical = _feature_lists()
+    config = {
+        "version": CACHE_VERSION,
+        "csv": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "chunksize": chunksize,
+        "test_size": test_size,
+        "seed": seed,
+        "categorical": categorical,
+        "numerical": numerical
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def build_cache(csv_path, cache_dir="prepared_ooc", chunksize=DEFAULT_CHUNKSIZE, test_size=0.3, seed=42):
+    """
+    Read the CSV once in chunks and write the columnar cache.
+
+    Per chunk, each row gets a seeded train/test flag, categorical values are
+    stored as int32 codes into a vocabulary that grows as new values appear,
+    and the numerical columns are stored as float64. Only training rows feed
+    the vocabulary counts and the scaler, as in Preprocessor.fit.
+
+    Parameters:
+    csv_path: Training CSV with the feature columns and the risk_flag label
+    cache_dir: Directory holding one subdirectory per cache key
+    chunksize: Rows per chunk (bounds peak memory)
+    test_size: Fraction of rows held out for evaluation
+    seed: Seed of the train/test assignment
+
+    Returns:
+    entry: The cache entry directory (reused when it already exists)
+    """
+    key = cache_key(csv_path, chunksize, test_size, seed)
+    entry = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(entry, "meta.json")):
+        print(f"Reusing out-of-core cache {entry}")
+        return entry
+
+    categorical, numerical = _feature_lists()
+    header = pd.read_csv(csv_path, nrows=0).columns
+    # Categorical features missing from the CSV are skipped, as Preprocessor.fit does
+    categorical = [f for f in categorical if f in header]
+    # Parsed as category: each chunk arrives as codes plus its few distinct values
+    dtypes = {f: "category" for f in categorical}
+    dtypes.update({f: np.float64 for f in numerical})
+    dtypes[LABEL_COLUMN] = np.int8
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+    try:
+        vocabularies = {f: {} for f in categorical}  # value -> code, in first-seen order
+        counts = {f: np.zeros(0, dtype=np.int64) for f in categorical}  # training rows per code
+        numerical_scaler = StandardScaler()
+        n_chunks, n_train, n_test, n_positive = 0, 0, 0, 0
+        started = time.perf_counter()
+        reader = pd.read_csv(csv_path, usecols=categorical + numerical + [LABEL_COLUMN],
+                             dtype=dtypes, chunksize=chunksize)
+        for index, chunk in enumerate(reader):
+            n_rows = len(chunk)
+            is_test = np.random.default_rng([seed, index]).random(n_rows) < test_size
+            codes = np.empty((n_rows, len(categorical)), dtype=np.int32)
+            for column, feature in enumerate(categorical):
+                vocabulary = vocabularies[feature]
+                values = chunk[feature].cat
+                # Chunk-local category codes -> cache codes. Missing values have local
+                # code -1, which picks the trailing -1 (an all-zero block, as pd.get_dummies gives)
+                local_codes = values.codes.to_numpy()
+                missing = local_codes < 0
+                value_codes = np.array([vocabulary.setdefault(value, len(vocabulary)) for value in values.categories]
+                                       + [-1], dtype=np.int32)
+                codes[:, column] = value_codes[local_codes]
+                counted = codes[~is_test & ~missing, column]
+                train_counts = np.bincount(counted, minlength=len(vocabulary))
+                train_counts[:len(counts[feature])] += counts[feature]
+                counts[feature] = train_counts
+            numerical_values = chunk[numerical].to_numpy(dtype=np.float64)
+            labels = chunk[LABEL_COLUMN].to_numpy(dtype=np.int8)
+            if (~is_test).any():
+                numerical_scaler.partial_fit(numerical_values[~is_test])
+
+            arrays = {"codes": codes, "numerical": numerical_values, "labels": labels, "is_test": is_test}
+            for name in CHUNK_ARRAYS:
+                np.save(os.path.join(staging, f"chunk_{index:05d}.{name}.npy"), arrays[name], allow_pickle=False)
+            n_chunks += 1
+            n_train += int((~is_test).sum())
+            n_test += int(is_test.sum())
+            n_positive += int(labels[~is_test].sum())
+            print(f"Cached chunk {index} ({n_train + n_test:,} rows, {time.perf_counter() - started:.0f}s)")
+
+        meta = {
+            "version": CACHE_VERSION,
+            "categorical_features": categorical,
+            "numerical_features": numerical,
+            "vocabularies": {f: list(vocabularies[f]) for f in categorical},
+            "train_counts": {f: [int(c) for c in counts[f]] for f in categorical},
+            "numerical_mean": numerical_scaler.mean_.tolist(),
+            "numerical_var": numerical_scaler.var_.tolist(),
+            "n_chunks": n_chunks,
+            "n_train": n_train,
+            "n_test": n_test,
+            "n_train_positive": n_positive
+        }
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.replace(staging, entry)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return entry
+
+
+def read_meta(entry):
+    with open(os.path.join(entry, "meta.json")) as f:
+        return json.load(f)
+
+
+def build_preprocessor(meta):
+    """
+    A fitted Preprocessor equivalent to Preprocessor.fit on the training rows.
+
+    Categories are the values seen in training rows, sorted as pd.get_dummies
+    orders them. The scaler statistics of a one-hot column follow from its
+    count (mean p, variance p(1 - p)); the numerical ones come from partial_fit.
+    """
+    preprocessor = Preprocessor()
+    n_train = meta["n_train"]
+    means, variances, names = [], [], []
+    for feature in meta["categorical_features"]:
+        counts = dict(zip(meta["vocabularies"][feature], meta["train_counts"][feature]))
+        categories = sorted(value for value, count in counts.items() if count > 0)
+        preprocessor.categories[feature] = categories
+        frequency = np.array([counts[value] for value in categories], dtype=np.float64) / n_train
+        means.append(frequency)
+        variances.append(frequency * (1.0 - frequency))
+        names.extend(categories)
+    means.append(np.asarray(meta["numerical_mean"]))
+    variances.append(np.asarray(meta["numerical_var"]))
+    names.extend(meta["numerical_features"])
+
+    scaler = preprocessor.scaler
+    scaler.mean_ = np.concatenate(means)
+    scaler.var_ = np.concatenate(variances)
+    # As StandardScaler does: constant columns are left unscaled
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_samples_seen_ = n_train
+    scaler.n_features_in_ = len(names)
+    scaler.feature_names_in_ = np.array(names, dtype=object)
+    return preprocessor
+
+
+class ChunkEncoder:
+    def __init__(self, meta, preprocessor):
+        """
+        Turns cached chunks into scaled model matrices.
+
+        Parameters:
+        meta: Cache metadata (read_meta)
+        preprocessor: Preprocessor from build_preprocessor
+        """
+        self.remaps, self.offsets = [], []
+        offset = 0
+        for feature in meta["categorical_features"]:
+            columns = {value: i for i, value in enumerate(preprocessor.categories[feature])}
+            # Cache code -> one-hot column (-1: not seen in training, all zeros)
+            self.remaps.append(np.array([columns.get(value, -1) for value in meta["vocabularies"][feature]],
+                                        dtype=np.int64))
+            self.offsets.append(offset)
+            offset += len(columns)
+        self.numerical_offset = offset
+        self.n_features = preprocessor.scaler.n_features_in_
+        self.mean = preprocessor.scaler.mean_
+        self.scale = preprocessor.scaler.scale_
+
+    def encode(self, codes, numerical):
+        """Scaled float32 matrix, identical to Preprocessor.transform up to float32 rounding"""
+        out = np.zeros((len(codes), self.n_features), dtype=np.float64)
+        rows = np.arange(len(codes))
+        for column, (remap, offset) in enumerate(zip(self.remaps, self.offsets)):
+            if not len(remap):
+                # No values at all (every row missing): the block stays all zeros
+                continue
+            columns = np.where(codes[:, column] >= 0, remap[codes[:, column]], -1)
+            known = columns >= 0
+            out[rows[known], offset + columns[known]] = 1.0
+        out[:, self.numerical_offset:] = numerical
+        out -= self.mean
+        out /= self.scale
+        return out.astype(np.float32)
+
+
+def iterate_chunks(entry, meta, encoder, test):
+    """Yield (X, y) per cached chunk for the training (test=False) or test rows"""
+    for index in range(meta["n_chunks"]):
+        arrays = {
+            name: np.load(os.path.join(entry, f"chunk_{index:05d}.{name}.npy"), allow_pickle=False)
+            for name in CHUNK_ARRAYS
+        }
+        rows = arrays["is_test"] if test else ~arrays["is_test"]
+        if rows.any():
+            yield encoder.encode(arrays["codes"][rows], arrays["numerical"][rows]), arrays["labels"][rows]
+
+
+def _data_iter_class():
+    import xgboost as xgb
+
+    class CachedChunkIter(xgb.DataIter):
+        """Feeds XGBoost one scaled training chunk at a time from the columnar cache"""
+
+        def __init__(self, entry, meta, encoder, cache_prefix):
+            self.entry, self.meta, self.encoder = entry, meta, encoder
+            self._chunks = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = iterate_chunks(self.entry, self.meta, self.encoder, test=False)
+            batch = next(self._chunks, None)
+            if batch is None:
+                return False
+            X, y = batch
+            input_data(data=X, label=y)
+            return True
+
+        def reset(self):
+            self._chunks = None
+
+    return CachedChunkIter
+
+
+def train_xgboost_out_of_core(csv_path, out_dir="ooc_model", cache_dir="prepared_ooc", chunksize=DEFAULT_CHUNKSIZE,
+                              params=None, num_rounds=XGB_ROUNDS, n_jobs=-1):
+    """
+    Train XGBoost on a CSV of any size and save preprocessor.pkl and xgb_model.pkl
+    (plus the raw booster as xgb_model.ubj).
+
+    Parameters:
+    csv_path: Training CSV with the feature columns and the risk_flag label
+    out_dir: Directory the artifacts are written to; must not already hold preprocessor.pkl or xgb_model.pkl
+    cache_dir: Columnar cache directory (reused across runs of the same CSV)
+    chunksize: Rows per chunk
+    params: XGBoost parameters overriding XGB_PARAMS
+    num_rounds: Boosting rounds
+    n_jobs: XGBoost threads (-1: all cores)
+
+    Returns:
+    preprocessor, xgb_clf, test_auc: The fitted preprocessor, the model and its held-out AUC
+    """
+    import xgboost as xgb
+    from xgboost import XGBClassifier
+
+    # Overwriting an in-memory run's preprocessor would break the models trained on it
+    existing = [name for name in ("preprocessor.pkl", "xgb_model.pkl") if os.path.exists(os.path.join(out_dir, name))]
+    if existing:
+        raise ValueError(f"{out_dir} already holds {', '.join(existing)}; choose a new output directory")
+
+    entry = build_cache(csv_path, cache_dir, chunksize)
+    meta = read_meta(entry)
+    preprocessor = build_preprocessor(meta)
+    encoder = ChunkEncoder(meta, preprocessor)
+
+    n_negative = meta["n_train"] - meta["n_train_positive"]
+    booster_params = dict(XGB_PARAMS)
+    booster_params.update({
+        # Imbalance handled by weighting the positive class (no SMOTE out of core)
+        "scale_pos_weight": n_negative / max(1, meta["n_train_positive"]),
+        "nthread": n_jobs if n_jobs > 0 else os.cpu_count()
+    })
+    booster_params.update(params or {})
+
+    started = time.perf_counter()
+    # XGBoost's external-memory pages are scratch files, kept out of the content-addressed cache entry
+    pages_dir = tempfile.mkdtemp(prefix=".xgb-pages-", dir=cache_dir)
+    try:
+        iterator = _data_iter_class()(entry, meta, encoder, cache_prefix=os.path.join(pages_dir, "xgb"))
+        if hasattr(xgb, "ExtMemQuantileDMatrix"):
+            train_matrix = xgb.ExtMemQuantileDMatrix(iterator, max_bin=booster_params["max_bin"])
+        else:
+            train_matrix = xgb.DMatrix(iterator)
+        booster = xgb.train(booster_params, train_matrix, num_boost_round=num_rounds)
+        del train_matrix
+    finally:
+        shutil.rmtree(pages_dir, ignore_errors=True)
+    print(f"XGBoost trained on {meta['n_train']:,} rows in {time.perf_counter() - started:.1f}s")
+
+    # Held-out AUC, scored chunk by chunk
+    scores, labels = [], []
+    for X, y in iterate_chunks(entry, meta, encoder, test=True):
+        scores.append(booster.inplace_predict(X))
+        labels.append(y)
+    test_auc = roc_auc_score(np.concatenate(labels), np.concatenate(scores)) if labels else float("nan")
+    print(f"Test AUC-ROC: {test_auc:.5f}")
+
+    # Wrapped in the sklearn estimator the backend unpickles
+    os.makedirs(out_dir, exist_ok=True)
+    booster_path = os.path.join(out_dir, "xgb_model.ubj")
+    booster.save_model(booster_path)
+    xgb_clf = XGBClassifier()
+    xgb_clf.load_model(booster_path)
+    with open(os.path.join(out_dir, "xgb_model.pkl"), "wb") as f:
+        pickle.dump(xgb_clf, f)
+    with open(os.path.join(out_dir, "preprocessor.pkl"), "wb") as f:
+        pickle.dump(preprocessor, f)
+    return preprocessor, xgb_clf, test_auc
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train XGBoost from a large CSV without loading it into memory")
+    parser.add_argument("--data", default="processed_training_data.csv", help="Processed training CSV")
+    parser.add_argument("--out", default="ooc_model", help="New directory for preprocessor.pkl and xgb_model.pkl")
+    parser.add_argument("--cache-dir", default="prepared_ooc", help="Columnar cache directory")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--rounds", type=int, default=XGB_ROUNDS)
+    parser.add_argument("--jobs", type=int, default=-1, help="XGBoost threads (-1: all cores)")
+    parser.add_argument("--params", help="JSON object of XGBoost parameters overriding the defaults")
+    args = parser.parse_args()
+
+    try:
+        train_xgboost_out_of_core(
+            args.data, args.out, args.cache_dir, args.chunksize,
+            params=json.loads(args.params) if args.params else None,
+            num_rounds=args.rounds, n_jobs=args.jobs
+        )
+    except Exception as e:
+        print(f"Training failed: {str(e)}")
+        sys.exit(1)
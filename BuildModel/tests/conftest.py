@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The BuildModel scripts import each other as top-level modules; the backend
+# (the app package and its benchmark fixtures) defines the artifact formats
+BUILD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(os.path.dirname(BUILD_DIR), "Backend")
+if BUILD_DIR not in sys.path:
+    sys.path.insert(0, BUILD_DIR)
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
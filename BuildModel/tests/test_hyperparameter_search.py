@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import hyperparameter_search
+from bm_preprocessing import Preprocessor
+from benchmarks.fixtures import training_frame
+
+# Small candidate values, so every fit takes milliseconds
+SMALL_SPACES = {
+    "random_forest": {"n_estimators": [5, 10], "max_depth": [4, 8]},
+    "xgboost": {"n_estimators": [5, 10], "max_depth": [2, 3]}
+}
+
+
+@pytest.fixture(scope="module")
+def matrices():
+    data, labels = training_frame(1200, seed=0)
+    data = data.rename(columns={"marital_Status": "marital_status"})
+    preprocessor = Preprocessor().fit(data[:900])
+    return preprocessor.transform(data[:900]), labels[:900], preprocessor.transform(data[900:]), labels[900:]
+
+
+@pytest.mark.parametrize("model", list(SMALL_SPACES))
+def test_search_oversamples_inside_the_folds(model, matrices, monkeypatch):
+    monkeypatch.setattr(hyperparameter_search, "SEARCH_SPACES", SMALL_SPACES)
+    resampled = []
+    fit_resample = hyperparameter_search.SMOTE.fit_resample
+
+    def recording_fit_resample(self, X, y):
+        resampled.append(len(X))
+        return fit_resample(self, X, y)
+
+    monkeypatch.setattr(hyperparameter_search.SMOTE, "fit_resample", recording_fit_resample)
+    trainData, trainLabels, testData, testLabels = matrices
+
+    best = hyperparameter_search.search_model(
+        model, trainData, trainLabels, testData, testLabels, hyperparameter_search.ServingObjective(),
+        n_candidates=4, factor=2, n_folds=2, n_jobs=1
+    )
+
+    # Every CV fit oversamples its own training fold; only the finalists' refits see every row
+    n_finalists = len(best["finalists"])
+    assert max(resampled[:-n_finalists]) < len(trainData)
+    assert resampled[-n_finalists:] == [len(trainData)] * n_finalists
+    # Tuned parameters are plain estimator parameters, as train_ensemble expects
+    for finalist in best["finalists"]:
+        assert set(finalist["params"]) <= set(SMALL_SPACES[model])
+    assert np.isfinite(best["objective"])
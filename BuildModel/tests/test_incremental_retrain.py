@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from app.core.config import Settings
+from app.services.model_service import ModelService
+from app.services.synthetic_service import SyntheticService
+from app.utils.export_artifact_bundle import export_artifact_bundle
+from app.utils.export_rf_arrays import export_rf_arrays
+from incremental_retrain import retrain_incremental
+from test_train_ensemble import train, write_csv
+
+
+def probabilities(version_dir, **overrides):
+    service = ModelService(version_dir, settings=Settings(MODEL_DIR=version_dir, **overrides))
+    columns = SyntheticService().generate_columns(200, seed=0)
+    columns.pop("is_defaulter")
+    predictions = service.predict_columns(columns)
+    return service, np.array([p.default_probability for p in predictions])
+
+
+def test_published_version_serves_the_promoted_models(tmp_path):
+    base_dir = train(tmp_path, write_csv(tmp_path / "train.csv", seed=0), "v1", activate=True)
+    if not os.path.exists(os.path.join(base_dir, "random_forest_model.npz")):
+        export_rf_arrays(os.path.join(base_dir, "random_forest_model.pkl"),
+                         os.path.join(base_dir, "random_forest_model.npz"))
+    export_artifact_bundle(base_dir)
+
+    # Every model is fine-tuned behind a refitted scaler and promoted unconditionally
+    version_dir = retrain_incremental(
+        write_csv(tmp_path / "batch.csv", seed=1), str(tmp_path / "models"), version="v2",
+        update_scaler=True, apply_smote=False, tolerance=1.0, n_jobs=1
+    )
+
+    assert os.path.isdir(os.path.join(version_dir, "bundle"))
+    # Default settings serve the rebuilt bundle, which must match the new pickles
+    served, served_probabilities = probabilities(version_dir)
+    assert served.preprocessor is None
+    _, expected = probabilities(version_dir, ARTIFACT_FORMAT="pickle", RF_ENGINE="sklearn")
+    _, base = probabilities(base_dir)
+    np.testing.assert_allclose(served_probabilities, expected, atol=1e-5)
+    assert np.max(np.abs(served_probabilities - base)) > 1e-4
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from tensorflow.keras import Input, Sequential
+from tensorflow.keras.layers import BatchNormalization, Dense, Dropout
+
+import bm_numpy_mlp
+import trainingPipeline
+from app.services.numpy_mlp import WEIGHTS_FORMAT_VERSION, NumpyMLP
+
+
+def small_network(n_features=12):
+    network = Sequential([
+        Input(shape=(n_features,)),
+        Dense(16, activation="relu"),
+        Dropout(0.3),
+        Dense(8, activation="relu"),
+        Dense(1, activation="sigmoid")
+    ])
+    network.compile(optimizer="adam", loss="binary_crossentropy")
+    return network
+
+
+def test_exported_weights_reproduce_keras(tmp_path):
+    network = small_network()
+    path = str(tmp_path / "neural_network_model.npz")
+
+    difference = trainingPipeline.export_nn_weights(network, path)
+
+    assert difference <= trainingPipeline.NN_PARITY_TOLERANCE
+    # Written by BuildModel's copy of the format, read by the backend's engine
+    assert bm_numpy_mlp.WEIGHTS_FORMAT_VERSION == WEIGHTS_FORMAT_VERSION
+    X = np.random.default_rng(1).standard_normal((256, 12)).astype(np.float32)
+    mlp = NumpyMLP.load(path)
+    np.testing.assert_allclose(mlp.predict(X), network.predict(X, verbose=0), atol=1e-5)
+    with np.load(path) as arrays:
+        assert int(arrays["format_version"]) == WEIGHTS_FORMAT_VERSION
+
+
+def test_unsupported_layers_are_rejected(tmp_path):
+    network = Sequential([Input(shape=(4,)), Dense(4, activation="relu"), BatchNormalization(),
+                          Dense(1, activation="sigmoid")])
+    path = tmp_path / "neural_network_model.npz"
+
+    with pytest.raises(ValueError):
+        trainingPipeline.export_nn_weights(network, str(path))
+    assert not path.exists()
@@ -0,0 +1,95 @@
+import glob
+import os
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from tensorflow.keras import Input, Sequential
+from tensorflow.keras.layers import Dense, Dropout
+from xgboost import XGBClassifier
+
+import trainingPipeline
+from app.services import onnx_engine
+from benchmarks.fixtures import training_frame
+from bm_preprocessing import Preprocessor
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """Preprocessor and three small models fitted on synthetic applications"""
+    data, labels = training_frame(1500, seed=2)
+    preprocessor = Preprocessor()
+    X = np.asarray(preprocessor.fit_transform(data), dtype=np.float32)
+    rf = RandomForestClassifier(n_estimators=20, max_depth=12, random_state=0).fit(X, labels)
+    xgb = XGBClassifier(n_estimators=20, max_depth=4, random_state=0).fit(X, labels)
+    network = Sequential([Input(shape=(X.shape[1],)), Dense(16, activation="relu"), Dropout(0.2),
+                          Dense(1, activation="sigmoid")])
+    network.compile(optimizer="adam", loss="binary_crossentropy")
+    network.fit(X, labels, epochs=2, batch_size=64, verbose=0)
+    return data, preprocessor, rf, xgb, network
+
+
+def export(trained, onnx_dir):
+    _, preprocessor, rf, xgb, network = trained
+    return trainingPipeline.export_onnx(preprocessor, rf, xgb, network, onnx_dir=str(onnx_dir),
+                                        feature_names=trainingPipeline.encoded_feature_names(preprocessor))
+
+
+def session(onnx_dir, name):
+    return ort.InferenceSession(os.path.join(onnx_dir, onnx_engine.MODEL_FILES[name]),
+                                providers=["CPUExecutionProvider"])
+
+
+def test_export_matches_native_models(trained, tmp_path):
+    data, preprocessor, rf, xgb, network = trained
+    onnx_dir = tmp_path / "onnx"
+    manifest = export(trained, onnx_dir)
+
+    assert onnx_engine.read_manifest(str(onnx_dir)) == manifest
+    assert manifest["feature_names"] == trainingPipeline.encoded_feature_names(preprocessor)
+
+    # The encoder graph reproduces Preprocessor.transform
+    feeds = {feature: data[feature].astype(str).to_numpy(dtype=object).reshape(-1, 1)
+             for feature in manifest["categorical_features"]}
+    feeds[onnx_engine.NUMERICAL] = data[manifest["numerical_features"]].to_numpy(dtype=np.float64)
+    encoded = session(onnx_dir, "encoder").run([onnx_engine.FEATURES], feeds)[0]
+    expected = preprocessor.transform(data)
+    np.testing.assert_allclose(encoded, expected, rtol=0, atol=1e-12)
+
+    X = expected.astype(np.float32)
+    rf_votes = session(onnx_dir, "random_forest").run(None, {onnx_engine.FEATURES: X})[0]
+    xgb_votes = session(onnx_dir, "xgboost").run(None, {onnx_engine.FEATURES: X})[0]
+    probabilities = session(onnx_dir, "neural_network").run([onnx_engine.PROBABILITIES],
+                                                            {onnx_engine.FEATURES: X})[0]
+    np.testing.assert_array_equal(rf_votes, rf.predict(X))
+    np.testing.assert_array_equal(xgb_votes, xgb.predict(X))
+    np.testing.assert_allclose(probabilities, network.predict(X, verbose=0), atol=1e-5)
+
+
+def test_predict_with_onnx_agrees_with_pipeline_models(trained, tmp_path):
+    data, preprocessor, rf, xgb, network = trained
+    onnx_dir = tmp_path / "onnx"
+    export(trained, onnx_dir)
+
+    prediction1, prediction2, prediction3 = trainingPipeline.predict_with_onnx(data, str(onnx_dir))
+    X = preprocessor.transform(data)
+    assert np.array_equal(np.ravel(prediction1), rf.predict(X))
+    assert np.array_equal(np.ravel(prediction2), xgb.predict(X))
+    assert np.array_equal(np.ravel(prediction3), (network.predict(X, verbose=0) >= 0.5).astype(int).ravel())
+
+
+def test_failed_export_leaves_previous_export_intact(trained, tmp_path, monkeypatch):
+    onnx_dir = tmp_path / "onnx"
+    export(trained, onnx_dir)
+    before = {name: (onnx_dir / name).read_bytes() for name in os.listdir(onnx_dir)}
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(onnx_engine.json, "dump", crash)
+    with pytest.raises(OSError):
+        export(trained, onnx_dir)
+
+    assert {name: (onnx_dir / name).read_bytes() for name in os.listdir(onnx_dir)} == before
+    assert not glob.glob(str(tmp_path / ".onnx-*"))
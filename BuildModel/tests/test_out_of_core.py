@@ -0,0 +1,98 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import out_of_core
+from benchmarks.fixtures import training_frame
+from bm_preprocessing import Preprocessor
+
+CHUNKSIZE = 700
+
+
+@pytest.fixture(scope="module")
+def csv_frame(tmp_path_factory):
+    """Training CSV with missing categorical values, and the frame it was written from"""
+    data, labels = training_frame(2500, seed=6)
+    data.loc[::11, "state"] = np.nan
+    data["risk_flag"] = labels
+    path = tmp_path_factory.mktemp("ooc") / "train.csv"
+    data.to_csv(path, index=False)
+    return str(path), data
+
+
+def train_mask(data, test_size=0.3, seed=42):
+    """Rows build_cache assigns to training (per-chunk seeded draws)"""
+    draws = [np.random.default_rng([seed, index]).random(len(data.iloc[start:start + CHUNKSIZE]))
+             for index, start in enumerate(range(0, len(data), CHUNKSIZE))]
+    return np.concatenate(draws) >= test_size
+
+
+def test_cache_reproduces_the_in_memory_preprocessor(csv_frame, tmp_path):
+    path, data = csv_frame
+    entry = out_of_core.build_cache(path, str(tmp_path / "cache"), chunksize=CHUNKSIZE)
+    meta = out_of_core.read_meta(entry)
+    preprocessor = out_of_core.build_preprocessor(meta)
+
+    is_train = train_mask(data)
+    features = data.drop(columns="risk_flag")
+    reference = Preprocessor().fit(features[is_train])
+    assert preprocessor.categories == reference.categories
+    np.testing.assert_allclose(preprocessor.scaler.mean_, reference.scaler.mean_, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(preprocessor.scaler.scale_, reference.scaler.scale_, rtol=1e-9)
+
+    encoder = out_of_core.ChunkEncoder(meta, preprocessor)
+    encoded = np.concatenate([X for X, _ in out_of_core.iterate_chunks(entry, meta, encoder, test=True)])
+    np.testing.assert_allclose(encoded, reference.transform(features[~is_train]), atol=1e-5)
+
+
+def test_training_refuses_to_overwrite_existing_artifacts(csv_frame, tmp_path):
+    path, _ = csv_frame
+    out_dir = tmp_path / "models"
+    out_dir.mkdir()
+    (out_dir / "preprocessor.pkl").write_bytes(b"in-memory preprocessor")
+
+    with pytest.raises(ValueError):
+        out_of_core.train_xgboost_out_of_core(path, str(out_dir), str(tmp_path / "cache"), CHUNKSIZE, num_rounds=2)
+    assert (out_dir / "preprocessor.pkl").read_bytes() == b"in-memory preprocessor"
+
+
+def test_training_writes_a_new_model_directory(csv_frame, tmp_path):
+    path, data = csv_frame
+    out_dir = str(tmp_path / "ooc_model")
+    _, xgb_clf, test_auc = out_of_core.train_xgboost_out_of_core(
+        path, out_dir, str(tmp_path / "cache"), CHUNKSIZE, num_rounds=5, n_jobs=1
+    )
+
+    assert test_auc > 0.5
+    with open(os.path.join(out_dir, "preprocessor.pkl"), "rb") as f:
+        preprocessor = pickle.load(f)
+    with open(os.path.join(out_dir, "xgb_model.pkl"), "rb") as f:
+        model = pickle.load(f)
+    X = preprocessor.transform(data.drop(columns="risk_flag").head(50))
+    np.testing.assert_array_equal(model.predict_proba(X), xgb_clf.predict_proba(X))
+
+    # The booster is an output; the cache entry holds only the prepared chunks
+    assert os.path.exists(os.path.join(out_dir, "xgb_model.ubj"))
+    (entry,) = [name for name in os.listdir(tmp_path / "cache") if not name.startswith(".")]
+    cached = os.listdir(tmp_path / "cache" / entry)
+    assert all(name == "meta.json" or name.startswith("chunk_") for name in cached)
+    assert os.listdir(tmp_path / "cache") == [entry]
+
+
+def test_feature_with_no_values_encodes_as_an_empty_block(tmp_path):
+    data, labels = training_frame(900, seed=7)
+    data["car_ownership"] = np.nan
+    data["risk_flag"] = labels
+    path = str(tmp_path / "train.csv")
+    data.to_csv(path, index=False)
+
+    entry = out_of_core.build_cache(path, str(tmp_path / "cache"), chunksize=CHUNKSIZE)
+    meta = out_of_core.read_meta(entry)
+    preprocessor = out_of_core.build_preprocessor(meta)
+    encoder = out_of_core.ChunkEncoder(meta, preprocessor)
+
+    assert preprocessor.categories["car_ownership"] == []
+    for X, _ in out_of_core.iterate_chunks(entry, meta, encoder, test=False):
+        assert X.shape[1] == preprocessor.scaler.n_features_in_
@@ -0,0 +1,63 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import trainingPipeline
+from benchmarks.fixtures import training_frame
+
+
+@pytest.fixture(scope="module")
+def split():
+    data, labels = training_frame(600, seed=0)
+    labels = pd.Series(labels, name="risk_flag")
+    return data[:400], labels[:400], data[400:], labels[400:]
+
+
+def entries(cache_dir):
+    return sorted(os.listdir(cache_dir))
+
+
+def test_same_data_and_config_reuse_the_entry(tmp_path, split, capsys):
+    cache_dir = str(tmp_path / "prepared")
+    first = trainingPipeline.prepare_training_data(*split, cache_dir=cache_dir, preprocessor_path=None)
+    second = trainingPipeline.prepare_training_data(*split, cache_dir=cache_dir, preprocessor_path=None)
+
+    assert second["key"] == first["key"]
+    assert "Reusing prepared training data" in capsys.readouterr().out
+    assert (second["trainData"] == first["trainData"]).all()
+    assert entries(cache_dir) == [first["key"]]
+
+    # A different preprocessing config is a different entry
+    unsampled = trainingPipeline.prepare_training_data(*split, cache_dir=cache_dir, apply_smote=False,
+                                                       preprocessor_path=None)
+    assert unsampled["key"] != first["key"]
+    assert entries(cache_dir) == sorted([first["key"], unsampled["key"]])
+
+
+def test_losing_the_race_uses_the_other_entry(tmp_path, split, monkeypatch):
+    cache_dir = str(tmp_path / "prepared")
+    replace = os.replace
+
+    def concurrent_replace(source, destination):
+        # Another run publishes the same key first
+        shutil.copytree(source, destination)
+        replace(source, destination)
+
+    monkeypatch.setattr(trainingPipeline.os, "replace", concurrent_replace)
+    prepared = trainingPipeline.prepare_training_data(*split, cache_dir=cache_dir, preprocessor_path=None)
+
+    assert entries(cache_dir) == [prepared["key"]]
+
+
+def test_other_write_errors_are_raised(tmp_path, split, monkeypatch):
+    cache_dir = str(tmp_path / "prepared")
+
+    def denied(source, destination):
+        raise PermissionError(13, "Permission denied", destination)
+
+    monkeypatch.setattr(trainingPipeline.os, "replace", denied)
+    with pytest.raises(PermissionError):
+        trainingPipeline.prepare_training_data(*split, cache_dir=cache_dir, preprocessor_path=None)
+    assert entries(cache_dir) == []
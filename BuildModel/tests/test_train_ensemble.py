@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+import train_ensemble
+from benchmarks.fixtures import training_frame
+
+# Small models, so a full ensemble trains in seconds
+SMALL_PARAMS = {
+    "random_forest": {"params": {"n_estimators": 10, "max_depth": 8}},
+    "xgboost": {"params": {"n_estimators": 10, "max_depth": 3}}
+}
+
+
+def write_csv(path, seed):
+    data, labels = training_frame(1200, seed=seed)
+    data["risk_flag"] = labels
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+def train(tmp_path, csv_path, version, jobs=tuple(train_ensemble.JOB_WEIGHTS), **kwargs):
+    return train_ensemble.train_ensemble(
+        csv_path, str(tmp_path / "models"), version, jobs, n_cores=1, cache_dir=str(tmp_path / "prepared"),
+        tuned_params=SMALL_PARAMS, **kwargs
+    )
+
+
+def test_partial_jobs_need_a_base_version(tmp_path):
+    csv_path = write_csv(tmp_path / "train.csv", seed=0)
+
+    with pytest.raises(ValueError):
+        train(tmp_path, csv_path, "v1", jobs=("xgboost",))
+    assert not os.path.exists(tmp_path / "models" / "versions" / "v1")
+
+
+def test_partial_jobs_carry_the_other_models_over(tmp_path):
+    csv_path = write_csv(tmp_path / "train.csv", seed=0)
+    base_dir = train(tmp_path, csv_path, "v1", activate=True)
+
+    version_dir = train(tmp_path, csv_path, "v2", jobs=("xgboost",))
+
+    files = set(os.listdir(version_dir))
+    for job, names in train_ensemble.JOB_ARTIFACTS.items():
+        assert names[0] in files
+    for name in ("random_forest_model.pkl", "neural_network_model.h5", "neural_network_model.npz"):
+        with open(os.path.join(base_dir, name), "rb") as base, open(os.path.join(version_dir, name), "rb") as new:
+            assert base.read() == new.read()
+
+    # Models trained on other data cannot be paired with the new preprocessor
+    other_csv = write_csv(tmp_path / "other.csv", seed=1)
+    with pytest.raises(ValueError):
+        train(tmp_path, other_csv, "v3", jobs=("xgboost",))
+    assert not os.path.exists(tmp_path / "models" / "versions" / "v3")
@@ -0,0 +1,271 @@
+"""
+Train the whole ensemble in parallel into a versioned model directory.
+
+RandomForest, XGBoost and the Keras network train in separate worker
+processes from one shared prepared dataset (see prepare_training_data),
+each with its own share of the CPU cores. The artifacts are written to
+<models-root>/versions/<version>/, the layout the backend's ModelRegistry
+serves; --activate also points <models-root>/CURRENT at the new version.
+Models left out of --jobs are carried over from the base version (default:
+CURRENT), which must have been trained on the same preprocessing.
+
+    python train_ensemble.py --data processed_training_data.csv --activate
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+BUILD_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODELS_ROOT = os.path.join(os.path.dirname(BUILD_DIR), "Backend", "ml_models")
+
+# Relative share of the CPU cores per job: the tree ensembles parallelise
+# across trees, the small network gains little from more than a few threads
+JOB_WEIGHTS = {"random_forest": 2, "xgboost": 2, "neural_network": 1}
+# Native thread pools sized per job (read when the libraries initialise)
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+# Files of each model in a version directory; the first one is required when carrying a model over
+JOB_ARTIFACTS = {
+    "random_forest": ("random_forest_model.pkl", "random_forest_model.npz"),
+    "xgboost": ("xgb_model.pkl",),
+    "neural_network": ("neural_network_model.h5", "neural_network_model.npz")
+}
+
+
+def split_cores(n_cores, jobs):
+    """
+    Divide n_cores between jobs in proportion to JOB_WEIGHTS (at least one each).
+
+    Parameters:
+    n_cores: Cores available for training
+    jobs: Job names to run concurrently
+
+    Returns:
+    threads: Dictionary of job name -> thread count
+    """
+    total_weight = sum(JOB_WEIGHTS[job] for job in jobs)
+    threads = {job: max(1, n_cores * JOB_WEIGHTS[job] // total_weight) for job in jobs}
+    # Hand out cores lost to rounding, heaviest jobs first
+    spare = n_cores - sum(threads.values())
+    for job in sorted(jobs, key=lambda job: -JOB_WEIGHTS[job]):
+        if spare <= 0:
+            break
+        threads[job] += 1
+        spare -= 1
+    return threads
+
+
+def _train_job(job, prepared_dir, out_dir, n_threads, params=None):
+    """
+    Train one model in a worker process and save it into out_dir.
+
+    Runs in a fresh (spawned) process, so the thread limits are set before
+    NumPy, XGBoost or TensorFlow start their thread pools.
+
+    Parameters:
+    job: Model to train (a JOB_WEIGHTS key)
+    prepared_dir: Prepared-data cache entry
+    out_dir: Directory the artifacts are saved to
+    n_threads: Threads for this job
+    params: Tuned parameters for the tree models (see hyperparameter_search.py)
+
+    Returns:
+    job, seconds: The job name and its training time
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(n_threads)
+    sys.path.insert(0, BUILD_DIR)
+    started = time.perf_counter()
+
+    import trainingPipeline
+
+    if job == "neural_network":
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    # Matrices are memory-mapped, so the three workers share one copy in the page cache
+    prepared = trainingPipeline.load_prepared(prepared_dir, mmap_mode="r")
+    # The trainers save their artifacts into the working directory
+    os.chdir(out_dir)
+    if job == "random_forest":
+        trainingPipeline.rf_train_pipeline(None, None, None, None, prepared, n_jobs=n_threads, params=params)
+    elif job == "xgboost":
+        trainingPipeline.xgb_train_pipeline(None, None, None, None, prepared, n_jobs=n_threads, params=params)
+    else:
+        trainingPipeline.neuralnetwork(None, None, None, None, prepared)
+    return job, time.perf_counter() - started
+
+
+def same_encoding(preprocessor, other):
+    """True when two fitted preprocessors produce the same matrix (categories and scaler statistics)"""
+    return (
+        preprocessor.categories == other.categories
+        and list(preprocessor.numerical_features) == list(other.numerical_features)
+        and np.array_equal(preprocessor.scaler.mean_, other.scaler.mean_)
+        and np.array_equal(preprocessor.scaler.scale_, other.scaler.scale_)
+    )
+
+
+def carry_over_models(base_dir, out_dir, jobs, preprocessor):
+    """
+    Copy the artifacts of models that are not retrained from the base version.
+
+    Parameters:
+    base_dir: Base version directory
+    out_dir: Directory of the version being assembled
+    jobs: Models to carry over (JOB_ARTIFACTS keys)
+    preprocessor: Preprocessor of the new version; the base models must have been trained on the same encoding
+    """
+    with open(os.path.join(base_dir, "preprocessor.pkl"), "rb") as f:
+        base_preprocessor = pickle.load(f)
+    if not same_encoding(preprocessor, base_preprocessor):
+        raise ValueError(f"{base_dir} was trained on different preprocessing; train all three models")
+    for job in jobs:
+        required = os.path.join(base_dir, JOB_ARTIFACTS[job][0])
+        if not os.path.exists(required):
+            raise ValueError(f"Cannot carry {job} over: {required} not found")
+        for name in JOB_ARTIFACTS[job]:
+            if os.path.exists(os.path.join(base_dir, name)):
+                shutil.copy2(os.path.join(base_dir, name), os.path.join(out_dir, name))
+
+
+def write_current(models_root, version):
+    """Atomically point models_root/CURRENT at version"""
+    current = os.path.join(models_root, "CURRENT")
+    tmp_path = f"{current}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, current)
+
+
+def train_ensemble(csv_path, models_root=DEFAULT_MODELS_ROOT, version=None, jobs=tuple(JOB_WEIGHTS),
+                   n_cores=None, cache_dir="prepared", activate=False, onnx=False, tuned_params=None,
+                   base_version=None):
+    """
+    Prepare the data once, train the models in parallel and publish a model version.
+
+    Parameters:
+    csv_path: Processed training data with a risk_flag label column
+    models_root: Backend MODEL_DIR; the version is written to models_root/versions/<version>
+    version: Version name (default: a UTC timestamp)
+    jobs: Models to train; the others are carried over from base_version
+    n_cores: Cores to divide between the jobs (default: all)
+    cache_dir: Prepared-data cache directory
+    activate: Point models_root/CURRENT at the new version
+    onnx: Also export the version to ONNX (requires all three models)
+    tuned_params: Output of hyperparameter_search.py ({model: {"params": ...}}); defaults when None
+    base_version: Version the models left out of jobs are copied from (default: CURRENT)
+
+    Returns:
+    version_dir: The published version directory
+    """
+    import trainingPipeline
+
+    started = time.perf_counter()
+    version = version or time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    versions_dir = os.path.join(models_root, "versions")
+    version_dir = os.path.join(versions_dir, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version '{version}' already exists in {versions_dir}")
+    threads = split_cores(n_cores or os.cpu_count() or 1, jobs)
+    # A version always holds all three models, so the serving side can load it
+    carried = [job for job in JOB_ARTIFACTS if job not in jobs]
+    if carried:
+        from incremental_retrain import resolve_base
+
+        base_version, base_dir = resolve_base(models_root, base_version)
+
+    # Assembled next to the final directory and renamed at the end, so the
+    # backend never sees a partial version (dot-prefixed names are not versions)
+    os.makedirs(versions_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{version}-", dir=versions_dir)
+    try:
+        data_train, data_test, y_train, y_test = trainingPipeline.load_training_split(csv_path)
+        prepared = trainingPipeline.prepare_training_data(
+            data_train, y_train, data_test, y_test,
+            cache_dir=os.path.abspath(cache_dir),
+            preprocessor_path=os.path.join(staging, "preprocessor.pkl")
+        )
+        with open(os.path.join(staging, "feature_names.pkl"), "wb") as f:
+            pickle.dump(trainingPipeline.encoded_feature_names(prepared["preprocessor"]), f)
+        del prepared["trainData"], prepared["testData"]
+        if carried:
+            carry_over_models(base_dir, staging, carried, prepared["preprocessor"])
+            print(f"Carried {', '.join(carried)} over from version {base_version}")
+
+        print(f"Training {', '.join(jobs)} with threads {threads}")
+        # spawn: fork after TensorFlow/OpenMP start-up in this process is unsafe
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=context) as pool:
+            futures = [
+                pool.submit(_train_job, job, prepared["path"], staging, threads[job],
+                            (tuned_params or {}).get(job, {}).get("params"))
+                for job in jobs
+            ]
+            for future in as_completed(futures):
+                job, seconds = future.result()
+                print(f"{job} trained in {seconds:.1f}s")
+
+        if onnx:
+            from tensorflow.keras.models import load_model
+
+            models = {}
+            for name, file_name in (("rf", "random_forest_model.pkl"), ("xgb", "xgb_model.pkl")):
+                with open(os.path.join(staging, file_name), "rb") as f:
+                    models[name] = pickle.load(f)
+            trainingPipeline.export_onnx(
+                prepared["preprocessor"], models["rf"], models["xgb"],
+                load_model(os.path.join(staging, "neural_network_model.h5")),
+                onnx_dir=os.path.join(staging, "onnx"),
+                feature_names=trainingPipeline.encoded_feature_names(prepared["preprocessor"])
+            )
+
+        os.chmod(staging, 0o755)
+        os.replace(staging, version_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if activate:
+        write_current(models_root, version)
+    print(f"Model version {version} written to {version_dir} in {time.perf_counter() - started:.1f}s"
+          + (" and activated" if activate else ""))
+    return version_dir
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BUILD_DIR)
+
+    parser = argparse.ArgumentParser(description="Train the ensemble in parallel into a versioned model directory")
+    parser.add_argument("--data", default="processed_training_data.csv", help="Processed training CSV")
+    parser.add_argument("--models-root", default=DEFAULT_MODELS_ROOT, help="Backend MODEL_DIR")
+    parser.add_argument("--version", help="Version name (default: UTC timestamp)")
+    parser.add_argument("--jobs", nargs="+", choices=list(JOB_WEIGHTS), default=list(JOB_WEIGHTS))
+    parser.add_argument("--cores", type=int, help="Cores to divide between the jobs (default: all)")
+    parser.add_argument("--cache-dir", default="prepared", help="Prepared-data cache directory")
+    parser.add_argument("--activate", action="store_true", help="Point CURRENT at the new version")
+    parser.add_argument("--onnx", action="store_true", help="Also export the version to ONNX")
+    parser.add_argument("--params", help="Tuned parameters JSON written by hyperparameter_search.py")
+    parser.add_argument("--base-version", help="Version to carry the models left out of --jobs over from "
+                                               "(default: CURRENT)")
+    args = parser.parse_args()
+
+    try:
+        tuned_params = None
+        if args.params:
+            with open(args.params) as f:
+                tuned_params = json.load(f)
+        train_ensemble(args.data, args.models_root, args.version, args.jobs, args.cores,
+                       args.cache_dir, args.activate, args.onnx, tuned_params, args.base_version)
+    except Exception as e:
+        print(f"Training failed: {str(e)}")
+        sys.exit(1)
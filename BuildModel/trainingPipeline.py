@@ -1,5 +1,6 @@
 import sys
 import os
+import numpy as np
 import pandas as pd
 import pickle
 from sklearn.ensemble import RandomForestClassifier
@@ -13,32 +14,146 @@ from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.models import load_model
 from sklearn.metrics import roc_curve, auc
 from bm_preprocessing import Preprocessor, preprocess_for_prediction
+from bm_numpy_mlp import NumpyMLP, max_abs_difference
+from bm_backend import import_backend
 from sklearn.model_selection import cross_val_score, train_test_split, StratifiedKFold
 
 
-def rf_train_pipeline(data_train, y_train, data_test, y_test):
-    # Initialize the preprocessor
+# Bump when the preparation steps change, so older cache entries are not reused
+PREPARATION_VERSION = 1
+PREPARED_FILES = ("trainData", "trainLabels", "testData", "testLabels")
+
+def _hash_frame(digest, frame):
+    """Feed a DataFrame or Series (values, index, column names and dtypes) into a hash"""
+    frame = frame.to_frame() if isinstance(frame, pd.Series) else frame
+    digest.update(repr([(str(c), str(t)) for c, t in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+
+def preparation_key(data_train, y_train, data_test, y_test, apply_smote=True):
+    """
+    Cache key of a preparation run: a hash of the train/test data and the preprocessing config.
+    
+    Returns:
+    key: Hex digest identifying the prepared matrices
+    """
+    import hashlib
+    import json
+    
     preprocessor = Preprocessor()
+    config = {
+        "version": PREPARATION_VERSION,
+        "categorical_features": preprocessor.categorical_features,
+        "numerical_features": preprocessor.numerical_features,
+        "apply_smote": apply_smote
+    }
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode())
+    for frame in (data_train, y_train, data_test, y_test):
+        _hash_frame(digest, frame)
+    return digest.hexdigest()[:16]
+
+def load_prepared(entry, mmap_mode=None):
+    """
+    Load one prepared-data cache entry written by prepare_training_data.
+    
+    Parameters:
+    entry: Cache entry directory (cache_dir/<key>)
+    mmap_mode: Passed to np.load; "r" shares the matrices between processes through the page cache
     
-    # Fit and transform the training data with SMOTE
-    trainData, trainLabels = preprocessor.fit_transform(data_train, y_train, apply_smote=True)
+    Returns:
+    prepared: Dictionary with preprocessor, trainData, trainLabels, testData, testLabels, key and path
+    """
+    with open(os.path.join(entry, "preprocessor.pkl"), "rb") as f:
+        prepared = {"preprocessor": pickle.load(f), "key": os.path.basename(entry), "path": entry}
+    for name in PREPARED_FILES:
+        prepared[name] = np.load(os.path.join(entry, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+    return prepared
+
+def prepare_training_data(data_train, y_train, data_test, y_test, cache_dir="prepared", apply_smote=True,
+                          preprocessor_path="preprocessor.pkl"):
+    """
+    Fit the preprocessor once, resample with SMOTE and cache the train/test matrices.
+    
+    The matrices are stored as .npy files (with the fitted preprocessor) in
+    cache_dir/<key>, where key hashes the data and the preprocessing config, so
+    every trainer reuses the same preparation and serving gets one consistent
+    preprocessor. The preprocessor is also written to preprocessor_path.
     
-    # Transform the test data with SMOTE
-    testData, testLabels = preprocessor.transform(data_test, y_test, apply_smote=True)
+    Parameters:
+    data_train, y_train: Training features and labels
+    data_test, y_test: Test features and labels
+    cache_dir: Directory holding one subdirectory per cache key
+    apply_smote: Whether to oversample with SMOTE (train and test, as the trainers always did)
+    preprocessor_path: Where to save the fitted preprocessor for serving (None: do not save)
+    
+    Returns:
+    prepared: Dictionary with preprocessor, trainData, trainLabels, testData, testLabels, key and path
+    """
+    import shutil
+    import tempfile
+    
+    key = preparation_key(data_train, y_train, data_test, y_test, apply_smote)
+    entry = os.path.join(cache_dir, key)
+    if os.path.exists(os.path.join(entry, "preprocessor.pkl")):
+        print(f"Reusing prepared training data from {entry}")
+        prepared = load_prepared(entry)
+    else:
+        print(f"Preparing training data (cache key {key})")
+        preprocessor = Preprocessor()
+        # Fit and transform the training data (with SMOTE), then the test data
+        if apply_smote:
+            trainData, trainLabels = preprocessor.fit_transform(data_train, y_train, apply_smote=True)
+            testData, testLabels = preprocessor.transform(data_test, y_test, apply_smote=True)
+        else:
+            trainData, trainLabels = preprocessor.fit_transform(data_train), y_train
+            testData, testLabels = preprocessor.transform(data_test), y_test
+        prepared = {
+            "preprocessor": preprocessor,
+            "key": key,
+            "path": entry,
+            "trainData": np.asarray(trainData),
+            "trainLabels": np.asarray(trainLabels),
+            "testData": np.asarray(testData),
+            "testLabels": np.asarray(testLabels)
+        }
+        
+        # Written to a staging directory and moved into place, so a crash never leaves a partial entry
+        os.makedirs(cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir)
+        try:
+            for name in PREPARED_FILES:
+                np.save(os.path.join(staging, f"{name}.npy"), prepared[name], allow_pickle=False)
+            with open(os.path.join(staging, "preprocessor.pkl"), "wb") as f:
+                pickle.dump(preprocessor, f)
+            os.replace(staging, entry)
+        except BaseException as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            # Only losing the race to another run caching the same key is expected;
+            # disk-full and permission errors must not silently disable the cache
+            if not (isinstance(e, OSError) and os.path.exists(os.path.join(entry, "preprocessor.pkl"))):
+                raise
     
     # Save the preprocessor for later use
-    with open("preprocessor.pkl", "wb") as f:
-        pickle.dump(preprocessor, f)
-    # preprocessor.save("preprocessor.pkl")
+    if preprocessor_path is not None:
+        with open(preprocessor_path, "wb") as f:
+            pickle.dump(prepared["preprocessor"], f)
+    return prepared
+
+def rf_train_pipeline(data_train, y_train, data_test, y_test, prepared=None, n_jobs=-1, params=None):
+    # Fitted preprocessor and resampled matrices, shared by all trainers
+    if prepared is None:
+        prepared = prepare_training_data(data_train, y_train, data_test, y_test)
+    preprocessor = prepared["preprocessor"]
+    trainData, trainLabels = prepared["trainData"], prepared["trainLabels"]
+    testData, testLabels = prepared["testData"], prepared["testLabels"]
     
     rf_optimum_params = {'criterion': 'gini', 'max_depth': 50, 'n_estimators': 800}
+    # Tuned parameters (see hyperparameter_search.py) override the defaults
+    rf_optimum_params.update(params or {})
     
     rf_clf = RandomForestClassifier(
-        n_estimators=rf_optimum_params['n_estimators'], 
-        criterion=rf_optimum_params['criterion'], 
-        max_depth=rf_optimum_params['max_depth'],  
+        **rf_optimum_params,
         random_state=42,
-        n_jobs=-1
+        n_jobs=n_jobs
     )
     
     # Train the model
@@ -50,31 +165,30 @@ def rf_train_pipeline(data_train, y_train, data_test, y_test):
     # Save the model
     with open("random_forest_model.pkl", "wb") as f:
         pickle.dump(rf_clf, f)
+    # Compact arrays for the backend's RF_ENGINE="compact", checked against the pickle
+    import_backend("app.utils.export_rf_arrays").export_rf_arrays("random_forest_model.pkl", "random_forest_model.npz")
     
     return preprocessor, rf_clf
 
 
-def xgb_train_pipeline(data_train, y_train, data_test, y_test):
-    # Initialize the preprocessor
-    preprocessor = Preprocessor()
-    
-    # Fit and transform the training data with SMOTE
-    trainData, trainLabels = preprocessor.fit_transform(data_train, y_train, apply_smote=True)
-    
-    # Transform the test data with SMOTE
-    testData, testLabels = preprocessor.transform(data_test, y_test, apply_smote=True)
-    
-    # Save the preprocessor for later use
-    with open("preprocessor.pkl", "wb") as f:
-        pickle.dump(preprocessor, f)
+def xgb_train_pipeline(data_train, y_train, data_test, y_test, prepared=None, n_jobs=-1, params=None):
+    # Fitted preprocessor and resampled matrices, shared by all trainers
+    if prepared is None:
+        prepared = prepare_training_data(data_train, y_train, data_test, y_test)
+    preprocessor = prepared["preprocessor"]
+    trainData, trainLabels = prepared["trainData"], prepared["trainLabels"]
+    testData, testLabels = prepared["testData"], prepared["testLabels"]
 
     optimum_params={'booster': 'gbtree', 'eval_metric': 'auc', 'max_depth': 50, 'n_estimators': 800, 'objective': 'binary:logistic', 'predictor': 'cpu_predictor', 'tree_method': 'hist'}
 
-    xgb_clf = XGBClassifier(n_estimators= optimum_params['n_estimators'],
-                                max_depth=optimum_params['max_depth'],
+    xgb_params = {'n_estimators': optimum_params['n_estimators'], 'max_depth': optimum_params['max_depth']}
+    # Tuned parameters (see hyperparameter_search.py) override the defaults
+    xgb_params.update(params or {})
+
+    xgb_clf = XGBClassifier(**xgb_params,
                                 eval_metric='auc',
                                 random_state=42,
-                                n_jobs= -1,
+                                n_jobs=n_jobs,
                                 verbosity = 1
                                 )
     xgb_clf.fit(trainData, trainLabels)
@@ -87,18 +201,13 @@ def xgb_train_pipeline(data_train, y_train, data_test, y_test):
     
     return preprocessor, xgb_clf
 
-def neuralnetwork(data_train, y_train, data_test, y_test):
-
-    preprocessor = Preprocessor()
-    
-    # Fit and transform the training data with SMOTE
-    trainData, trainLabels = preprocessor.fit_transform(data_train, y_train, apply_smote=True)
-    
-    # Transform the test data with SMOTE
-    testData, testLabels = preprocessor.transform(data_test, y_test, apply_smote=True)
+def neuralnetwork(data_train, y_train, data_test, y_test, prepared=None):
 
-    with open("preprocessor.pkl", "wb") as f:
-        pickle.dump(preprocessor, f)
+    # Fitted preprocessor and resampled matrices, shared by all trainers
+    if prepared is None:
+        prepared = prepare_training_data(data_train, y_train, data_test, y_test)
+    trainData, trainLabels = prepared["trainData"], prepared["trainLabels"]
+    testData, testLabels = prepared["testData"], prepared["testLabels"]
 
     nn_model = Sequential([
         Dense(128, activation='relu', input_shape=(trainData.shape[1],)),
@@ -122,9 +231,129 @@ def neuralnetwork(data_train, y_train, data_test, y_test):
     print(f"Test AUC-ROC: {test_auc:.4f}")
 
     nn_model.save("neural_network_model.h5")
+    export_nn_weights(nn_model, "neural_network_model.npz")
 
     return nn_model
 
+def encoded_feature_names(preprocessor):
+    """Column names of the preprocessed matrix (one-hot categories, then numerical features)"""
+    names = []
+    for feature in preprocessor.categorical_features:
+        if feature in preprocessor.categories:
+            names.extend(str(c) for c in preprocessor.categories[feature])
+    return names + list(preprocessor.numerical_features)
+
+# Largest acceptable difference between the Keras and exported NumPy probabilities
+NN_PARITY_TOLERANCE = 1e-5
+
+def export_nn_weights(nn_model, filename, tolerance=NN_PARITY_TOLERANCE):
+    """
+    Export the Dense layers of the network to a plain .npz weight file.
+    The backend runs the forward pass from this file in NumPy (NN_ENGINE="numpy").
+    
+    The file is written in the backend's weight format (bm_numpy_mlp), and the
+    exported weights must reproduce nn_model.predict on a probe batch.
+    
+    Parameters:
+    nn_model: Trained Keras Sequential model (Dense and Dropout layers only)
+    filename: Path of the .npz file to write
+    tolerance: Largest acceptable absolute difference in output probability
+    
+    Returns:
+    difference: Max absolute output difference between Keras and the saved weights
+    """
+    mlp = NumpyMLP.from_keras(nn_model)
+    difference = max_abs_difference(nn_model, mlp)
+    if difference > tolerance:
+        raise ValueError(f"NumPy forward pass differs from Keras by {difference:.3g} (tolerance {tolerance:.3g})")
+    mlp.save(filename)
+    
+    # Round-trip through the file to catch serialization problems
+    saved = filename if filename.endswith(".npz") else f"{filename}.npz"
+    difference = max(difference, max_abs_difference(nn_model, NumpyMLP.load(saved)))
+    if difference > tolerance:
+        raise ValueError(f"Saved NumPy weights differ from Keras by {difference:.3g} (tolerance {tolerance:.3g})")
+    return difference
+
+def export_onnx(preprocessor, rf_clf, xgb_clf, nn_model, onnx_dir="onnx", feature_names=None):
+    """
+    Export the preprocessor and the three models to ONNX for the backend's onnxruntime engine.
+    
+    The files are written by the backend's own writer (onnx_engine.write_onnx_models),
+    which assembles them in a temporary directory and renames it into place, so
+    a crash never leaves a partial onnx_dir.
+    
+    Parameters:
+    preprocessor: Fitted Preprocessor
+    rf_clf: Trained RandomForestClassifier
+    xgb_clf: Trained XGBClassifier
+    nn_model: Trained Keras model
+    onnx_dir: Output directory (copy it to the backend's ml_models/onnx)
+    feature_names: Names reported with feature importances (optional)
+    
+    Returns:
+    manifest: The manifest that was written
+    """
+    onnx_engine = import_backend("app.services.onnx_engine")
+    CompiledEncoder = import_backend("app.utils.feature_encoder").CompiledEncoder
+    
+    # Only the categorical features seen during fit are encoded
+    input_columns = [f for f in preprocessor.categorical_features if f in preprocessor.categories]
+    encoder = CompiledEncoder.from_preprocessor(preprocessor, input_columns + list(preprocessor.numerical_features))
+    return onnx_engine.write_onnx_models(
+        onnx_dir, encoder, rf_clf, xgb_clf, NumpyMLP.from_keras(nn_model), feature_names=feature_names
+    )
+
+def predict_with_onnx(new_data, onnx_dir="onnx"):
+    """
+    Make predictions with the exported ONNX graphs (one onnxruntime session per model).
+    
+    Parameters:
+    new_data: pandas DataFrame with the same structure as training data
+    onnx_dir: Directory written by export_onnx
+    
+    Returns:
+    predictions: (random forest, xgboost, neural network) predictions, as predict_with_pipeline
+    """
+    import onnxruntime as ort
+    onnx_engine = import_backend("app.services.onnx_engine")
+    
+    manifest = onnx_engine.read_manifest(onnx_dir)
+    sessions = {
+        name: ort.InferenceSession(os.path.join(onnx_dir, file_name), providers=["CPUExecutionProvider"])
+        for name, file_name in manifest["files"].items()
+    }
+    
+    feeds = {
+        feature: new_data[feature].astype(str).to_numpy(dtype=object).reshape(-1, 1)
+        for feature in manifest["categorical_features"]
+    }
+    feeds[onnx_engine.NUMERICAL] = new_data[manifest["numerical_features"]].to_numpy(dtype=np.float64)
+    features = sessions["encoder"].run([onnx_engine.FEATURES], feeds)[0].astype(np.float32)
+    
+    prediction1 = sessions["random_forest"].run(None, {onnx_engine.FEATURES: features})[0]
+    prediction2 = sessions["xgboost"].run(None, {onnx_engine.FEATURES: features})[0]
+    probabilities = sessions["neural_network"].run([onnx_engine.PROBABILITIES], {onnx_engine.FEATURES: features})[0]
+    prediction3 = (probabilities >= 0.5).astype(int)
+    return prediction1, prediction2, prediction3
+
+def check_onnx_parity(new_data, onnx_dir="onnx"):
+    """
+    Compare the ONNX predictions with the pickle/h5 path on new_data.
+    
+    Parameters:
+    new_data: pandas DataFrame with the same structure as training data
+    onnx_dir: Directory written by export_onnx
+    
+    Returns:
+    mismatches: Rows that differ, per model (all zeros when the export is faithful)
+    """
+    expected = predict_with_pipeline(new_data)
+    actual = predict_with_onnx(new_data, onnx_dir)
+    mismatches = [int(np.sum(np.ravel(e) != np.ravel(a))) for e, a in zip(expected, actual)]
+    print(f"ONNX prediction mismatches (random forest, xgboost, neural network): {mismatches}")
+    return mismatches
+
 def predict_with_pipeline(new_data):
     """
     Process new data and make predictions using the saved model.
@@ -175,22 +404,45 @@ def predict_single_record():
     return prediction1, prediction2, prediction3
 
 
-if __name__ == '__main__':
-
-    data = pd.read_csv("processed_training_data.csv")
+def load_training_split(csv_path="processed_training_data.csv", test_size=0.3, random_state=42):
+    """
+    Read the training CSV and split it into train and test sets.
+    
+    Parameters:
+    csv_path: Processed training data with a risk_flag label column
+    test_size: Fraction of rows held out for testing
+    random_state: Split seed; fixed so the split (and the preparation cache key) is stable across runs
+    
+    Returns:
+    data_train, data_test, y_train, y_test: Split features and labels with fresh indexes
+    """
+    data = pd.read_csv(csv_path)
 
     y_true=data['risk_flag']
     #using stratify=y_true to have equal number of datapoints both in train and test datasets 
     data_train, data_test, y_train,  y_test = train_test_split(data.drop('risk_flag', axis=1), y_true, 
-                                                            stratify=y_true, test_size=0.3)
+                                                            stratify=y_true, test_size=test_size,
+                                                            random_state=random_state)
     data_train=data_train.reset_index(drop=True)
     data_test=data_test.reset_index(drop=True)
     y_train=y_train.reset_index(drop=True)
     y_test=y_test.reset_index(drop=True)
+    return data_train, data_test, y_train, y_test
+
+
+if __name__ == '__main__':
+
+    # To train the whole ensemble in parallel into a versioned model directory, use train_ensemble.py
+    data_train, data_test, y_train, y_test = load_training_split("processed_training_data.csv")
+
+    # Fit the preprocessor and SMOTE once; every trainer reuses the cached matrices
+    prepared = prepare_training_data(data_train, y_train, data_test, y_test)
 
-    # preprocessor, model = rf_train_pipeline(data_train, y_train, data_test, y_test)
-    preprocessor, model = xgb_train_pipeline(data_train, y_train, data_test, y_test)
-    # nn_model = neuralnetwork(data_train, y_train, data_test, y_test)
+    # preprocessor, rf_model = rf_train_pipeline(data_train, y_train, data_test, y_test, prepared)
+    preprocessor, xgb_model = xgb_train_pipeline(data_train, y_train, data_test, y_test, prepared)
+    # nn_model = neuralnetwork(data_train, y_train, data_test, y_test, prepared)
+    # export_onnx(preprocessor, rf_model, xgb_model, nn_model)
+    # check_onnx_parity(data_test)
 
     a, b, c = predict_single_record()
     print(a, b, c)
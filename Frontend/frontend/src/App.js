@@ -11,7 +11,7 @@ import DataEntryForm from './components/DataEntryForm';
 import SyntheticGenerator from './components/SyntheticGenerator';
 import ResultsDisplay from './components/ResultsDisplay';
 import SyntheticResults from './components/SyntheticResults';
-import { predictLoanDefault, generateSyntheticData } from './services/api';
+import { predictLoanDefault, streamPredictSynthetic } from './services/api';
 
 import './App.css';
 
@@ -50,21 +50,22 @@ const App = () => {
     setError(null);
     
     try {
-      // Generate synthetic data
-      const data = await generateSyntheticData(count, defaultRatio);
+      // Generate and score synthetic data in one streamed request
+      const rows = [];
+      await streamPredictSynthetic(count, defaultRatio, (batch) => rows.push(...batch));
+      // Flattened for the results table
+      const data = rows.map((row) => ({ ...row.input, is_defaulter: row.is_defaulter }));
       
-      if (data && data.length > 0) {
+      if (data.length > 0) {
         // Store the full synthetic data
         setSyntheticData(data);
         
-        // Use the first generated record for prediction
-        const firstRecord = data[0];
-        const results = await predictLoanDefault(firstRecord);
-        
-        setPredictionResults(results);
-        setApplicationData(firstRecord);
+        // Show the first generated record's prediction
+        setPredictionResults(rows[0].prediction);
+        setApplicationData(rows[0].input);
         setActiveTab('3'); // Switch to results tab
       }
+      return data;
     } catch (error) {
       setError('Failed to generate synthetic data. Please try again.');
       console.error(error);
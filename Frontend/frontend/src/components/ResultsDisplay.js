@@ -6,6 +6,10 @@ const ResultsDisplay = ({ results, applicationData }) => {
   if (!results) return null;
   
   const getDefaultStatus = (prediction) => {
+    // null: skipped by the cascade ensemble once the majority was settled
+    if (prediction === null || prediction === undefined) {
+      return <Tag color="default">Skipped</Tag>;
+    }
     return prediction === 1 ? (
       <Tag color="red" icon={<CloseCircleOutlined />}>
         Likely to Default
@@ -100,22 +104,28 @@ const ResultsDisplay = ({ results, applicationData }) => {
     >
       <Row gutter={16}>
         <Col span={12}>
-          <Statistic
-            title="Default Probability"
-            value={results.default_probability * 100}
-            precision={2}
-            suffix="%"
-            valueStyle={{
-              color: results.default_probability > 0.5 ? '#cf1322' : '#3f8600',
-            }}
-          />
-          
-          <Progress
-            percent={Math.round(results.default_probability * 100)}
-            status={results.default_probability > 0.5 ? "exception" : "success"}
-            strokeWidth={20}
-            style={{ marginTop: 16 }}
-          />
+          {results.default_probability === null ? (
+            <Statistic title="Default Probability" value="Not evaluated" />
+          ) : (
+            <>
+              <Statistic
+                title="Default Probability"
+                value={results.default_probability * 100}
+                precision={2}
+                suffix="%"
+                valueStyle={{
+                  color: results.default_probability > 0.5 ? '#cf1322' : '#3f8600',
+                }}
+              />
+              
+              <Progress
+                percent={Math.round(results.default_probability * 100)}
+                status={results.default_probability > 0.5 ? "exception" : "success"}
+                strokeWidth={20}
+                style={{ marginTop: 16 }}
+              />
+            </>
+          )}
         </Col>
         
         <Col span={12}>
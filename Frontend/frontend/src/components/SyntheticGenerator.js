@@ -12,11 +12,11 @@ const SyntheticGenerator = ({ onGenerate }) => {
     setLoading(true);
     try {
       const data = await onGenerate(count, defaultRatio);
-      // Add is_defaulter flag based on index
+      // Rows are shuffled server-side, so prefer the server's is_defaulter flag
       const numDefaulters = Math.floor(count * defaultRatio);
-      const dataWithFlags = data.map((entry, index) => ({
+      const dataWithFlags = (data || []).map((entry, index) => ({
         ...entry,
-        is_defaulter: index < numDefaulters
+        is_defaulter: entry.is_defaulter ?? index < numDefaulters
       }));
       setGeneratedData(dataWithFlags);
     } catch (error) {
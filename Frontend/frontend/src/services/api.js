@@ -40,4 +40,42 @@ export const predictWithSynthetic = async (count = 1, defaultRatio = 0.3) => {
     console.error('Error predicting with synthetic data:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+// Streams NDJSON rows ({input, is_defaulter, prediction}) from the server,
+// calling onRows with each parsed batch as it arrives
+export const streamPredictSynthetic = async (count, defaultRatio, onRows, chunkSize = 1000) => {
+  const response = await fetch(`${API_BASE_URL}/predict-synthetic/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ count, default_ratio: defaultRatio, chunk_size: chunkSize }),
+  });
+  if (!response.ok) {
+    throw new Error(`Streaming request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const parseLines = (lines) => {
+    const rows = lines.filter((line) => line.trim()).map((line) => JSON.parse(line));
+    const failed = rows.find((row) => row.error);
+    if (failed) {
+      throw new Error(failed.error);
+    }
+    if (rows.length > 0) {
+      onRows(rows);
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    parseLines(lines);
+  }
+  parseLines([buffer + decoder.decode()]);
+};